@@ -0,0 +1,2 @@
+# Lets pytest (and the cocotb simulators it launches, which inherit sys.path)
+# import the `icyrisc` package from the repository root.
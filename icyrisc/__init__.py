@@ -0,0 +1,3 @@
+"""Python models and tooling for the IcyRisc RV32I core."""
+
+from icyrisc.iss import Iss, StepResult
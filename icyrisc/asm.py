@@ -0,0 +1,527 @@
+## Two-pass RV32I assembler that writes the four memory.sv byte lanes directly
+#
+#   python -m icyrisc.asm programs/rv32i_test.s -o programs/rv32i_test
+#
+# Supports labels, `.equ` constants, %hi / %lo, the usual pseudo-instructions
+# (li, la, mv, not, neg, j, jr, call, tail, ret, nop, beqz, bnez, bgt, ble, ...),
+# the `jalr rs` / `jalr rd, rs` short forms and the data directives .word /
+# .half / .byte / .ascii / .asciz / .space / .align / .org. Everything lives
+# in one flat address space starting at 0, which is where the core starts
+# fetching after reset.
+
+import argparse
+import ast
+import re
+from collections import namedtuple
+from pathlib import Path
+
+from icyrisc.isa import (
+    ABI_NAMES,
+    OP_AUIPC,
+    OP_BTYPE,
+    OP_ITYPE,
+    OP_JAL,
+    OP_JALR,
+    OP_LOAD,
+    OP_LUI,
+    OP_RTYPE,
+    OP_STYPE,
+)
+from icyrisc.memimage import MEM_BYTES, write_lanes
+
+
+def assemble_r_instruction(funct7, funct3, rd, rs1, rs2, opcode=OP_RTYPE):
+    """Assembles an R-type instruction."""
+    return (funct7 & 0x7F) << 25 | (rs2 & 0x1F) << 20 | (rs1 & 0x1F) << 15 | (funct3 & 0x7) << 12 | (rd & 0x1F) << 7 | (opcode & 0x7F)
+
+def assemble_i_instruction(opcode, funct3, rd, rs1, imm):
+    """Assembles an I-type instruction (ALU immediates, loads and jalr)."""
+    return (imm & 0xFFF) << 20 | (rs1 & 0x1F) << 15 | (funct3 & 0x7) << 12 | (rd & 0x1F) << 7 | (opcode & 0x7F)
+
+def assemble_s_instruction(funct3, rs1, rs2, imm):
+    """Assembles an S-type instruction (used for stores)."""
+    return ((imm >> 5) & 0x7F) << 25 | (rs2 & 0x1F) << 20 | (rs1 & 0x1F) << 15 | (funct3 & 0x7) << 12 | (imm & 0x1F) << 7 | OP_STYPE
+
+def assemble_b_instruction(funct3, rs1, rs2, imm):
+    """Assembles a B-type (branch) instruction."""
+    b_imm12 = (imm >> 12) & 0x1
+    b_imm10_5 = (imm >> 5) & 0x3F
+    b_imm4_1 = (imm >> 1) & 0xF
+    b_imm11 = (imm >> 11) & 0x1
+    return (b_imm12 << 31) | (b_imm10_5 << 25) | (rs2 & 0x1F) << 20 | (rs1 & 0x1F) << 15 | (funct3 & 0x7) << 12 | (b_imm4_1 << 8) | (b_imm11 << 7) | OP_BTYPE
+
+def assemble_u_instruction(opcode, rd, imm):
+    """Assembles a U-type instruction; imm is the 20-bit upper immediate."""
+    return (imm & 0xFFFFF) << 12 | (rd & 0x1F) << 7 | (opcode & 0x7F)
+
+def assemble_jal_instruction(rd, imm):
+    """Assembles a JAL (Jump and Link) instruction."""
+    j_imm20 = (imm >> 20) & 0x1
+    j_imm10_1 = (imm >> 1) & 0x3FF
+    j_imm11 = (imm >> 11) & 0x1
+    j_imm19_12 = (imm >> 12) & 0xFF
+    return (j_imm20 << 31) | (j_imm19_12 << 12) | (j_imm11 << 20) | (j_imm10_1 << 21) | (rd & 0x1F) << 7 | OP_JAL
+
+def assemble_jalr_instruction(rd, rs1, imm):
+    """Assembles a JALR (Jump and Link Register) instruction."""
+    return assemble_i_instruction(OP_JALR, 0b000, rd, rs1, imm)
+
+
+class AsmError(Exception):
+    """Raised for malformed source, with the offending line number."""
+
+    def __init__(self, lineno, message):
+        super().__init__(f"line {lineno}: {message}")
+        self.lineno = lineno
+
+
+REGISTERS = {f"x{i}": i for i in range(32)}
+REGISTERS.update({name: i for i, name in enumerate(ABI_NAMES)})
+REGISTERS["fp"] = 8
+
+# mnemonic: (format, opcode, funct3, funct7)
+INSTRUCTIONS = {
+    "add": ("r", OP_RTYPE, 0b000, 0b0000000),
+    "sub": ("r", OP_RTYPE, 0b000, 0b0100000),
+    "sll": ("r", OP_RTYPE, 0b001, 0b0000000),
+    "slt": ("r", OP_RTYPE, 0b010, 0b0000000),
+    "sltu": ("r", OP_RTYPE, 0b011, 0b0000000),
+    "xor": ("r", OP_RTYPE, 0b100, 0b0000000),
+    "srl": ("r", OP_RTYPE, 0b101, 0b0000000),
+    "sra": ("r", OP_RTYPE, 0b101, 0b0100000),
+    "or": ("r", OP_RTYPE, 0b110, 0b0000000),
+    "and": ("r", OP_RTYPE, 0b111, 0b0000000),
+    "addi": ("i", OP_ITYPE, 0b000, None),
+    "slti": ("i", OP_ITYPE, 0b010, None),
+    "sltiu": ("i", OP_ITYPE, 0b011, None),
+    "xori": ("i", OP_ITYPE, 0b100, None),
+    "ori": ("i", OP_ITYPE, 0b110, None),
+    "andi": ("i", OP_ITYPE, 0b111, None),
+    "slli": ("shift", OP_ITYPE, 0b001, 0b0000000),
+    "srli": ("shift", OP_ITYPE, 0b101, 0b0000000),
+    "srai": ("shift", OP_ITYPE, 0b101, 0b0100000),
+    "lb": ("load", OP_LOAD, 0b000, None),
+    "lh": ("load", OP_LOAD, 0b001, None),
+    "lw": ("load", OP_LOAD, 0b010, None),
+    "lbu": ("load", OP_LOAD, 0b100, None),
+    "lhu": ("load", OP_LOAD, 0b101, None),
+    "sb": ("store", OP_STYPE, 0b000, None),
+    "sh": ("store", OP_STYPE, 0b001, None),
+    "sw": ("store", OP_STYPE, 0b010, None),
+    "beq": ("branch", OP_BTYPE, 0b000, None),
+    "bne": ("branch", OP_BTYPE, 0b001, None),
+    "blt": ("branch", OP_BTYPE, 0b100, None),
+    "bge": ("branch", OP_BTYPE, 0b101, None),
+    "bltu": ("branch", OP_BTYPE, 0b110, None),
+    "bgeu": ("branch", OP_BTYPE, 0b111, None),
+    "lui": ("u", OP_LUI, None, None),
+    "auipc": ("u", OP_AUIPC, None, None),
+    "jal": ("jal", OP_JAL, None, None),
+    "jalr": ("jalr", OP_JALR, 0b000, None),
+}
+
+# pseudo branches that swap their operands or compare against x0
+SWAPPED_BRANCHES = {"bgt": "blt", "ble": "bge", "bgtu": "bltu", "bleu": "bgeu"}
+ZERO_BRANCHES = {"beqz": "beq", "bnez": "bne", "bltz": "blt", "bgez": "bge"}
+
+DATA_SIZES = {".word": 4, ".half": 2, ".short": 2, ".byte": 1}
+IGNORED_DIRECTIVES = {".text", ".data", ".bss", ".section", ".globl", ".global", ".type", ".size", ".option", ".file", ".p2align"}
+
+Statement = namedtuple("Statement", ["lineno", "addr", "op", "args", "size", "source"])
+Assembly = namedtuple("Assembly", ["image", "symbols", "listing"])
+Assembly.__doc__ = """Assembled program: image is a little-endian bytearray starting at address 0,
+listing is a list of (address, bytes, source line) tuples."""
+
+LABEL = re.compile(r"^\s*([A-Za-z_.$][\w.$]*)\s*:")
+MEMORY_OPERAND = re.compile(r"^(.*)\((\s*\w+\s*)\)$")
+SYMBOL = re.compile(r"%(?:hi|lo)\b|(?<![\w.$])[A-Za-z_.$][\w.$]*")
+
+
+def _split_operands(text):
+    """Splits on commas that are not inside quotes or parentheses."""
+    operands, depth, quote, current = [], 0, None, ""
+    for ch in text:
+        if quote:
+            current += ch
+            if ch == quote and not current.endswith("\\" + quote):
+                quote = None
+        elif ch in "\"'":
+            quote = ch
+            current += ch
+        elif ch == "(":
+            depth += 1
+            current += ch
+        elif ch == ")":
+            depth -= 1
+            current += ch
+        elif ch == "," and depth == 0:
+            operands.append(current.strip())
+            current = ""
+        else:
+            current += ch
+    if current.strip():
+        operands.append(current.strip())
+    return operands
+
+
+def _strip_comment(line):
+    quote = None
+    for i, ch in enumerate(line):
+        if quote:
+            if ch == quote and line[i - 1] != "\\":
+                quote = None
+        elif ch in "\"'":
+            quote = ch
+        elif ch == "#" or line.startswith("//", i) or ch == ";":
+            return line[:i]
+    return line
+
+
+def _hi(value):
+    return ((value + 0x800) >> 12) & 0xFFFFF
+
+
+def _lo(value):
+    value &= 0xFFF
+    return value - 0x1000 if value & 0x800 else value
+
+
+def _li_fits(value):
+    return -2048 <= value <= 2047
+
+
+class Assembler:
+    """Assembles one source text; see the module comment for the accepted syntax."""
+
+    def __init__(self, symbols=None):
+        self.symbols = dict(symbols or {})
+
+    def assemble(self, source):
+        statements = self._first_pass(source)
+        size = max((s.addr + s.size for s in statements), default=0)
+        image = bytearray(size)
+        listing = []
+        for s in statements:
+            data = self._emit(s)
+            image[s.addr : s.addr + len(data)] = data
+            listing.append((s.addr, bytes(data), s.source))
+        return Assembly(image, dict(self.symbols), listing)
+
+    def _first_pass(self, source):
+        statements = []
+        addr = 0
+        for lineno, raw in enumerate(source.splitlines(), start=1):
+            line = _strip_comment(raw).strip()
+            while True:
+                match = LABEL.match(line)
+                if match is None:
+                    break
+                self._define(lineno, match[1], addr)
+                line = line[match.end() :].strip()
+            if not line:
+                continue
+            parts = line.split(None, 1)
+            op = parts[0].lower()
+            args = _split_operands(parts[1]) if len(parts) > 1 else []
+
+            if op in (".equ", ".set"):
+                self._expect(lineno, op, args, 2)
+                self._define(lineno, args[0], self._eval(lineno, args[1], addr), redefine=True)
+                continue
+            if op == ".org":
+                self._expect(lineno, op, args, 1)
+                target = self._eval(lineno, args[0], addr)
+                if target < addr:
+                    raise AsmError(lineno, f".org 0x{target:x} moves backwards from 0x{addr:x}")
+                addr = target
+                continue
+            if op in IGNORED_DIRECTIVES:
+                continue
+
+            size = self._size(lineno, op, args, addr)
+            if not op.startswith(".") and addr % 4:
+                raise AsmError(lineno, f"{op} at misaligned address 0x{addr:x}")
+            statements.append(Statement(lineno, addr, op, args, size, raw.strip()))
+            addr += size
+        return statements
+
+    def _size(self, lineno, op, args, addr):
+        if op in DATA_SIZES:
+            return DATA_SIZES[op] * len(args)
+        if op in (".space", ".zero", ".skip"):
+            return self._eval(lineno, args[0], addr)
+        if op in (".ascii", ".asciz", ".string"):
+            return sum(len(self._string(lineno, arg)) for arg in args) + (len(args) if op != ".ascii" else 0)
+        if op in (".align", ".balign"):
+            align = self._eval(lineno, args[0], addr)
+            align = align if op == ".balign" else 1 << align
+            return -addr % align
+        if op == "la":
+            return 8
+        if op == "li":
+            self._expect(lineno, op, args, 2)
+            try:
+                value = self._eval(lineno, args[1], addr)
+            except AsmError:
+                return 8  # forward reference: reserve lui + addi
+            return 4 if _li_fits(_signed32(value)) else 8
+        if op.startswith("."):
+            raise AsmError(lineno, f"unknown directive {op}")
+        return 4
+
+    def _emit(self, s):
+        op, args, lineno, addr = s.op, s.args, s.lineno, s.addr
+        if op in DATA_SIZES:
+            width = DATA_SIZES[op]
+            return b"".join((self._eval(lineno, arg, addr) & ((1 << 8 * width) - 1)).to_bytes(width, "little") for arg in args)
+        if op in (".space", ".zero", ".skip"):
+            fill = self._eval(lineno, args[1], addr) & 0xFF if len(args) > 1 else 0
+            return bytes([fill]) * s.size
+        if op in (".ascii", ".asciz", ".string"):
+            terminator = b"" if op == ".ascii" else b"\0"
+            return b"".join(self._string(lineno, arg) + terminator for arg in args)
+        if op in (".align", ".balign"):
+            return bytes(s.size)
+
+        words = [self._encode(lineno, name, operands, addr + 4 * i) for i, (name, operands) in enumerate(self._expand(s))]
+        return b"".join(word.to_bytes(4, "little") for word in words)
+
+    def _expand(self, s):
+        """Rewrites pseudo-instructions into real (mnemonic, operands) pairs."""
+        op, args, lineno = s.op, s.args, s.lineno
+        if op == "nop":
+            return [("addi", ["x0", "x0", "0"])]
+        if op == "li":
+            value = _signed32(self._eval(lineno, args[1], s.addr))
+            if s.size == 4:
+                return [("addi", [args[0], "x0", str(value)])]
+            return [("lui", [args[0], str(_hi(value))]), ("addi", [args[0], args[0], str(_lo(value))])]
+        if op == "la":
+            self._expect(lineno, op, args, 2)
+            return [("auipc", [args[0], f"%hi(({args[1]}) - .)"]), ("addi", [args[0], args[0], f"%lo(({args[1]}) - . + 4)"])]
+        if op == "mv":
+            return [("addi", [args[0], args[1], "0"])]
+        if op == "not":
+            return [("xori", [args[0], args[1], "-1"])]
+        if op == "neg":
+            return [("sub", [args[0], "x0", args[1]])]
+        if op == "seqz":
+            return [("sltiu", [args[0], args[1], "1"])]
+        if op == "snez":
+            return [("sltu", [args[0], "x0", args[1]])]
+        if op == "j":
+            return [("jal", ["x0", args[0]])]
+        if op == "jal" and len(args) == 1:
+            return [("jal", ["ra", args[0]])]
+        if op == "jr":
+            return [("jalr", ["x0", args[0], "0"])]
+        if op == "jalr" and len(args) == 1:
+            return [("jalr", ["ra", args[0]] if MEMORY_OPERAND.match(args[0]) else ["ra", args[0], "0"])]
+        if op == "jalr" and len(args) == 2 and not MEMORY_OPERAND.match(args[1]):
+            return [("jalr", [args[0], args[1], "0"])]
+        if op == "ret":
+            return [("jalr", ["x0", "ra", "0"])]
+        if op == "call":
+            return [("jal", ["ra", args[0]])]
+        if op == "tail":
+            return [("jal", ["x0", args[0]])]
+        if op in SWAPPED_BRANCHES:
+            return [(SWAPPED_BRANCHES[op], [args[1], args[0], args[2]])]
+        if op in ZERO_BRANCHES:
+            return [(ZERO_BRANCHES[op], [args[0], "x0", args[1]])]
+        if op == "blez":
+            return [("bge", ["x0", args[0], args[1]])]
+        if op == "bgtz":
+            return [("blt", ["x0", args[0], args[1]])]
+        return [(op, args)]
+
+    def _encode(self, lineno, op, args, addr):
+        if op not in INSTRUCTIONS:
+            raise AsmError(lineno, f"unknown instruction {op}")
+        fmt, opcode, funct3, funct7 = INSTRUCTIONS[op]
+        if fmt == "r":
+            self._expect(lineno, op, args, 3)
+            rd, rs1, rs2 = (self._reg(lineno, a) for a in args)
+            return assemble_r_instruction(funct7, funct3, rd, rs1, rs2)
+        if fmt == "i":
+            self._expect(lineno, op, args, 3)
+            imm = self._imm(lineno, args[2], addr, -2048, 4095)
+            return assemble_i_instruction(opcode, funct3, self._reg(lineno, args[0]), self._reg(lineno, args[1]), imm)
+        if fmt == "shift":
+            self._expect(lineno, op, args, 3)
+            shamt = self._imm(lineno, args[2], addr, 0, 31)
+            return assemble_i_instruction(opcode, funct3, self._reg(lineno, args[0]), self._reg(lineno, args[1]), funct7 << 5 | shamt)
+        if fmt in ("load", "jalr"):
+            if fmt == "jalr" and len(args) == 3:
+                rd, rs1, imm = self._reg(lineno, args[0]), self._reg(lineno, args[1]), self._imm(lineno, args[2], addr, -2048, 2047)
+            else:
+                self._expect(lineno, op, args, 2)
+                rd = self._reg(lineno, args[0])
+                imm, rs1 = self._memory(lineno, args[1], addr)
+            return assemble_i_instruction(opcode, funct3, rd, rs1, imm)
+        if fmt == "store":
+            self._expect(lineno, op, args, 2)
+            imm, rs1 = self._memory(lineno, args[1], addr)
+            return assemble_s_instruction(funct3, rs1, self._reg(lineno, args[0]), imm)
+        if fmt == "branch":
+            self._expect(lineno, op, args, 3)
+            offset = self._offset(lineno, args[2], addr, 13)
+            return assemble_b_instruction(funct3, self._reg(lineno, args[0]), self._reg(lineno, args[1]), offset)
+        if fmt == "u":
+            self._expect(lineno, op, args, 2)
+            return assemble_u_instruction(opcode, self._reg(lineno, args[0]), self._imm(lineno, args[1], addr, -(1 << 19), (1 << 20) - 1))
+        self._expect(lineno, op, args, 2)
+        return assemble_jal_instruction(self._reg(lineno, args[0]), self._offset(lineno, args[1], addr, 21))
+
+    def _memory(self, lineno, operand, addr):
+        match = MEMORY_OPERAND.match(operand)
+        if match is None:
+            raise AsmError(lineno, f"expected offset(register), got {operand!r}")
+        offset = match[1].strip() or "0"
+        return self._imm(lineno, offset, addr, -2048, 2047), self._reg(lineno, match[2].strip())
+
+    def _offset(self, lineno, operand, addr, bits):
+        """Branch / jump target: a label or expression is pc-relative, a bare
+        number is taken as the offset itself (matching the hand-encoded tests)."""
+        try:
+            offset = int(operand, 0)
+        except ValueError:
+            offset = self._eval(lineno, operand, addr) - addr
+        if offset & 1 or not -(1 << (bits - 1)) <= offset < (1 << (bits - 1)):
+            raise AsmError(lineno, f"branch offset {offset} out of range")
+        return offset
+
+    def _imm(self, lineno, operand, addr, low, high):
+        value = self._eval(lineno, operand, addr)
+        if not low <= value <= high:
+            raise AsmError(lineno, f"immediate {value} out of range [{low}, {high}]")
+        return value
+
+    def _reg(self, lineno, name):
+        try:
+            return REGISTERS[name.strip().lower()]
+        except KeyError:
+            raise AsmError(lineno, f"unknown register {name!r}") from None
+
+    def _string(self, lineno, literal):
+        try:
+            return ast.literal_eval(literal).encode()
+        except (ValueError, SyntaxError):
+            raise AsmError(lineno, f"bad string literal {literal}") from None
+
+    def _define(self, lineno, name, value, redefine=False):
+        if name in self.symbols and not redefine:
+            raise AsmError(lineno, f"symbol {name} defined twice")
+        self.symbols[name] = value
+
+    def _expect(self, lineno, op, args, count):
+        if len(args) != count:
+            raise AsmError(lineno, f"{op} takes {count} operands, got {len(args)}")
+
+    def _eval(self, lineno, text, addr):
+        """Evaluates an integer expression over numbers, symbols, `.`, %hi and %lo."""
+        text = text.strip()
+        if re.fullmatch(r"'(\\?.)'", text):
+            return ord(ast.literal_eval(text))
+        names = {}
+
+        def rename(match):
+            # symbols may contain `.` and `$`, so give the Python parser placeholders
+            if match[0] in ("%hi", "%lo"):
+                return f"__{match[0][1:]}"
+            key = f"__s{len(names)}"
+            names[key] = match[0]
+            return key
+
+        try:
+            tree = ast.parse(SYMBOL.sub(rename, text), mode="eval")
+        except SyntaxError:
+            raise AsmError(lineno, f"bad expression {text!r}") from None
+        return self._eval_node(lineno, tree.body, addr, names)
+
+    def _eval_node(self, lineno, node, addr, names):
+        if isinstance(node, ast.Constant) and isinstance(node.value, int):
+            return node.value
+        if isinstance(node, ast.Name) and node.id in names:
+            symbol = names[node.id]
+            if symbol == ".":
+                return addr
+            if symbol in self.symbols:
+                return self.symbols[symbol]
+            raise AsmError(lineno, f"undefined symbol {symbol}")
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd, ast.Invert)):
+            value = self._eval_node(lineno, node.operand, addr, names)
+            return {ast.USub: -value, ast.UAdd: value, ast.Invert: ~value}[type(node.op)]
+        if isinstance(node, ast.BinOp):
+            a = self._eval_node(lineno, node.left, addr, names)
+            b = self._eval_node(lineno, node.right, addr, names)
+            ops = {
+                ast.Add: lambda: a + b,
+                ast.Sub: lambda: a - b,
+                ast.Mult: lambda: a * b,
+                ast.FloorDiv: lambda: a // b,
+                ast.LShift: lambda: a << b,
+                ast.RShift: lambda: a >> b,
+                ast.BitAnd: lambda: a & b,
+                ast.BitOr: lambda: a | b,
+                ast.BitXor: lambda: a ^ b,
+            }
+            if type(node.op) in ops:
+                return ops[type(node.op)]()
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in ("__hi", "__lo") and len(node.args) == 1:
+            value = self._eval_node(lineno, node.args[0], addr, names)
+            return _hi(value) if node.func.id == "__hi" else _lo(value)
+        raise AsmError(lineno, f"unsupported expression {ast.unparse(node)!r}")
+
+
+def _signed32(value):
+    value &= 0xFFFFFFFF
+    return value - 0x100000000 if value & 0x80000000 else value
+
+
+def assemble(source, symbols=None):
+    """Assembles source text and returns an Assembly."""
+    return Assembler(symbols).assemble(source)
+
+
+def assemble_words(source, symbols=None):
+    """Assembles source text into a list of little-endian 32-bit words."""
+    image = assemble(source, symbols).image
+    image += bytes(-len(image) % 4)
+    return [int.from_bytes(image[i : i + 4], "little") for i in range(0, len(image), 4)]
+
+
+def write_program(assembly, prefix, words_file=False):
+    """Writes the `<prefix>0..3.txt` lanes (and optionally `<prefix>.txt`) for an Assembly."""
+    if len(assembly.image) > MEM_BYTES:
+        raise ValueError(f"program is {len(assembly.image)} bytes, memory.sv only holds {MEM_BYTES}")
+    image = bytearray(MEM_BYTES)
+    image[: len(assembly.image)] = assembly.image
+    write_lanes(prefix, image)
+    if words_file:
+        words = memoryview(image).cast("I")
+        Path(f"{prefix}.txt").write_text("".join(f"{w:08x}\n" for w in words))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Assemble RV32I source into memory.sv lane files.")
+    parser.add_argument("source", help="assembly source file")
+    parser.add_argument("-o", "--output", help="output prefix (default: source path without .s)")
+    parser.add_argument("--words", action="store_true", help="also write the unsplit <prefix>.txt word file")
+    parser.add_argument("--listing", action="store_true", help="print an address / encoding listing")
+    args = parser.parse_args(argv)
+
+    source = Path(args.source)
+    prefix = args.output or str(source.with_suffix(""))
+    try:
+        assembly = assemble(source.read_text())
+    except AsmError as e:
+        parser.exit(1, f"{source}:{e}\n")
+    write_program(assembly, prefix, words_file=args.words)
+    if args.listing:
+        for addr, data, line in assembly.listing:
+            print(f"{addr:08x}  {data[:8].hex():<16}  {line}")
+
+
+if __name__ == "__main__":
+    main()
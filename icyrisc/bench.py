@@ -0,0 +1,237 @@
+## Simulator throughput benchmarks for `top`
+#
+# Runs the standard workloads under each simulator and reports, as JSON,
+# simulated cycles and retired instructions per wall-clock second (measured
+# inside the simulation, so start-up is excluded), the build time of the model
+# and the peak RSS of the simulator process:
+#
+#   rv32i_test   programs/rv32i_test in lockstep with the reference model
+#   random       a long icyrisc.rvgen program, in lockstep
+#   vectors      batched random R/I-type vectors (icyrisc.harness.vectors)
+#
+#   python -m icyrisc.bench                              # every installed simulator
+#   python -m icyrisc.bench --sim verilator -w random
+#   python -m icyrisc.bench --save-baseline              # record this machine's numbers
+#
+# Each run is compared with the baseline (sim_build/bench/baseline.json unless
+# --baseline says otherwise) and the command fails if a throughput dropped, or
+# the build time or memory grew, by more than --tolerance.
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+OUT_DIR = ROOT / "sim_build" / "bench"
+CACHE_DIR = OUT_DIR / "cache"  # wiped per simulator before every run, so never next to --out
+ENV = "ICYRISC_BENCH"
+SCHEMA = 1
+
+# simulator -> executable that must be on PATH to run it
+EXECUTABLES = {"icarus": "iverilog", "verilator": "verilator"}
+
+Workload = namedtuple("Workload", ["name", "testcase", "program", "plusargs"])
+Workload.__doc__ = """A benchmark: the bench_top testcase to run, the program image it runs
+("rvgen:<seed>" for a generated one, None for none) and extra plusargs."""
+
+WORKLOADS = {
+    "rv32i_test": Workload("rv32i_test", "bench_program", "rv32i_test", ()),
+    "random": Workload("random", "bench_program", "rvgen:1", ()),
+    "vectors": Workload("vectors", "bench_vectors", None, ()),
+}
+RANDOM_LENGTH = 600  # rvgen items: about 800 instructions, as long as fits below the data window
+
+# metric -> +1 if bigger is better, -1 if smaller is better
+METRICS = {
+    "cycles_per_second": 1,
+    "instructions_per_second": 1,
+    "build_seconds": -1,
+    "peak_rss_mb": -1,
+}
+
+Regression = namedtuple("Regression", ["key", "metric", "baseline", "current", "change"])
+Regression.__doc__ = """A metric that got worse than the tolerance allows. key is "sim/workload"
+and change the relative change, signed so that negative is worse."""
+
+
+def write_measurement(cycles, instructions, seconds):
+    """Called by the bench_top testcases: records what the run measured in $ICYRISC_BENCH."""
+    Path(os.environ[ENV]).write_text(json.dumps({"cycles": cycles, "instructions": instructions,
+                                                 "seconds": seconds}))
+
+
+def available_simulators():
+    return [sim for sim, exe in EXECUTABLES.items() if shutil.which(exe)]
+
+
+def _program_plusargs(workload, out_dir):
+    from icyrisc.harness.program import program_plusargs
+    from icyrisc.memimage import write_lanes
+    from icyrisc.rvgen import Config, generate_program
+
+    if workload.program is None:
+        return []
+    if workload.program.startswith("rvgen:"):
+        program = generate_program(int(workload.program[6:]), Config(length=RANDOM_LENGTH))
+        prefix = out_dir / "programs" / f"{workload.name}_"
+        prefix.parent.mkdir(parents=True, exist_ok=True)
+        write_lanes(prefix, program.image)
+        return program_plusargs(prefix)
+    return program_plusargs(ROOT / "programs" / workload.program)
+
+
+def build(sim, cache_dir):
+    """Builds `top` for sim into a private cache; returns (build_dir, seconds)."""
+    from icyrisc.buildcache import cached_build
+    from icyrisc.regress import TOP, _runner
+    from icyrisc.simulator import build_args
+
+    start = time.perf_counter()
+    cached = cached_build(
+        _runner(sim),
+        sources=list(TOP.sources),
+        hdl_toplevel=TOP.toplevel,
+        build_args=list(TOP.build_args) + build_args(sim),
+        timescale=TOP.timescale,
+        cache_dir=cache_dir,
+    )
+    return cached.build_dir, time.perf_counter() - start
+
+
+def run_workload(sim, workload, build_dir, test_dir, cycles, vectors):
+    """Runs one workload in a fresh process (see measure()) and returns the measurement
+    written by the simulation plus the peak RSS of the simulator in MB."""
+    from icyrisc.regress import TOP, _runner
+
+    test_dir = Path(test_dir)
+    test_dir.mkdir(parents=True, exist_ok=True)
+    result = test_dir / "measurement.json"
+    result.unlink(missing_ok=True)
+    plusargs = _program_plusargs(workload, test_dir) + list(workload.plusargs)
+    plusargs += [f"+BENCH_CYCLES={cycles}", f"+BENCH_VECTORS={vectors}"]
+    _runner(sim).test(
+        test_module="bench_top",
+        hdl_toplevel=TOP.toplevel,
+        hdl_toplevel_lang="verilog",
+        testcase=workload.testcase,
+        plusargs=plusargs,
+        extra_env={ENV: str(result)},
+        build_dir=build_dir,
+        test_dir=test_dir,
+        timescale=TOP.timescale,
+        log_file=test_dir / "sim.log",
+    )
+    if not result.exists():
+        raise RuntimeError(f"{sim}/{workload.name} wrote no measurement, see {test_dir / 'sim.log'}")
+    measurement = json.loads(result.read_text())
+    # this process only ever ran the one simulator, so its children's peak is the simulator's
+    measurement["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return measurement
+
+
+def measure(sims, workloads, out_dir=OUT_DIR, cycles=20_000, vectors=2_000, log=print, cache_dir=CACHE_DIR):
+    """Builds and runs every (simulator, workload) pair; returns the JSON-ready report.
+    Each simulator builds into its own scratch directory under cache_dir."""
+    out_dir = Path(out_dir)
+    results = []
+    for sim in sims:
+        scratch = Path(cache_dir) / sim
+        shutil.rmtree(scratch, ignore_errors=True)  # time a real build, not a cache hit
+        build_dir, build_seconds = build(sim, scratch)
+        log(f"build {sim:<10} {build_seconds:8.1f}s")
+        for name in workloads:
+            workload = WORKLOADS[name]
+            with ProcessPoolExecutor(1) as pool:
+                m = pool.submit(run_workload, sim, workload, build_dir, out_dir / "tests" / sim / name,
+                                cycles, vectors).result()
+            entry = {
+                "sim": sim,
+                "workload": name,
+                "cycles": m["cycles"],
+                "instructions": m["instructions"],
+                "seconds": round(m["seconds"], 4),
+                "cycles_per_second": round(m["cycles"] / m["seconds"], 1),
+                "instructions_per_second": round(m["instructions"] / m["seconds"], 1),
+                "build_seconds": round(build_seconds, 2),
+                "peak_rss_mb": round(m["peak_rss_mb"], 1),
+            }
+            results.append(entry)
+            log(f"run   {sim:<10} {name:<12} {entry['cycles_per_second']:>12,.0f} cycles/s "
+                f"{entry['instructions_per_second']:>12,.0f} inst/s {entry['peak_rss_mb']:>8.1f} MB")
+    return {
+        "schema": SCHEMA,
+        "host": platform.node(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance=0.15):
+    """Regressions of report against baseline: every metric of a (sim, workload) in
+    both that is worse by more than tolerance (a fraction)."""
+    old = {(r["sim"], r["workload"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in report["results"]:
+        base = old.get((r["sim"], r["workload"]))
+        if base is None:
+            continue
+        for metric, direction in METRICS.items():
+            if not base.get(metric) or metric not in r:
+                continue
+            change = direction * (r[metric] - base[metric]) / base[metric]
+            if change < -tolerance:
+                regressions.append(Regression(f"{r['sim']}/{r['workload']}", metric, base[metric], r[metric], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark simulation throughput of top and check it against a baseline.")
+    parser.add_argument("--sim", action="append", choices=list(EXECUTABLES),
+                        help="simulator to benchmark, repeatable (default: every one installed)")
+    parser.add_argument("-w", "--workload", action="append", choices=list(WORKLOADS),
+                        help="workload to run, repeatable (default: all)")
+    parser.add_argument("--cycles", type=int, default=20_000, help="cycles each program workload runs")
+    parser.add_argument("--vectors", type=int, default=2_000, help="vectors the vectors workload streams")
+    parser.add_argument("-o", "--out", type=Path, default=OUT_DIR / "results.json", help="where to write the report")
+    parser.add_argument("--baseline", type=Path, default=OUT_DIR / "baseline.json")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative slowdown (default 0.15)")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    args = parser.parse_args(argv)
+
+    sims = args.sim or available_simulators()
+    if not sims:
+        parser.error(f"none of {', '.join(EXECUTABLES.values())} is installed")
+    report = measure(sims, args.workload or list(WORKLOADS), args.out.parent, args.cycles, args.vectors)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"report in {args.out}")
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(args.out, args.baseline)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+    regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+    for r in regressions:
+        print(f"REGRESSION {r.key:<24} {r.metric:<24} {r.baseline:>12,.1f} -> {r.current:>12,.1f} ({100 * r.change:+.1f}%)")
+    if regressions:
+        return 1
+    print(f"no regressions beyond {100 * args.tolerance:.0f}% against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+## Content-hashed cache of cocotb_tools runner builds
+#
+# cached_build() stands in for runner.build(): it hashes everything the
+# compiled snapshot depends on - the contents of every source file (including
+# the ones listed in -c/-f command files such as top.f, with $(PROJ_ROOT)
+# expanded), the include directories and their headers, the defines,
+# parameters, toplevel, timescale and the simulator's version - and builds
+# into sim_build/cache/<key>. A later call with the same inputs reuses that
+# snapshot without running any build tool, so only a real change to an .sv
+# file or a define such as MEM_FILE_PATH_PREFIX costs a rebuild. The least recently
+# used snapshots beyond max_entries are evicted.
+#
+# A process holds a shared lock (<key>.use) on every snapshot it built or
+# reused until it exits or calls release(), so a parallel worker evicting the
+# cache never deletes a snapshot another worker is still running tests
+# against: evict() passes over held snapshots to the next least recently used.
+#
+# Memory images are read by $readmemh when the simulation starts, so editing
+# programs/*.txt never invalidates a build; pointing MEM_FILE_PATH_PREFIX at
+# a different image does, and each image keeps its own snapshot.
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import time
+from collections import namedtuple
+from functools import partial
+from pathlib import Path
+
+from cocotb_tools import _env
+
+ROOT = Path(__file__).resolve().parent.parent
+CACHE_DIR = Path(os.getenv("ICYRISC_BUILD_CACHE", ROOT / "sim_build" / "cache"))
+MAX_ENTRIES = 8
+
+MARKER = "icyrisc-build.json"
+HEADER_SUFFIXES = (".sv", ".svh", ".v", ".vh")
+
+# simulator runner class -> command printing its version
+VERSION_COMMANDS = {
+    "Icarus": ["iverilog", "-V"],
+    "Verilator": ["verilator", "--version"],
+}
+
+CachedBuild = namedtuple("CachedBuild", ["build_dir", "key", "hit"])
+
+_versions = {}
+_held = {}  # snapshot directory -> its .use file, locked shared by this process
+
+
+def tool_version(runner):
+    """First line of the simulator's version banner (cached per process)."""
+    name = type(runner).__name__
+    if name not in _versions:
+        command = VERSION_COMMANDS.get(name)
+        try:
+            output = subprocess.run(command, capture_output=True, text=True).stdout if command else ""
+        except OSError:
+            output = ""
+        _versions[name] = f"{name} {output.strip().splitlines()[0] if output.strip() else 'unknown'}"
+    return _versions[name]
+
+
+def _expand(text):
+    """Expands $(VAR) and ${VAR} the way iverilog does in command files."""
+    return re.sub(r"\$[({](\w+)[)}]", lambda m: os.environ.get(m[1], ""), text)
+
+
+def command_file_sources(path):
+    """Lists the source files named in an iverilog -c/-f command file, in order."""
+    sources = []
+    for line in Path(path).read_text().splitlines():
+        line = _expand(line.split("#", 1)[0].strip())
+        if line and not line.startswith(("+", "-")):
+            sources.append(Path(line))
+    return sources
+
+
+def resolve_sources(sources=(), build_args=()):
+    """The full ordered source list: explicit sources plus those of any command file
+    passed as `-c <file>` or `-f <file>`."""
+    resolved = [Path(str(s)) for s in sources]
+    args = [str(a) for a in build_args]
+    for flag, value in zip(args, args[1:]):
+        if flag in ("-c", "-f"):
+            resolved += command_file_sources(value)
+    return resolved
+
+
+def build_key(runner, hdl_toplevel, sources=(), build_args=(), includes=(), defines=None, parameters=None,
+              timescale=None, waves=False):
+    """Hashes every input of a build into a hex key. waves is hashed as the runner
+    will apply it: the WAVES environment variable overrides the argument."""
+    h = hashlib.sha256()
+
+    def feed(*parts):
+        for part in parts:
+            h.update(repr(part).encode())
+            h.update(b"\0")
+
+    feed(tool_version(runner), hdl_toplevel, timescale, _env.get_bool("WAVES", waves))
+    feed(sorted((str(k), str(v)) for k, v in (defines or {}).items()))
+    feed(sorted((str(k), str(v)) for k, v in (parameters or {}).items()))
+    feed([str(a) for a in build_args])
+    for path in resolve_sources(sources, build_args):
+        feed(str(path))
+        h.update(path.read_bytes())
+    for include in includes:
+        include = Path(include)
+        feed(str(include))
+        for header in sorted(p for p in include.glob("*") if p.suffix in HEADER_SUFFIXES):
+            feed(header.name)
+            h.update(header.read_bytes())
+    return h.hexdigest()
+
+
+def reuse_build(runner, **kwargs):
+    """runner.build() minus its commands: sets up everything runner.test() reads
+    (build_dir, toplevel, defines, ...) for a snapshot that is already built. The
+    runners' own up-to-date checks cannot be relied on for this: Verilator's
+    ignores `always` and reruns verilator and make every time."""
+    runner._build_command = lambda: []
+    try:
+        runner.build(**kwargs)
+    finally:
+        del runner._build_command
+
+
+def cached_build(runner, hdl_toplevel, sources=(), build_args=(), includes=(), defines=None, parameters=None,
+                 timescale=None, waves=False, cache_dir=None, max_entries=MAX_ENTRIES, **kwargs):
+    """Builds (or reuses) the snapshot for these inputs and leaves `runner` pointing
+    at it, so runner.test() runs against it as after a plain runner.build().
+    Returns a CachedBuild(build_dir, key, hit)."""
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    key = build_key(runner, hdl_toplevel, sources, build_args, includes, defines, parameters, timescale, waves)
+    entry = cache_dir / key[:20]
+    marker = entry / MARKER
+
+    with open(cache_dir / f"{key[:20]}.lock", "w") as lock:
+        # parallel regression workers may ask for the same snapshot at once
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        hit = marker.exists()
+        if not hit:
+            shutil.rmtree(entry, ignore_errors=True)
+        build = partial(reuse_build, runner) if hit else runner.build
+        build(
+            sources=list(sources),
+            hdl_toplevel=hdl_toplevel,
+            build_args=list(build_args),
+            includes=list(includes),
+            defines=dict(defines or {}),
+            parameters=dict(parameters or {}),
+            timescale=timescale,
+            waves=waves,
+            always=not hit,
+            build_dir=entry,
+            **kwargs,
+        )
+        if not hit:
+            marker.write_text(json.dumps({
+                "toplevel": hdl_toplevel,
+                "tool": tool_version(runner),
+                "defines": {str(k): str(v) for k, v in (defines or {}).items()},
+                "sources": [str(p) for p in resolve_sources(sources, build_args)],
+                "built": time.time(),
+            }, indent=2))
+        # explicit nanosecond stamps: the filesystem clock is too coarse to order back-to-back builds
+        now = time.time_ns()
+        os.utime(marker, ns=(now, now))
+        hold(entry)
+    evict(cache_dir, max_entries, keep=entry)
+    return CachedBuild(entry, key, hit)
+
+
+def entries(cache_dir=None):
+    """Cached snapshots, least recently used first."""
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    markers = sorted(cache_dir.glob(f"*/{MARKER}"), key=lambda m: m.stat().st_mtime_ns)
+    return [m.parent for m in markers]
+
+
+def hold(build_dir):
+    """Keeps other processes from evicting a snapshot until release() or exit."""
+    build_dir = Path(build_dir)
+    if build_dir not in _held:
+        use = open(build_dir.parent / f"{build_dir.name}.use", "w")
+        fcntl.flock(use, fcntl.LOCK_SH)
+        _held[build_dir] = use
+
+
+def release(build_dir):
+    """Drops this process's hold on a snapshot."""
+    use = _held.pop(Path(build_dir), None)
+    if use is not None:
+        use.close()
+
+
+def evict(cache_dir=None, max_entries=MAX_ENTRIES, keep=None):
+    """Removes the least recently used snapshots beyond max_entries, passing over
+    any that a process holds."""
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    cached = entries(cache_dir)
+    excess = len(cached) - max_entries
+    for entry in cached:
+        if excess <= 0:
+            break
+        if entry == keep or entry in _held:
+            continue
+        with open(cache_dir / f"{entry.name}.lock", "w") as lock, open(cache_dir / f"{entry.name}.use", "w") as use:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                fcntl.flock(use, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue  # still in use elsewhere
+            shutil.rmtree(entry, ignore_errors=True)
+            excess -= 1
@@ -0,0 +1,94 @@
+## Architectural checkpoints of the reference model
+#
+# A Checkpoint is everything the RV32I state of `top` consists of: pc, the 32
+# registers and the 8kB memory image. fast_forward() runs an Iss for the first
+# N instructions (or up to a pc breakpoint) at reference-model speed and takes
+# one; icyrisc.harness.checkpoint.restore() injects it into the RTL so detailed
+# simulation starts there instead of at reset. Checkpoints save to .npz, so a
+# long startup can be run once and reused:
+#
+#   python -m icyrisc.checkpoint programs/firmware --until 0x1f4 -o sim_build/main.npz
+
+import argparse
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+from icyrisc.iss import Iss
+from icyrisc.memimage import MEM_BYTES
+
+Checkpoint = namedtuple("Checkpoint", ["pc", "regs", "image", "retired"])
+Checkpoint.__doc__ = """Architectural state: pc, regs (32 ints, x0 included), the image as
+MEM_BYTES bytes and how many instructions had retired when it was taken."""
+
+
+class CheckpointError(Exception):
+    """The model could not reach the requested point."""
+
+
+def take(iss):
+    """Snapshots a model."""
+    return Checkpoint(iss.pc, tuple(iss.registers), bytes(iss.mem), iss.retired)
+
+
+def to_model(checkpoint):
+    """A fresh Iss in the checkpointed state, ready to continue in lockstep."""
+    iss = Iss(checkpoint.image, pc=checkpoint.pc)
+    iss.regs[:32] = checkpoint.regs
+    iss.retired = checkpoint.retired
+    return iss
+
+
+def fast_forward(iss, instructions=None, until=None):
+    """Runs iss for `instructions` instructions, or until pc == until (before
+    executing it), and returns the checkpoint there. iss is left in that state."""
+    if instructions is None and until is None:
+        raise ValueError("give a number of instructions, a pc to stop at, or both")
+    limit = instructions if instructions is not None else sys.maxsize
+    n = iss.run(limit, until=until)
+    if until is not None and iss.pc != until:
+        raise CheckpointError(f"pc 0x{until:08x} not reached in {n} instructions (stopped at 0x{iss.pc:08x})")
+    if until is None and n < instructions:
+        raise CheckpointError(f"the program halted at 0x{iss.pc:08x} after {n} of {instructions} instructions")
+    return take(iss)
+
+
+def save(checkpoint, path):
+    np.savez_compressed(
+        path,
+        pc=np.uint32(checkpoint.pc),
+        regs=np.array(checkpoint.regs, dtype=np.uint32),
+        image=np.frombuffer(checkpoint.image, dtype=np.uint8),
+        retired=np.uint64(checkpoint.retired),
+    )
+
+
+def load(path):
+    with np.load(path) as data:
+        image = data["image"].tobytes()
+        if len(image) != MEM_BYTES:
+            raise CheckpointError(f"{path}: image is {len(image)} bytes, expected {MEM_BYTES}")
+        return Checkpoint(int(data["pc"]), tuple(int(r) for r in data["regs"]), image, int(data["retired"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a program on the reference model and save a checkpoint.")
+    parser.add_argument("prefix", help="memory file prefix, e.g. programs/rv32i_test")
+    parser.add_argument("-n", "--instructions", type=int, help="instructions to run before the checkpoint")
+    parser.add_argument("--until", type=lambda s: int(s, 0), help="stop when pc reaches this address")
+    parser.add_argument("-o", "--out", type=Path, required=True, help="checkpoint file (.npz)")
+    args = parser.parse_args(argv)
+
+    try:
+        checkpoint = fast_forward(Iss.from_memh(args.prefix), args.instructions, args.until)
+    except (ValueError, CheckpointError) as e:
+        parser.error(str(e))
+    save(checkpoint, args.out)
+    print(f"pc 0x{checkpoint.pc:08x} after {checkpoint.retired} instructions -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
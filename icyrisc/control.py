@@ -0,0 +1,104 @@
+## Expected outputs of the control unit (//src/control) in every fsm_state_t
+#
+# CONTROL is the declarative spec: for each state, the value every output of
+# `control` holds while the FSM is in that state (fsm.sv registers the outputs
+# of next_state, so they change together with the state). Values that depend
+# on the instruction are functions of (inst, alu_comp). The states an
+# instruction walks come from fsm.sv itself through icyrisc.perf.FsmModel, so
+# only the outputs are written down here.
+#
+#   for state in FsmModel().path(inst):
+#       assert read_outputs(dut) == expected(state, inst, alu_comp)
+#
+# test_control_unit.test_control_table sweeps every opcode (and every funct3 /
+# funct7 variant of the known ones) through `control` in one simulation.
+# Encodings mirror the typedefs of //src/control/constants.sv.
+
+from icyrisc.fsm import (ALU_WB, BRANCH, DECODE, EXEC_I, EXEC_LUI, EXEC_R, FETCH, JUMP, MEM_ADDR,
+                         MEM_READ, MEM_WB, MEM_WRITE, STORE_COOLDOWN)
+from icyrisc.isa import (BEQ, BGE, BGEU, BLT, BLTU, BNE, OP_AUIPC, OP_BTYPE, OP_ITYPE, OP_JAL, OP_JALR,
+                         OP_LOAD, OP_LUI, OP_RTYPE, OP_STYPE, funct3, funct7, opcode)
+
+# alu_ctrl_t
+ADD, SUB, AND, OR, XOR, SLT, SLTU, SLL, SRL, SRA, SRC1, SRC2 = range(12)
+# alu_src1_sel_t / alu_src2_sel_t
+PC, PC_OLD, RS1V = range(3)
+RS2V, IMM, PC_INC = range(3)
+# alu_comp_t
+GREATER, EQUAL, LESS = range(3)
+# mem_addr_sel_t / mem_funct3_sel_t
+ADDR_PC, ADDR_RESULT = range(2)
+FETCH_INST, MEM_FUNCT_DEFINED = range(2)
+# result_sel_t
+ALU_CLOCKED, MEM_RD, ALU_RESULT, ZERO = range(4)
+# imm_ctrl_t
+ITYPE, STYPE, BTYPE, UTYPE, JTYPE = range(5)
+
+OUTPUTS = ("pc_en", "inst_en", "reg_wren", "mem_wren", "imm_ctrl", "alu_ctrl",
+           "mem_addr_sel", "mem_funct3_sel", "alu_src1_sel", "alu_src2_sel", "result_sel")
+
+IMM_CTRL = {
+    OP_ITYPE: ITYPE, OP_LOAD: ITYPE, OP_JALR: ITYPE,
+    OP_STYPE: STYPE,
+    OP_BTYPE: BTYPE,
+    OP_LUI: UTYPE, OP_AUIPC: UTYPE,
+    OP_JAL: JTYPE,
+}
+
+BRANCH_TAKEN = {
+    BEQ: lambda comp: comp == EQUAL,
+    BNE: lambda comp: comp != EQUAL,
+    BLT: lambda comp: comp == LESS,
+    BLTU: lambda comp: comp == LESS,
+    BGE: lambda comp: comp != LESS,
+    BGEU: lambda comp: comp != LESS,
+}
+
+
+def funct_alu(inst):
+    """alu_ctrl of the FUNCT_DEFINED alu_op (EXEC_R / EXEC_I) for this instruction."""
+    f3, f7_5 = funct3(inst), funct7(inst) >> 5
+    if f3 == 0b000:
+        return SUB if opcode(inst) == OP_RTYPE and f7_5 else ADD
+    if f3 == 0b101:
+        return SRA if f7_5 else SRL
+    return {0b001: SLL, 0b010: SLT, 0b011: SLTU, 0b100: XOR, 0b110: OR, 0b111: AND}[f3]
+
+
+# outputs in every state unless CONTROL says otherwise
+DEFAULTS = {
+    "pc_en": 0, "inst_en": 0, "reg_wren": 0, "mem_wren": 0, "alu_ctrl": ADD,
+    "mem_addr_sel": ADDR_PC, "mem_funct3_sel": FETCH_INST,
+    "alu_src1_sel": RS1V, "alu_src2_sel": RS2V, "result_sel": ZERO,
+}
+
+CONTROL = {
+    FETCH: {"mem_addr_sel": ADDR_PC, "inst_en": 1, "alu_src1_sel": PC, "alu_src2_sel": PC_INC,
+            "alu_ctrl": ADD, "result_sel": ALU_RESULT, "pc_en": 1},
+    DECODE: {"alu_src1_sel": lambda inst, comp: RS1V if opcode(inst) == OP_JALR else PC_OLD,
+             "alu_src2_sel": IMM, "alu_ctrl": ADD},
+    MEM_ADDR: {"alu_src1_sel": RS1V, "alu_src2_sel": IMM, "alu_ctrl": ADD},
+    EXEC_R: {"alu_src1_sel": RS1V, "alu_src2_sel": RS2V, "alu_ctrl": lambda inst, comp: funct_alu(inst)},
+    EXEC_I: {"alu_src1_sel": RS1V, "alu_src2_sel": IMM, "alu_ctrl": lambda inst, comp: funct_alu(inst)},
+    EXEC_LUI: {"alu_src2_sel": IMM, "alu_ctrl": SRC2},
+    MEM_READ: {"result_sel": ALU_CLOCKED, "mem_addr_sel": ADDR_RESULT, "mem_funct3_sel": MEM_FUNCT_DEFINED},
+    MEM_WRITE: {"result_sel": ALU_CLOCKED, "mem_addr_sel": ADDR_RESULT, "mem_funct3_sel": MEM_FUNCT_DEFINED,
+                "mem_wren": 1},
+    STORE_COOLDOWN: {},
+    MEM_WB: {"result_sel": MEM_RD, "reg_wren": 1},
+    ALU_WB: {"result_sel": ALU_CLOCKED, "reg_wren": 1},
+    BRANCH: {"alu_src1_sel": RS1V, "alu_src2_sel": RS2V,
+             "alu_ctrl": lambda inst, comp: SLTU if funct3(inst) & 0b010 else SLT,
+             "result_sel": ALU_CLOCKED,
+             "pc_en": lambda inst, comp: int(BRANCH_TAKEN.get(funct3(inst), lambda c: False)(comp))},
+    JUMP: {"alu_src1_sel": PC_OLD, "alu_src2_sel": PC_INC, "alu_ctrl": ADD, "result_sel": ALU_CLOCKED,
+           "pc_en": 1},
+}
+
+
+def expected(state, inst, alu_comp=EQUAL):
+    """Every output of `control` (OUTPUTS order) while the FSM is in state running inst."""
+    values = dict(DEFAULTS, imm_ctrl=IMM_CTRL.get(opcode(inst), ITYPE))
+    for name, value in CONTROL[state].items():
+        values[name] = value(inst, alu_comp) if callable(value) else value
+    return {name: values[name] for name in OUTPUTS}
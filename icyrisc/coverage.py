@@ -0,0 +1,260 @@
+## FSM and instruction coverage for the `top` toplevel
+#
+# Coverage is sampled once per retired instruction, from the Retired records
+# of icyrisc.harness.monitor (which already carry the instruction word, the
+# FSM path it took and the alu_ctrl of its execute state), not once per clock.
+# A sample is two dictionary increments keyed by the FSM path and by the
+# (opcode, funct3, funct7, alu_ctrl) tuple; they are folded into NumPy bins
+# only when the database is saved or reported:
+#
+#   transitions   [13, 13]        fsm_state_t -> fsm_state_t
+#   instructions  [10, 8, 128]    opcode slot x funct3 x funct7 (0 where they hold immediate bits)
+#   alu           [10, 12]        opcode slot x alu_ctrl_t
+#
+# Databases are .npz files that merge by addition, so every parallel
+# regression worker writes its own and icyrisc.regress sums them:
+#
+#   python -m icyrisc.coverage sim_build/regress/coverage.npz
+#   python -m icyrisc.coverage --merge -o all.npz tests/*/coverage.npz
+#
+# Setting ICYRISC_COVERAGE=<path> makes every RetirementMonitor in the
+# simulator process feed one session database that is written to <path>.
+
+import argparse
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from icyrisc.asm import INSTRUCTIONS
+from icyrisc.fsm import (
+    ALU_WB,
+    BRANCH,
+    DECODE,
+    EXEC_I,
+    EXEC_LUI,
+    EXEC_R,
+    FETCH,
+    JUMP,
+    MEM_ADDR,
+    MEM_READ,
+    MEM_WB,
+    MEM_WRITE,
+    STATE_NAMES,
+    STORE_COOLDOWN,
+)
+from icyrisc.isa import ALU_CTRL_NAMES, OP_AUIPC, OP_ITYPE, OP_JAL, OP_LUI, OP_RTYPE, OPCODES
+
+ENV = "ICYRISC_COVERAGE"
+
+OTHER = len(OPCODES)  # slot for opcodes the FSM does not know
+SLOTS = {op: i for i, op in enumerate(OPCODES)}
+SLOT_NAMES = tuple(f"op{op}" for op in OPCODES) + ("other",)
+
+# every transition the next-state logic of fsm.sv can take
+LEGAL_TRANSITIONS = (
+    (FETCH, DECODE),
+    (DECODE, FETCH),
+    (DECODE, EXEC_R),
+    (DECODE, EXEC_I),
+    (DECODE, EXEC_LUI),
+    (DECODE, ALU_WB),
+    (DECODE, MEM_ADDR),
+    (DECODE, BRANCH),
+    (DECODE, JUMP),
+    (MEM_ADDR, MEM_READ),
+    (MEM_ADDR, MEM_WRITE),
+    (EXEC_R, ALU_WB),
+    (EXEC_I, ALU_WB),
+    (EXEC_LUI, ALU_WB),
+    (JUMP, ALU_WB),
+    (MEM_READ, MEM_WB),
+    (MEM_WRITE, STORE_COOLDOWN),
+    (MEM_WB, FETCH),
+    (STORE_COOLDOWN, FETCH),
+    (ALU_WB, FETCH),
+    (BRANCH, FETCH),
+)
+
+
+def funct3_bin(inst):
+    """funct3, or 0 for the formats that have immediate bits there (lui, auipc, jal)."""
+    return 0 if (inst & 0x7F) in (OP_LUI, OP_AUIPC, OP_JAL) else (inst >> 12) & 0x7
+
+
+def funct7_bin(inst):
+    """funct7 where the decoder reads it (R-type, shift immediates), else 0."""
+    op = inst & 0x7F
+    if op == OP_RTYPE or (op == OP_ITYPE and (inst >> 12) & 0x3 == 0b01):
+        return inst >> 25
+    return 0
+
+
+def _goal_instructions():
+    goals = {}
+    for name, (fmt, op, funct3, funct7) in INSTRUCTIONS.items():
+        goals[(SLOTS[op], funct3 or 0, funct7 if fmt in ("r", "shift") else 0)] = name
+    return goals
+
+
+# (slot, funct3 bin, funct7 bin) -> mnemonic of every legal encoding
+GOAL_INSTRUCTIONS = _goal_instructions()
+
+
+class Coverage:
+    """Coverage database: sample() Retired records, save() / load() / += to merge."""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path is not None else None
+        self.transitions = np.zeros((len(STATE_NAMES), len(STATE_NAMES)), dtype=np.uint64)
+        self.instructions = np.zeros((len(SLOT_NAMES), 8, 128), dtype=np.uint64)
+        self.alu = np.zeros((len(SLOT_NAMES), len(ALU_CTRL_NAMES)), dtype=np.uint64)
+        self.samples = 0
+        self._paths = Counter()
+        self._keys = Counter()
+
+    def sample(self, retired):
+        """Monitor callback: counts one retired instruction."""
+        self._paths[retired.path] += 1
+        inst = retired.inst
+        self._keys[(inst & 0x7F, funct3_bin(inst), funct7_bin(inst), retired.alu_ctrl)] += 1
+
+    def attach(self, monitor):
+        monitor.add_callback(self.sample)
+        return self
+
+    def fold(self):
+        """Moves the pending samples into the bins."""
+        for path, n in self._paths.items():
+            # the path ends where the FSM returns to FETCH
+            for a, b in zip(path, path[1:] + (FETCH,)):
+                self.transitions[a, b] += n
+            self.samples += n
+        for (op, f3, f7, alu), n in self._keys.items():
+            slot = SLOTS.get(op, OTHER)
+            self.instructions[slot, f3, f7] += n
+            if alu is not None:
+                self.alu[slot, alu] += n
+        self._paths.clear()
+        self._keys.clear()
+        return self
+
+    def __iadd__(self, other):
+        self.fold()
+        other.fold()
+        self.transitions += other.transitions
+        self.instructions += other.instructions
+        self.alu += other.alu
+        self.samples += other.samples
+        return self
+
+    def save(self, path=None):
+        """Writes the database (atomically, so a reader never sees half a file)."""
+        path = Path(path or self.path)
+        self.fold()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, transitions=self.transitions, instructions=self.instructions, alu=self.alu,
+                                samples=np.uint64(self.samples))
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        cov = cls(path)
+        with np.load(path) as data:
+            cov.transitions[...] = data["transitions"]
+            cov.instructions[...] = data["instructions"]
+            cov.alu[...] = data["alu"]
+            cov.samples = int(data["samples"])
+        return cov
+
+    @classmethod
+    def merge(cls, paths, out=None):
+        """Sums databases; missing files are skipped. Saves to out if given."""
+        total = cls(out)
+        for path in paths:
+            if Path(path).exists():
+                total += cls.load(path)
+        if out is not None:
+            total.save()
+        return total
+
+    # reporting
+
+    def transition_holes(self):
+        self.fold()
+        return [(a, b) for a, b in LEGAL_TRANSITIONS if not self.transitions[a, b]]
+
+    def instruction_holes(self):
+        self.fold()
+        return sorted(name for key, name in GOAL_INSTRUCTIONS.items() if not self.instructions[key])
+
+    def illegal(self):
+        """Transitions and encodings that were exercised but are not in the goals."""
+        self.fold()
+        legal = set(LEGAL_TRANSITIONS)
+        transitions = [(int(a), int(b)) for a, b in zip(*np.nonzero(self.transitions)) if (a, b) not in legal]
+        encodings = [key for key in (tuple(int(i) for i in k) for k in zip(*np.nonzero(self.instructions)))
+                     if key not in GOAL_INSTRUCTIONS]
+        return transitions, encodings
+
+    def report(self):
+        """A short text summary: hit ratios, holes and the busiest bins."""
+        self.fold()
+        t_holes = self.transition_holes()
+        i_holes = self.instruction_holes()
+        n_t, n_i = len(LEGAL_TRANSITIONS), len(GOAL_INSTRUCTIONS)
+        lines = [
+            f"{self.samples} instructions sampled",
+            f"fsm transitions  {n_t - len(t_holes):3}/{n_t} ({100 * (n_t - len(t_holes)) / n_t:.0f}%)",
+            f"instructions     {n_i - len(i_holes):3}/{n_i} ({100 * (n_i - len(i_holes)) / n_i:.0f}%)",
+            f"alu_ctrl values  {int(np.count_nonzero(self.alu.sum(axis=0))):3}/{len(ALU_CTRL_NAMES)}",
+        ]
+        if t_holes:
+            lines.append("missing transitions: " + ", ".join(f"{STATE_NAMES[a]}->{STATE_NAMES[b]}" for a, b in t_holes))
+        if i_holes:
+            lines.append("missing instructions: " + ", ".join(i_holes))
+        transitions, encodings = self.illegal()
+        if transitions:
+            lines.append("unexpected transitions: " + ", ".join(f"{STATE_NAMES[a]}->{STATE_NAMES[b]}" for a, b in transitions))
+        if encodings:
+            lines.append(f"{len(encodings)} encodings outside the RV32I goals (opcode slot, funct3, funct7): "
+                         + ", ".join(f"{SLOT_NAMES[s]}/{f3}/{f7}" for s, f3, f7 in encodings[:10]))
+        busiest = sorted(((int(n), name) for key, name in GOAL_INSTRUCTIONS.items() if (n := self.instructions[key])),
+                         reverse=True)[:5]
+        if busiest:
+            lines.append("most sampled: " + ", ".join(f"{name} {n}" for n, name in busiest))
+        return "\n".join(lines)
+
+
+_session = None
+
+
+def session_coverage():
+    """The process-wide database named by $ICYRISC_COVERAGE, or None when it is unset."""
+    global _session
+    if _session is None and os.getenv(ENV):
+        _session = Coverage(os.environ[ENV])
+    return _session
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report or merge icyrisc coverage databases.")
+    parser.add_argument("databases", nargs="+", type=Path)
+    parser.add_argument("--merge", action="store_true", help="sum the databases (into -o if given)")
+    parser.add_argument("-o", "--out", type=Path, help="where --merge writes the merged database")
+    args = parser.parse_args(argv)
+
+    if len(args.databases) > 1 and not args.merge:
+        parser.error("pass --merge to combine several databases")
+    coverage = Coverage.merge(args.databases, args.out if args.merge else None)
+    print(coverage.report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
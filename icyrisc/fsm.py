@@ -0,0 +1,24 @@
+## fsm_state_t from //src/control/fsm.sv, in declaration order
+
+FETCH = 0
+DECODE = 1
+MEM_ADDR = 2
+EXEC_R = 3
+EXEC_I = 4
+EXEC_LUI = 5
+MEM_READ = 6
+MEM_WRITE = 7
+MEM_WB = 8
+ALU_WB = 9
+BRANCH = 10
+JUMP = 11
+STORE_COOLDOWN = 12
+
+STATE_NAMES = (
+    "FETCH", "DECODE", "MEM_ADDR", "EXEC_R", "EXEC_I", "EXEC_LUI", "MEM_READ",
+    "MEM_WRITE", "MEM_WB", "ALU_WB", "BRANCH", "JUMP", "STORE_COOLDOWN",
+)
+
+# last state of every instruction before the FSM returns to FETCH; unknown
+# opcodes go straight from DECODE back to FETCH
+RETIRE_STATES = (ALU_WB, MEM_WB, BRANCH, STORE_COOLDOWN)
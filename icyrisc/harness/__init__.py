@@ -0,0 +1 @@
+"""cocotb-side helpers for driving and checking the `top` toplevel."""
@@ -0,0 +1,155 @@
+## Backdoor access to the register file and memory of the `top` toplevel
+#
+# Registers go through cached handles to reg0.register_file[i], one simulator
+# call per register touched. Memory ranges go through the simulation-only
+# backdoor in memory.sv: the lanes are written to (read from)
+# icyrisc_backdoor<N>.txt with one NumPy operation each and memory.sv is asked
+# to $readmemh ($writememh) the whole word range, so loading or dumping the full
+# 8kB image costs a few signal writes and one simulator time step instead of
+# 8192 element accesses. Builds without that block fall back to per-element
+# writes through cached memory_array handles.
+#
+#   backdoor = Backdoor(dut)
+#   backdoor.write_registers({10: 0x1234, 11: 0x42})
+#   await backdoor.write_memory(0x100, b"\x78\x56\x34\x12")
+#   image = await backdoor.read_memory(0, 8192)
+
+import os
+from pathlib import Path
+
+import numpy as np
+from cocotb.triggers import Timer
+
+from icyrisc.memimage import MEM_BYTES, MEM_DEPTH, fit_image, parse_lane, render_lane
+
+FILES = [f"icyrisc_backdoor{lane}.txt" for lane in range(4)]
+
+
+class Backdoor:
+    """Zero-time access to reg0.register_file and the mem0..mem3 byte lanes."""
+
+    def __init__(self, dut):
+        self.dut = dut
+        self._regs = {}
+        self._words = [{} for _ in range(4)]
+        self.lanes = [getattr(dut.mem0, f"mem{lane}").memory for lane in range(4)]
+        try:
+            mem = dut.mem0
+            self._load, self._dump = mem.backdoor_load, mem.backdoor_dump
+            self._first, self._last = mem.backdoor_first, mem.backdoor_last
+        except AttributeError:
+            self._load = None
+        self.dir = Path(os.getcwd())  # memory.sv opens the files relative to the simulator's cwd
+
+    @property
+    def bulk(self):
+        """Whether the build has the $readmemh / $writememh backdoor."""
+        return self._load is not None
+
+    # registers
+
+    def _reg(self, index):
+        handle = self._regs.get(index)
+        if handle is None:
+            handle = self._regs[index] = self.dut.reg0.register_file[index]
+        return handle
+
+    def read_register(self, index):
+        return int(self._reg(index).value) if index else 0
+
+    def write_register(self, index, value):
+        """Writes one register; writes to x0 are dropped like the RTL does."""
+        if index:
+            self._reg(index).value = value & 0xFFFFFFFF
+
+    def read_registers(self):
+        """All 32 registers as a uint32 array."""
+        return np.array([self.read_register(i) for i in range(32)], dtype=np.uint32)
+
+    def write_registers(self, values):
+        """Writes a {index: value} mapping, or a sequence of 32 values."""
+        items = values.items() if hasattr(values, "items") else enumerate(values)
+        for index, value in items:
+            self.write_register(int(index), int(value))
+
+    # memory
+
+    def _word(self, lane, word):
+        handle = self._words[lane].get(word)
+        if handle is None:
+            handle = self._words[lane][word] = self.lanes[lane][word]
+        return handle
+
+    def poke_word(self, addr, value):
+        """Writes one aligned word through the element handles (no time step needed)."""
+        word = addr >> 2
+        for lane in range(4):
+            self._word(lane, word).value = (value >> (8 * lane)) & 0xFF
+
+    def peek_word(self, addr):
+        word = addr >> 2
+        return sum(int(self._word(lane, word).value) << (8 * lane) for lane in range(4))
+
+    async def write_memory(self, addr, data):
+        """Writes bytes (or a uint8 array) starting at byte address addr."""
+        data = np.frombuffer(bytes(data), dtype=np.uint8) if not isinstance(data, np.ndarray) else data.astype(np.uint8)
+        end = addr + len(data)
+        if addr < 0 or end > MEM_BYTES:
+            raise ValueError(f"0x{addr:x}..0x{end:x} is outside the {MEM_BYTES}-byte memory")
+        if not len(data):
+            return
+        first, last = addr >> 2, (end - 1) >> 2
+        if addr % 4 or end % 4:
+            block = np.frombuffer(await self.read_memory(4 * first, 4 * (last + 1 - first)), dtype=np.uint8).copy()
+        else:
+            block = np.empty(4 * (last + 1 - first), dtype=np.uint8)
+        block[addr - 4 * first : end - 4 * first] = data
+        await self._write_words(first, block.reshape(-1, 4))
+
+    async def read_memory(self, addr, length):
+        """Reads length bytes starting at byte address addr."""
+        end = addr + length
+        if addr < 0 or end > MEM_BYTES:
+            raise ValueError(f"0x{addr:x}..0x{end:x} is outside the {MEM_BYTES}-byte memory")
+        if not length:
+            return b""
+        first, last = addr >> 2, (end - 1) >> 2
+        words = await self._read_words(first, last + 1 - first)
+        return words.tobytes()[addr - 4 * first : end - 4 * first]
+
+    async def load_image(self, image):
+        """Replaces the whole memory with a flat image, zero padded."""
+        await self._write_words(0, fit_image(image).reshape(MEM_DEPTH, 4))
+
+    async def dump_image(self):
+        """The whole memory as a bytearray."""
+        return bytearray((await self._read_words(0, MEM_DEPTH)).tobytes())
+
+    async def _write_words(self, first, words):
+        if not self.bulk:
+            for lane in range(4):
+                for i, value in enumerate(words[:, lane].tolist()):
+                    self._word(lane, first + i).value = value
+            await Timer(1, "step")
+            return
+        for lane, name in enumerate(FILES):
+            (self.dir / name).write_bytes(render_lane(words[:, lane]))
+        await self._request(self._load, first, first + len(words) - 1)
+
+    async def _read_words(self, first, count):
+        if not self.bulk:
+            return np.array([[int(self._word(lane, first + i).value) for lane in range(4)] for i in range(count)],
+                            dtype=np.uint8).reshape(count, 4)
+        await self._request(self._dump, first, first + count - 1)
+        words = np.zeros((count, 4), dtype=np.uint8)
+        for lane, name in enumerate(FILES):
+            words[:, lane] = parse_lane((self.dir / name).read_text())[:count]
+        return words
+
+    async def _request(self, trigger, first, last):
+        self._first.value = first
+        self._last.value = last
+        trigger.value = int(trigger.value) % 0x7FFFFFFF + 1  # any new nonzero value
+        # the writes land in this time step's ReadWrite phase and the $readmemh /
+        # $writememh runs right after; one precision step later it is done
+        await Timer(1, "step")
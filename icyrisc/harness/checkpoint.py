@@ -0,0 +1,51 @@
+## Starting `top` from a reference-model checkpoint instead of from reset
+#
+# restore() holds the core in reset while the image goes in through the
+# memory backdoor, releases reset on a falling edge and in the same step
+# writes the registers and deposits pc into program_counter. Reset leaves the
+# FSM in BRANCH with pc_update low, so the deposited pc survives the first
+# rising edge and is the address of the first FETCH.
+#
+#   model = Iss(image)
+#   await restore(dut, fast_forward(model, until=0x200))
+#   await CosimChecker(dut, model).run(1000)     # model continues in lockstep
+
+import cocotb
+from cocotb.triggers import FallingEdge, RisingEdge
+
+from icyrisc.harness.backdoor import Backdoor
+
+# plusargs read by checkpoint_from_plusargs()
+INSTRUCTIONS_PLUSARG = "FAST_FORWARD"
+UNTIL_PLUSARG = "FAST_FORWARD_UNTIL"
+
+
+async def restore(dut, checkpoint):
+    """Resets `top` into checkpoint (the clock must already be running)."""
+    backdoor = Backdoor(dut)
+    dut.SW.value = 0
+    await RisingEdge(dut.clk)
+    await backdoor.load_image(checkpoint.image)
+    await FallingEdge(dut.clk)
+    dut.SW.value = 1
+    backdoor.write_registers(checkpoint.regs)
+    dut.p0.pc.value = checkpoint.pc
+
+
+def fast_forward_plusargs(instructions=None, until=None):
+    """Simulator arguments asking a test to fast-forward (see fast_forward_request())."""
+    args = []
+    if instructions is not None:
+        args.append(f"+{INSTRUCTIONS_PLUSARG}={instructions}")
+    if until is not None:
+        args.append(f"+{UNTIL_PLUSARG}=0x{until:x}")
+    return args
+
+
+def fast_forward_request():
+    """(instructions, until) from +FAST_FORWARD / +FAST_FORWARD_UNTIL, or None if neither was given."""
+    instructions = cocotb.plusargs.get(INSTRUCTIONS_PLUSARG)
+    until = cocotb.plusargs.get(UNTIL_PLUSARG)
+    if instructions is None and until is None:
+        return None
+    return (int(instructions, 0) if instructions else None, int(until, 0) if until else None)
@@ -0,0 +1,132 @@
+## Lockstep co-simulation of `top` against the Python reference model
+#
+# Every instruction the RetirementMonitor reports is replayed on the model and
+# compared field by field (pc, instruction word, next pc, rd writeback and
+# memory write), so a long program stops at the first divergence instead of
+# failing in a post-mortem diff. Loads of millis / micros are not checked: the
+# model does not follow the RTL's clock, so it takes the value the RTL loaded
+# and carries on from there (leds loads are checked like memory). With
+# $ICYRISC_WAVES set (icyrisc.harness.waves) a divergence also writes the last
+# cycles before it as a waveform.
+
+from cocotb.triggers import ClockCycles, Event, First
+
+from icyrisc.fsm import STATE_NAMES
+from icyrisc.harness.monitor import RetirementMonitor
+from icyrisc.harness.waves import session_waves, trigger_pc
+from icyrisc.memory import MICROS_ADDR, MILLIS_ADDR
+
+
+class CosimMismatch(AssertionError):
+    """The RTL retired an instruction differently from the reference model."""
+
+
+class CosimChecker:
+    """Steps `model` (an icyrisc.iss.Iss) alongside the RTL.
+
+    full_check_every compares the whole register file every N retirements
+    on top of the per-instruction rd check; 0 disables it. waves (an
+    icyrisc.harness.waves.Waves, by default the session one) is triggered by
+    a mismatch and by +WAVES_PC. start() on its own checks every retirement
+    until the monitor stops; run() checks a set number.
+    """
+
+    def __init__(self, dut, model, monitor=None, full_check_every=0, waves=None):
+        self.dut = dut
+        self.model = model
+        self.monitor = monitor if monitor is not None else RetirementMonitor(dut)
+        self.full_check_every = full_check_every
+        self.checked = 0
+        self.mismatch = None
+        self.target = None
+        self._done = Event()
+        self.monitor.add_callback(self._on_retire)
+        self.waves = waves if waves is not None else session_waves(dut)
+        if self.waves is not None and trigger_pc() is not None:
+            self.waves.watch_pc(self.monitor, trigger_pc())
+
+    def start(self):
+        self.monitor.start()
+        return self
+
+    async def run(self, instructions, timeout_cycles=None):
+        """Checks `instructions` retirements (or until the model halts) and raises
+        CosimMismatch at the first divergence."""
+        if self.waves is None:
+            return await self._run(instructions, timeout_cycles)
+        with self.waves.guard():
+            await self._run(instructions, timeout_cycles)
+
+    async def _run(self, instructions, timeout_cycles):
+        self.target = self.checked + instructions
+        self._done.clear()
+        self.start()
+        if timeout_cycles is None:
+            await self._done.wait()
+        else:
+            await First(self._done.wait(), ClockCycles(self.dut.clk, timeout_cycles))
+        if self.mismatch is not None:
+            raise self.mismatch
+        if not self._done.is_set():
+            raise CosimMismatch(f"only {self.checked} of {self.target} instructions retired in {timeout_cycles} cycles")
+        self.check_registers()
+
+    def check_registers(self):
+        """Compares the full register file and pc against the model."""
+        actual = [int(reg.value) for reg in self.monitor.regs]
+        expected = self.model.registers
+        for i, (got, want) in enumerate(zip(actual, expected)):
+            if got != want:
+                self._fail(None, f"x{i} = 0x{got:08x}, model has 0x{want:08x}")
+
+    def _on_retire(self, retired):
+        if self.mismatch is not None or self._done.is_set():
+            return
+        try:
+            self._compare(retired)
+        except CosimMismatch as e:
+            self.mismatch = e
+            self._done.set()
+            return
+        self.checked += 1
+        if self.full_check_every and self.checked % self.full_check_every == 0:
+            try:
+                self.check_registers()
+            except CosimMismatch as e:
+                self.mismatch = e
+                self._done.set()
+                return
+        if (self.target is not None and self.checked >= self.target) or self.model.halted:
+            self._done.set()
+
+    def _compare(self, retired):
+        model = self.model
+        if retired.pc != model.pc:
+            self._fail(retired, f"pc 0x{retired.pc:08x}, model at 0x{model.pc:08x}")
+        expected = model.step()
+        if retired.inst != expected.inst:
+            self._fail(retired, f"fetched 0x{retired.inst:08x}, model fetched 0x{expected.inst:08x}")
+        if retired.next_pc != expected.next_pc:
+            self._fail(retired, f"next pc 0x{retired.next_pc:08x}, model 0x{expected.next_pc:08x}")
+        if retired.load is not None and retired.load & 0xFFFFFFFC in (MILLIS_ADDR, MICROS_ADDR) and retired.rd:
+            model.regs[retired.rd] = retired.rd_value  # a timer read: unchecked, the model takes the RTL's value
+            expected = expected._replace(rd_value=retired.rd_value)
+        if retired.rd != expected.rd or retired.rd_value != expected.rd_value:
+            self._fail(retired, f"x{retired.rd} = {_hex(retired.rd_value)}, model wrote x{expected.rd} = {_hex(expected.rd_value)}")
+        if retired.store != expected.store:
+            self._fail(retired, f"store {_store(retired.store)}, model {_store(expected.store)}")
+
+    def _fail(self, retired, message):
+        where = ""
+        if retired is not None:
+            path = "->".join(STATE_NAMES[s] for s in retired.path)
+            where = f" at pc 0x{retired.pc:08x} inst 0x{retired.inst:08x} [{path}] cycle {retired.cycle}"
+        raise CosimMismatch(f"instruction {self.checked}{where}: {message}")
+
+
+def _hex(value):
+    return "-" if value is None else f"0x{value:08x}"
+
+
+def _store(store):
+    return "none" if store is None else f"[0x{store[0]:08x}] <= 0x{store[1]:08x} (funct3 {store[2]:03b})"
@@ -0,0 +1,123 @@
+## Retirement monitor for the `top` toplevel
+#
+# Samples the control FSM (dut.c0.f0.state) once per falling clock edge and
+# reports every instruction when the FSM returns to FETCH. At that falling
+# edge the register write of ALU_WB / MEM_WB and the memory write of
+# MEM_WRITE have landed and `pc` holds the address of the next fetch.
+#
+# alu_ctrl is read in DECODE (which computes auipc's sum) and again in the
+# execute state that follows, so each record carries the ALU function that
+# produced its result. With $ICYRISC_COVERAGE set every monitor also feeds the
+# session coverage database (icyrisc.coverage) and saves it when stopped, with
+# $ICYRISC_TRACE set it appends to the session trace (icyrisc.trace), and with
+# $ICYRISC_FAST_TIMERS set it fast-forwards timer polling loops
+# (icyrisc.harness.timers).
+
+from collections import namedtuple
+
+import cocotb
+from cocotb.triggers import FallingEdge
+
+from icyrisc.coverage import session_coverage
+from icyrisc.harness.timers import session_fast_timers
+from icyrisc.fsm import BRANCH, DECODE, EXEC_I, EXEC_LUI, EXEC_R, FETCH, JUMP, MEM_ADDR, MEM_READ, MEM_WRITE
+from icyrisc.isa import writes_rd
+from icyrisc.trace import session_trace
+
+Retired = namedtuple("Retired",
+                     ["pc", "inst", "next_pc", "rd", "rd_value", "store", "cycle", "path", "alu_ctrl", "load"],
+                     defaults=(None, None))
+Retired.__doc__ = """One instruction retired by the RTL. store is (address, data, funct3) or
+None, path is the tuple of FSM states the instruction went through, alu_ctrl
+the alu_ctrl_t of the state that computed its result and load the address a
+load read (None for everything else)."""
+
+EXECUTE_STATES = (MEM_ADDR, EXEC_R, EXEC_I, EXEC_LUI, BRANCH, JUMP)
+
+
+class RetirementMonitor:
+    """Watches `top` and calls every registered callback with a Retired record."""
+
+    def __init__(self, dut, coverage=None, trace=None):
+        self.dut = dut
+        self.clk = dut.clk
+        self.state = dut.c0.f0.state
+        self.inst = dut.inst
+        self.pc = dut.pc
+        self.pc_old = dut.pc_old
+        self.regs = [dut.reg0.register_file[i] for i in range(32)]
+        self.write_address = dut.mem0.write_address
+        self.write_data = dut.mem0.write_data
+        self.read_address = dut.mem0.read_address
+        self.funct3 = dut.mem0.funct3
+        self.alu_ctrl = dut.alu_ctrl
+        self.callbacks = []
+        self.cycle = 0
+        self.retired = 0
+        self._task = None
+        self.coverage = coverage if coverage is not None else session_coverage()
+        if self.coverage is not None:
+            self.coverage.attach(self)
+        self.trace = trace if trace is not None else session_trace()
+        if self.trace is not None:
+            self.add_callback(self.trace.retired)
+        self.timers = session_fast_timers(dut, self)
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def start(self):
+        if self._task is None:
+            self._task = cocotb.start_soon(self._run())
+        return self
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        try:
+            await self._sample()
+        finally:
+            # also runs when cocotb cancels the task at the end of a test
+            if self.coverage is not None and self.coverage.path is not None:
+                self.coverage.save()
+            if self.trace is not None:
+                self.trace.flush()
+
+    async def _sample(self):
+        falling = FallingEdge(self.clk)
+        state_handle = self.state
+        path = []
+        pc = inst = store = alu = load = None
+        while True:
+            await falling
+            self.cycle += 1
+            state = int(state_handle.value)
+            if state == FETCH:
+                if inst is not None:
+                    self._retire(pc, inst, store, tuple(path), alu, load)
+                path = []
+                inst = store = alu = load = None
+            path.append(state)
+            if state == DECODE:
+                inst = int(self.inst.value)
+                pc = int(self.pc_old.value)
+                alu = int(self.alu_ctrl.value)
+            elif state in EXECUTE_STATES:
+                alu = int(self.alu_ctrl.value)
+            elif state == MEM_READ:
+                load = int(self.read_address.value)
+            elif state == MEM_WRITE:
+                store = (int(self.write_address.value), int(self.write_data.value), int(self.funct3.value))
+
+    def _retire(self, pc, inst, store, path, alu, load):
+        rd = rd_value = None
+        if writes_rd(inst):
+            rd = (inst >> 7) & 0x1F
+            rd_value = int(self.regs[rd].value)
+        self.retired += 1
+        record = Retired(pc, inst, int(self.pc.value), rd, rd_value, store, self.cycle, path, alu, load)
+        for callback in self.callbacks:
+            callback(record)
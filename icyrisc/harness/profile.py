@@ -0,0 +1,212 @@
+## Opt-in per-test profiler for cocotb runs
+#
+# Put this module first in the runner's test modules and set ICYRISC_PROFILE
+# to a directory:
+#
+#   runner.test(test_module=profile_modules("test_rtype"), extra_env={ENV: "prof"}, ...)
+#   python -m icyrisc.regress --profile test_rtype     # does both per shard
+#   python -m icyrisc.harness.profile prof/            # summary table
+#
+# Importing it wraps every cocotb test registered after it and, while a test
+# runs, counts GPI trigger callbacks (each RisingEdge/FallingEdge/Timer that
+# fires into Python) and handle reads and writes, and samples the stack of the
+# thread running the test every ICYRISC_PROFILE_INTERVAL seconds (default 1 ms).
+# Samples taken while the simulator is running (no Python frame active) are
+# booked to a [simulator] frame. Every test writes
+#
+#   <dir>/<test>.folded   stacks in the folded format of flamegraph.pl / speedscope / inferno
+#   <dir>/<test>.json     wall and simulated time, callback / read / write counts,
+#                         the share of samples in the simulator and the top Python hotspots
+
+import argparse
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import warnings
+from collections import Counter
+from pathlib import Path
+
+ENV = "ICYRISC_PROFILE"
+INTERVAL_ENV = "ICYRISC_PROFILE_INTERVAL"
+SIMULATOR_FRAME = "[simulator]"
+HOTSPOTS = 15
+
+
+def profile_modules(*modules):
+    """Test module list for runner.test() with the profiler installed first."""
+    return [__name__, *modules]
+
+
+class _Counters:
+    def __init__(self):
+        self.callbacks = self.reads = self.writes = 0
+
+
+_counters = None  # the running test's, None outside tests (or when not installed)
+
+
+def _counting(method, field):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if _counters is not None:
+            setattr(_counters, field, getattr(_counters, field) + 1)
+        return method(*args, **kwargs)
+    return wrapper
+
+
+def _subclasses(cls):
+    for sub in cls.__subclasses__():
+        yield sub
+        yield from _subclasses(sub)
+
+
+class Sampler:
+    """Folded-stack sampler of one thread."""
+
+    def __init__(self, thread_id, interval, root):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root = root
+        self.stacks = Counter()
+        self.leaves = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="icyrisc-profile", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                self.stacks[(self.root, SIMULATOR_FRAME)] += 1
+                self.leaves[SIMULATOR_FRAME] += 1
+                continue
+            names = []
+            leaf = None
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_qualname} ({Path(code.co_filename).name})")
+                if leaf is None:
+                    leaf = f"{code.co_qualname} ({code.co_filename}:{frame.f_lineno})"
+                frame = frame.f_back
+            names.append(self.root)
+            self.stacks[tuple(reversed(names))] += 1
+            self.leaves[leaf] += 1
+
+    def folded(self):
+        return "".join(f"{';'.join(stack)} {n}\n" for stack, n in sorted(self.stacks.items()))
+
+
+def _profiled(test, directory, interval):
+    func = test.func
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        global _counters
+        from cocotb.simtime import get_sim_time
+
+        counters = _counters = _Counters()
+        sampler = Sampler(threading.get_ident(), interval, test.name).start()
+        sim_start, wall_start = get_sim_time("ns"), time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            wall = time.perf_counter() - wall_start
+            sim_ns = get_sim_time("ns") - sim_start
+            sampler.stop()
+            _counters = None
+            write_profile(directory, test.fullname, sampler, counters, wall, sim_ns)
+
+    return wrapper
+
+
+def write_profile(directory, name, sampler, counters, wall, sim_ns):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    samples = sum(sampler.stacks.values())
+    (directory / f"{name}.folded").write_text(sampler.folded())
+    summary = {
+        "test": name,
+        "wall_seconds": round(wall, 6),
+        "sim_time_ns": sim_ns,
+        "trigger_callbacks": counters.callbacks,
+        "handle_reads": counters.reads,
+        "handle_writes": counters.writes,
+        "samples": samples,
+        "simulator_fraction": round(sampler.leaves[SIMULATOR_FRAME] / samples, 4) if samples else 0.0,
+        "hotspots": [{"function": f, "samples": n, "fraction": round(n / samples, 4)}
+                     for f, n in sampler.leaves.most_common(HOTSPOTS)],
+    }
+    (directory / f"{name}.json").write_text(json.dumps(summary, indent=2) + "\n")
+
+
+def install(directory, interval=0.001):
+    """Hooks cocotb: wraps tests registered from now on and counts callbacks and handle accesses."""
+    import cocotb.handle
+    import cocotb.regression
+    from cocotb._gpi_triggers import GPITrigger
+
+    manager = cocotb.regression.RegressionManager
+    if getattr(manager.register_test, "_icyrisc_profile", False):
+        return
+    register = manager.register_test
+
+    def register_test(self, test):
+        test.func = _profiled(test, directory, interval)
+        return register(self, test)
+
+    register_test._icyrisc_profile = True
+    manager.register_test = register_test
+
+    GPITrigger._react = _counting(GPITrigger._react, "callbacks")
+    for cls in _subclasses(cocotb.handle.ValueObjectBase):
+        if "get" in vars(cls):
+            cls.get = _counting(cls.get, "reads")
+        if "_set_value" in vars(cls):
+            cls._set_value = _counting(cls._set_value, "writes")
+
+
+def summary(directories):
+    """The per-test JSON summaries found in the directories."""
+    tests = []
+    for directory in directories:
+        for path in sorted(Path(directory).glob("*.json")):
+            tests.append(json.loads(path.read_text()))
+    return tests
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise icyrisc per-test profiles.")
+    parser.add_argument("directories", nargs="+", type=Path)
+    parser.add_argument("--hotspots", type=int, default=5, help="hotspots to list per test")
+    args = parser.parse_args(argv)
+
+    tests = summary(args.directories)
+    if not tests:
+        parser.error("no profiles found")
+    print(f"{'test':<48} {'wall s':>8} {'sim us':>10} {'callbacks':>10} {'reads':>10} {'writes':>8} {'in sim':>7}")
+    for t in sorted(tests, key=lambda t: -t["wall_seconds"]):
+        print(f"{t['test']:<48} {t['wall_seconds']:8.3f} {t['sim_time_ns'] / 1e3:10.1f} {t['trigger_callbacks']:10} "
+              f"{t['handle_reads']:10} {t['handle_writes']:8} {100 * t['simulator_fraction']:6.1f}%")
+        for h in t["hotspots"][: args.hotspots]:
+            print(f"    {100 * h['fraction']:5.1f}%  {h['function']}")
+    return 0
+
+
+if os.getenv(ENV) and "cocotb.regression" in sys.modules:
+    # imported by the simulator as a test module: it has no tests of its own
+    warnings.filterwarnings("ignore", message=f"No tests were discovered in module: {__name__}")
+    install(os.environ[ENV], float(os.getenv(INTERVAL_ENV, 0.001)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+## Choosing the program `top` runs without recompiling it
+#
+# memory.sv reads +MEM_FILE_PATH_PREFIX=<prefix> at time zero (simulation
+# builds only), so a snapshot compiled once - without the define - runs any
+# lane-split image:
+#
+#   runner.test(..., plusargs=program_plusargs("programs/rv32i_test"))
+#
+# Inside a cocotb test, program_prefix() recovers the image the simulator was
+# started with, and load_program() writes an image straight into the four
+# memory_array lanes (icyrisc.harness.backdoor) for tests that build programs
+# on the fly.
+
+import cocotb
+
+from icyrisc.harness.backdoor import Backdoor
+
+PLUSARG = "MEM_FILE_PATH_PREFIX"
+
+
+def program_plusargs(prefix):
+    """Simulator arguments that load `<prefix>0.txt .. <prefix>3.txt` at start-up."""
+    return [f"+{PLUSARG}={prefix}"]
+
+
+def program_prefix(default=None):
+    """The image prefix passed with +MEM_FILE_PATH_PREFIX, or default."""
+    return cocotb.plusargs.get(PLUSARG, default)
+
+
+async def load_program(dut, image):
+    """Writes a flat little-endian image (padded with zeros to the whole memory)
+    into mem0..mem3 through the backdoor. Call it before releasing reset."""
+    await Backdoor(dut).load_image(image)
@@ -0,0 +1,140 @@
+## PWM decoder for the LED / RGB outputs of `top`
+#
+# memory.sv drives every output from the free-running 8-bit pwm_counter: a
+# channel is lit while pwm_counter < its duty byte in leds, so it rises when
+# the counter wraps and falls duty clock cycles later. top.sv inverts the
+# pins (LED, RGB_R, RGB_G, RGB_B are active low).
+#
+# PwmMonitor waits on a value-change trigger per pin instead of sampling
+# every clock, so a channel costs two Python wake-ups per 256-cycle period.
+# Each rise-to-rise interval gives one period and its lit time. Each decoder
+# keeps a time series of Brightness samples and appends only when the
+# decoded (duty, period) changes, so a long run holding one value stays at
+# one sample:
+#
+#   pwm = PwmMonitor(dut).start()
+#   ...
+#   pwm.series("red")        # [Brightness(time=0, duty=0.0, period=None), Brightness(..., 0.25, 20480000)]
+#   pwm.counts("red")        # 64: the leds byte the latest sample decodes to
+#
+# A pin that stops toggling is reported as steady (duty 0.0 or 1.0, period
+# None) from its last edge. This happens once it has been still for longer
+# than 1.5 measured periods, or for longer than max_period.
+#
+# A duty change in the middle of a period can move a rise, which gives one
+# or two intervals shorter than a period. When max_period is known (it is
+# the PWM period), intervals of any other length are dropped instead of
+# decoded into brightness the program never set.
+
+from collections import namedtuple
+
+import cocotb
+from cocotb.simtime import get_sim_time
+
+from icyrisc.memory import CHANNELS, PWM_PERIOD
+
+# channel -> pin of `top`, all active low
+PINS = {"led": "LED", "red": "RGB_R", "green": "RGB_G", "blue": "RGB_B"}
+
+Brightness = namedtuple("Brightness", ["time", "duty", "period"])
+Brightness.__doc__ = """From time on (simulation time, ps) the output is lit for duty (0.0..1.0) of
+every period; period is None while it holds a steady level."""
+
+
+def counts(duty):
+    """The 0..255 duty byte of leds a decoded duty corresponds to."""
+    return round(duty * PWM_PERIOD)
+
+
+class PwmDecoder:
+    """Turns the level changes of one PWM output into a Brightness series."""
+
+    def __init__(self, time=0, lit=False, max_period=None):
+        self.lit = lit
+        self.max_period = max_period
+        self.period = None  # last measured period
+        self.rise = self.fall = None  # edges of the period being measured
+        self.last = time
+        self.series = [Brightness(time, float(lit), None)]
+
+    def _emit(self, time, duty, period):
+        series = self.series
+        if series and series[-1].time == time:
+            series.pop()  # superseded before it lasted
+        if not series or (series[-1].duty, series[-1].period) != (duty, period):
+            series.append(Brightness(time, duty, period))
+
+    def edge(self, time, lit):
+        """Feeds the output's level (True = lit) after a change at time."""
+        if lit == self.lit:
+            return
+        self.settle(time)
+        self.lit, self.last = lit, time
+        if not lit:
+            self.fall = time
+            return
+        if self.rise is not None and self.fall is not None:
+            period = time - self.rise
+            if self.max_period is None or period == self.max_period:
+                self.period = period
+                self._emit(self.rise, (self.fall - self.rise) / period, period)
+        self.rise = time
+
+    def settle(self, now):
+        """Records a steady level if the output has been still for too long by now."""
+        limit = self.max_period or (1.5 * self.period if self.period else None)
+        if limit is not None and now - self.last > limit:
+            self._emit(self.last, float(self.lit), None)
+            self.rise = self.fall = None
+
+
+def _lit(pin):
+    return str(pin.value) == "0"
+
+
+class PwmMonitor:
+    """Decodes the PWM outputs of `top` from their edges; see the module comment.
+
+    clock_period (ps), when given, fixes the PWM period at PWM_PERIOD clock
+    cycles: a channel switched off is noticed before any period was measured,
+    and the partial periods of a mid-period duty change are dropped.
+    """
+
+    def __init__(self, dut, channels=tuple(CHANNELS), clock_period=None):
+        self.pins = {channel: getattr(dut, PINS[channel]) for channel in channels}
+        self.max_period = PWM_PERIOD * clock_period if clock_period else None
+        self.decoders = {}
+        self._tasks = []
+
+    def start(self):
+        if not self._tasks:
+            now = int(get_sim_time("ps"))
+            for channel, pin in self.pins.items():
+                self.decoders[channel] = PwmDecoder(now, _lit(pin), self.max_period)
+                self._tasks.append(cocotb.start_soon(self._watch(pin, self.decoders[channel])))
+        return self
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def _watch(self, pin, decoder):
+        change = pin.value_change
+        while True:
+            await change
+            decoder.edge(int(get_sim_time("ps")), _lit(pin))
+
+    def series(self, channel):
+        """Brightness samples of a channel up to now."""
+        decoder = self.decoders[channel]
+        decoder.settle(int(get_sim_time("ps")))
+        return decoder.series
+
+    def duty(self, channel):
+        """The latest decoded duty (0.0..1.0) of a channel."""
+        return self.series(channel)[-1].duty
+
+    def counts(self, channel):
+        """The leds byte the latest decoded duty of a channel corresponds to."""
+        return counts(self.duty(channel))
@@ -0,0 +1,168 @@
+## Timer fast-forward: skip the idle cycles of programs polling millis / micros
+#
+# memory.sv advances micros every 12 and millis every 12000 clock cycles, so a
+# program waiting on the timer spends almost all of its simulation time in a
+# loop like
+#
+#   wait: lw   t0, -8(zero)    # millis
+#         bltu t0, t1, wait
+#
+# TimerFastForward watches the retirements. Once the same short loop around a
+# timer load has gone by twice unchanged (only ALU ops, branches and timer
+# loads; no stores), it replays the loop on the reference model, with the
+# registers the RTL holds, to find the first cycle at which the loop would
+# exit. It then deposits millis, micros, their prescalers and pwm_counter as
+# they would be two loop iterations before that cycle, so the RTL makes the
+# last passes and leaves the loop on its own. The simulator's clock keeps
+# running normally: `skipped` counts the cycles jumped over, so
+# cycles simulated + skipped is the time the program experienced.
+#
+#   timers = TimerFastForward(dut, monitor)          # explicit
+#   ICYRISC_FAST_TIMERS=1 make test                  # every RetirementMonitor gets one
+#
+# The loop exits within one iteration of where it would have without the
+# jump. The exit is assumed monotonic in time, which holds for the usual
+# `while (millis() - start < delay)` waits until the timer wraps. It relies on
+# loads of millis / micros returning the peripheral, which memory.sv does since
+# its read select is registered with the read data. Under lockstep
+# co-simulation the jumped values reach the model as any timer read does
+# (CosimChecker takes them from the RTL).
+
+import os
+from collections import deque, namedtuple
+
+from icyrisc.isa import rd, rs1
+from icyrisc.iss import Iss
+from icyrisc.memory import CYCLES_PER_MICRO, CYCLES_PER_MILLI, MICROS_ADDR, MILLIS_ADDR, PWM_PERIOD
+
+ENV = "ICYRISC_FAST_TIMERS"
+TIMER_ADDRS = (MILLIS_ADDR, MICROS_ADDR)
+MAX_BODY = 16  # longest loop, in instructions, that counts as polling
+HORIZON = 1000 * CYCLES_PER_MILLI  # furthest one jump goes: 1 s of the 12 MHz clock
+
+Spin = namedtuple("Spin", ["head", "body", "cycles"])
+Spin.__doc__ = """A polling loop: head is the pc of its timer load, body the (pc, inst) of
+one pass starting there and cycles how long a pass takes."""
+
+
+def is_timer_load(record):
+    return record.load is not None and record.load & 0xFFFFFFFC in TIMER_ADDRS
+
+
+class SpinDetector:
+    """Spots a loop around a timer load in a stream of Retired records."""
+
+    def __init__(self, max_body=MAX_BODY):
+        self.max_body = max_body
+        self.recent = deque(maxlen=2 * max_body + 1)
+
+    def reset(self):
+        self.recent.clear()
+
+    def retired(self, record):
+        """Feeds one record; returns a Spin when two identical passes just completed."""
+        self.recent.append(record)
+        if not is_timer_load(record):
+            return None
+        recent = list(self.recent)
+        heads = [i for i, r in enumerate(recent) if r.pc == record.pc]
+        if len(heads) < 3:
+            return None
+        a, b, c = heads[-3:]
+        first = [(r.pc, r.inst) for r in recent[a:b]]
+        second = [(r.pc, r.inst) for r in recent[b:c]]
+        if first != second:
+            return None
+        for r in recent[b:c]:
+            if r.store is not None or (r.load is not None and not is_timer_load(r)):
+                return None
+        if rd(record.inst) == rs1(record.inst) != 0:
+            return None  # the head clobbers its own base: it cannot be replayed from after it
+        return Spin(record.pc, tuple(second), record.cycle - recent[b].cycle)
+
+
+def exit_cycle(spin, regs, now, horizon=HORIZON):
+    """The first cycle in (now, now + horizon] at which a pass of the loop, started
+    from regs (the registers after the head last retired), leaves it; None if it
+    still spins at now + horizon."""
+    model = Iss()
+    for pc, inst in spin.body:
+        model.words[pc >> 2] = inst
+    pcs = {pc for pc, _ in spin.body}
+
+    def leaves(cycle):
+        model.regs[:32] = regs
+        model.pc = spin.head
+        model.memory.cycle = cycle
+        for _ in spin.body:
+            model.step()
+            if model.pc == spin.head:
+                return False
+            if model.pc not in pcs:
+                return True
+        return False
+
+    if not leaves(now + horizon):
+        return None
+    lo, hi = now, now + horizon
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if leaves(mid):
+            hi = mid
+        else:
+            lo = mid
+    return hi
+
+
+def jump_target(spin, regs, now, horizon=HORIZON):
+    """The cycle to move the timers to once spin was detected at cycle now: two
+    passes before the loop exits (or before now + horizon), None when the exit
+    is too close for a jump to pay."""
+    leave = exit_cycle(spin, regs, now, horizon)
+    target = (now + horizon if leave is None else leave) - 2 * spin.cycles
+    return target if target - now > 4 * spin.cycles else None
+
+
+class TimerFastForward:
+    """Jumps memory.sv's timers over polling loops seen by a RetirementMonitor."""
+
+    def __init__(self, dut, monitor, horizon=HORIZON):
+        self.mem = dut.mem0
+        self.monitor = monitor
+        self.horizon = horizon
+        self.detector = SpinDetector()
+        self.skipped = 0
+        self.jumps = []  # (cycle, cycle jumped to), in timer cycles since power-up
+        monitor.add_callback(self._on_retire)
+
+    def cycle(self):
+        """Clock cycles since power-up, as the millis prescaler counts them."""
+        return int(self.mem.millis.value) * CYCLES_PER_MILLI + int(self.mem.millis_counter.value)
+
+    def set_cycle(self, cycle):
+        """Puts every counter of memory.sv where `cycle` clock edges leave it."""
+        self.mem.millis.value = (cycle // CYCLES_PER_MILLI) & 0xFFFFFFFF
+        self.mem.millis_counter.value = cycle % CYCLES_PER_MILLI
+        self.mem.micros.value = (cycle // CYCLES_PER_MICRO) & 0xFFFFFFFF
+        self.mem.micros_counter.value = cycle % CYCLES_PER_MICRO
+        self.mem.pwm_counter.value = cycle % PWM_PERIOD
+
+    def _on_retire(self, record):
+        spin = self.detector.retired(record)
+        if spin is None:
+            return
+        self.detector.reset()
+        now = self.cycle()
+        target = jump_target(spin, [int(reg.value) for reg in self.monitor.regs], now, self.horizon)
+        if target is None:
+            return  # about to exit anyway
+        self.set_cycle(target)
+        self.skipped += target - now
+        self.jumps.append((now, target))
+
+
+def session_fast_timers(dut, monitor):
+    """A TimerFastForward for monitor when $ICYRISC_FAST_TIMERS is set, else None."""
+    if not os.getenv(ENV):
+        return None
+    return TimerFastForward(dut, monitor)
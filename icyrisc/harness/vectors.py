@@ -0,0 +1,171 @@
+## Batched instruction vectors for the `top` toplevel
+#
+# One reset, one clock, any number of (register setup, instruction, expected
+# outcome) vectors streamed back to back through the FSM:
+#
+#   * each vector's instruction is written into memory at the address the core
+#     will fetch next, on the falling edge of the cycle whose next state is
+#     FETCH (so branches and jumps simply move where the next vector goes);
+#   * its register setup is deposited on the falling edge of its FETCH, after
+#     the previous writeback has landed and before DECODE reads the operands;
+#   * it is checked when the RetirementMonitor reports it, against the explicit
+#     expectation if one was given and always against the reference model.
+#
+# Sequential vectors fill `code` (default 0x000-0x0ff, clear of the test_mem
+# data); when the next vector would fall outside it a `jal x0` back to the
+# start is slipped in. After the last vector the core is parked on a
+# `jal x0, 0` self-loop.
+
+from collections import deque, namedtuple
+
+import cocotb
+from cocotb.triggers import ClockCycles, Event, FallingEdge, First, RisingEdge
+
+from icyrisc.asm import assemble_jal_instruction
+from icyrisc.fsm import FETCH
+from icyrisc.harness.backdoor import Backdoor
+from icyrisc.harness.monitor import RetirementMonitor
+from icyrisc.iss import Iss
+from icyrisc.memimage import MEM_BYTES
+
+Vector = namedtuple("Vector", ["inst", "regs", "expect"], defaults=(None, None))
+Vector.__doc__ = """One instruction check. regs maps register numbers to the values they hold
+before the instruction; expect optionally maps register numbers to their values
+after it (the reference model is checked either way)."""
+
+HALT = assemble_jal_instruction(0, 0)  # jal x0, 0
+
+_Slot = namedtuple("_Slot", ["index", "inst", "regs", "expect"])  # index is None for filler jumps
+
+
+class VectorMismatch(AssertionError):
+    """At least one vector retired differently from its expectation."""
+
+
+class VectorRunner:
+    """Streams Vectors through `top`; `model` (an Iss) supplies next pcs and
+    expectations and should start out with the same memory as the RTL."""
+
+    def __init__(self, dut, model=None, monitor=None, code=(0, 0x100), max_failures=20):
+        self.dut = dut
+        self.model = model if model is not None else Iss()
+        self.monitor = monitor if monitor is not None else RetirementMonitor(dut)
+        self.code = code
+        self.max_failures = max_failures
+        self.next_state = dut.c0.f0.next_state
+        self.backdoor = Backdoor(dut)
+        self.checked = 0
+        self.failures = []
+        self.failed = 0
+        self.monitor.add_callback(self._on_retire)
+        self._vectors = None
+        self._fetching = None
+        self._pending = deque()
+        self._last = None
+        self._done = Event()
+
+    async def run(self, vectors, timeout_cycles=None):
+        """Resets the core (the clock must already be running), runs every vector and
+        raises VectorMismatch listing the first failures."""
+        vectors = list(vectors)
+        if not vectors:
+            return
+        self._vectors = iter(enumerate(vectors))
+        self._last = len(vectors) - 1
+        self._pending.clear()
+        self._done.clear()
+        self.model.pc = 0  # program_counter PROGRAM_START
+
+        self.dut.SW.value = 0
+        await RisingEdge(self.dut.clk)
+        self._place(self._next_slot(self.model.pc), self.model.pc)
+        self.monitor.start()
+        driver = cocotb.start_soon(self._drive())
+        await FallingEdge(self.dut.clk)
+        self.dut.SW.value = 1
+
+        if timeout_cycles is None:
+            await self._done.wait()
+        else:
+            await First(self._done.wait(), ClockCycles(self.dut.clk, timeout_cycles))
+        driver.cancel()
+        self.monitor.stop()
+        if not self._done.is_set():
+            self._fail(None, f"only {self.checked} of {len(vectors)} vectors retired in {timeout_cycles} cycles")
+        if self.failures:
+            more = f"\n... and {self.failed - len(self.failures)} more" if self.failed > len(self.failures) else ""
+            raise VectorMismatch(f"{self.failed} of {len(vectors)} vectors failed:\n" + "\n".join(self.failures) + more)
+
+    def _next_slot(self, pc):
+        """The next thing to fetch at pc: a vector, a jump back into `code`, or HALT."""
+        lo, hi = self.code
+        if not 0 <= pc < MEM_BYTES:
+            raise ValueError(f"next pc 0x{pc:08x} is outside the {MEM_BYTES}-byte memory")
+        if self._vectors is None:
+            return _Slot(None, HALT, None, None)
+        if not lo <= pc < hi:
+            return _Slot(None, assemble_jal_instruction(0, lo - pc), None, None)
+        index, vector = next(self._vectors, (None, None))
+        if vector is None:
+            self._vectors = None
+            return _Slot(None, HALT, None, None)
+        return _Slot(index, vector.inst, vector.regs, vector.expect)
+
+    def _place(self, slot, pc):
+        self.backdoor.poke_word(pc, slot.inst)
+        self.model.words[pc >> 2] = slot.inst
+        self._fetching = slot
+
+    async def _drive(self):
+        falling = FallingEdge(self.dut.clk)
+        state = self.monitor.state
+        while True:
+            await falling
+            if int(state.value) == FETCH:
+                slot = self._fetching
+                for reg, value in (slot.regs or {}).items():
+                    if reg:
+                        self.backdoor.write_register(reg, value)
+                        self.model.regs[reg] = value & 0xFFFFFFFF
+                self._pending.append((slot, self.model.step()))
+                self._fetching = None
+            elif self._fetching is None and int(self.next_state.value) == FETCH:
+                self._place(self._next_slot(self.model.pc), self.model.pc)
+
+    def _on_retire(self, retired):
+        if not self._pending:
+            return
+        slot, expected = self._pending.popleft()
+        if slot.index is None:
+            if retired.inst != expected.inst or retired.next_pc != expected.next_pc:
+                self._fail(slot, f"filler 0x{expected.inst:08x} at pc 0x{expected.pc:08x} went to "
+                                 f"0x{retired.next_pc:08x}, expected 0x{expected.next_pc:08x}")
+            return
+        problems = []
+        if retired.inst != expected.inst:
+            problems.append(f"fetched 0x{retired.inst:08x}")
+        if retired.next_pc != expected.next_pc:
+            problems.append(f"next pc 0x{retired.next_pc:08x}, expected 0x{expected.next_pc:08x}")
+        if retired.rd != expected.rd or retired.rd_value != expected.rd_value:
+            problems.append(f"x{retired.rd} = {_hex(retired.rd_value)}, model x{expected.rd} = {_hex(expected.rd_value)}")
+        if retired.store != expected.store:
+            problems.append(f"store {retired.store}, model {expected.store}")
+        for reg, value in (slot.expect or {}).items():
+            got = self.backdoor.read_register(reg)
+            if got != value & 0xFFFFFFFF:
+                problems.append(f"x{reg} = 0x{got:08x}, expected 0x{value & 0xFFFFFFFF:08x}")
+        if problems:
+            self._fail(slot, "; ".join(problems))
+        self.checked += 1
+        if slot.index == self._last:
+            self._done.set()
+
+    def _fail(self, slot, message):
+        self.failed += 1
+        if len(self.failures) < self.max_failures:
+            where = "" if slot is None or slot.index is None else f"vector {slot.index} (0x{slot.inst:08x}): "
+            self.failures.append(where + message)
+
+
+def _hex(value):
+    return "-" if value is None else f"0x{value:08x}"
@@ -0,0 +1,182 @@
+## Triggered waveform dumping for the `top` toplevel
+#
+# Waves stay off by default. top.sv opens a VCD only when the run is given
+# +WAVES=<file>, and with +WAVES_TRIGGERED it dumps nothing until the harness
+# sets waves_on, so a run can carry a dump at almost no cost and only write the
+# cycles around an event. Because the simulator cannot dump the past, Waves
+# also keeps a rolling window of the last `window` cycles of a few key signals
+# (sampled on every falling edge) and writes it as <name>.<time>ps.window.vcd
+# when it triggers:
+#
+#   waves = Waves(dut).start()
+#   waves.watch_pc(checker.monitor, 0x120)      # trigger on a retirement at a pc
+#   with waves.guard():                         # trigger on any assertion failure
+#       await checker.run(1000)
+#
+# CosimChecker triggers the session Waves on a mismatch. Setting
+# ICYRISC_WAVES=<dir> enables a session Waves for every checker in the
+# simulator process, writing into <dir>; +WAVES_PC=<pc> adds a pc trigger.
+# `python -m icyrisc.regress --waves` runs every shard that way and re-runs
+# the failing ones (same seed) with a full dump.
+
+import os
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+import cocotb
+from cocotb.simtime import get_sim_time
+from cocotb.triggers import ClockCycles, FallingEdge
+
+from icyrisc.vcd import VcdWriter
+
+ENV = "ICYRISC_WAVES"
+
+# names under dut of the signals kept in the rolling window; their widths
+# come from the handles, so a retyped signal (fsm_state_t is an untyped enum,
+# 32 bits) never gets truncated in the window file
+WINDOW_SIGNALS = (
+    "SW",
+    "pc",
+    "pc_old",
+    "inst",
+    "c0.f0.state",
+    "alu_ctrl",
+    "alu_result",
+    "result",
+    "reg_wren",
+    "mem_wren",
+    "mem0.read_address",
+    "mem0.write_data",
+    "mem_rd",
+)
+
+
+def wave_plusargs(path, triggered=False):
+    """Plusargs that make top.sv dump to path: everything, or only when triggered."""
+    return [f"+WAVES={path}"] + (["+WAVES_TRIGGERED"] if triggered else [])
+
+
+def _handle(dut, name):
+    handle = dut
+    for part in name.split("."):
+        handle = getattr(handle, part)
+    return handle
+
+
+class Waves:
+    """Rolling window plus simulator dump control; see the module comment.
+
+    after is how many cycles the simulator keeps dumping after a trigger, and
+    max_windows how many triggers write a window file (later ones are only logged).
+    """
+
+    def __init__(self, dut, directory=".", name="waves", window=64, after=16, max_windows=4,
+                 signals=WINDOW_SIGNALS):
+        self.dut = dut
+        self.directory = Path(directory)
+        self.name = name
+        self.after = after
+        self.max_windows = max_windows
+        self.handles = [_handle(dut, s) for s in signals]
+        self.signals = {s: len(h) for s, h in zip(signals, self.handles)}  # name -> width
+        self.window = deque(maxlen=window)
+        self.triggers = []  # (sim time in ps, reason)
+        try:
+            self._waves_on = dut.waves_on
+        except AttributeError:
+            self._waves_on = None  # a build without the dump block in top.sv
+        self._task = None
+
+    def start(self):
+        # cocotb cancels the sampler at the end of each test; a later test restarts it
+        if (self._task is None or self._task.done()) and self.window.maxlen:
+            self.window.clear()
+            self._task = cocotb.start_soon(self._sample())
+        return self
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _sample(self):
+        falling = FallingEdge(self.dut.clk)
+        handles = self.handles
+        window = self.window
+        while True:
+            await falling
+            window.append((int(get_sim_time("ps")), [str(h.value) for h in handles]))
+
+    def dump(self, on=True):
+        """Switches the simulator dump on or off (needs +WAVES=<file>)."""
+        if self._waves_on is not None:
+            self._waves_on.value = int(on)
+
+    def trigger(self, reason):
+        """Writes the rolling window and dumps the next `after` cycles. Returns the
+        window's path, or None past max_windows."""
+        time = int(get_sim_time("ps"))
+        self.triggers.append((time, reason))
+        self.dut._log.info(f"waves triggered: {reason}")
+        if len(self.triggers) > self.max_windows:
+            return None
+        path = self.write_window(self.directory / f"{self.name}.{time}ps.window.vcd")
+        if self._waves_on is not None and self.after:
+            self.dump(True)
+            cocotb.start_soon(self._dump_off_after(self.after))
+        return path
+
+    async def _dump_off_after(self, cycles):
+        await ClockCycles(self.dut.clk, cycles)
+        self.dump(False)
+
+    def write_window(self, path):
+        """Writes the window as a VCD with a reconstructed clock; returns its path."""
+        path = Path(path)
+        samples = list(self.window)
+        with VcdWriter(path, {"clk": 1, **self.signals}) as vcd:
+            for i, (time, values) in enumerate(samples):
+                vcd.change(time, "clk", "0")
+                for name, bits in zip(self.signals, values):
+                    vcd.change(time, name, bits.lower())
+                if i + 1 < len(samples):
+                    vcd.change((time + samples[i + 1][0]) // 2, "clk", "1")
+        self.dut._log.info(f"last {len(samples)} cycles written to {path}")
+        return path
+
+    def watch_pc(self, monitor, pc):
+        """Triggers when a RetirementMonitor reports an instruction at pc."""
+        def check(record):
+            if record.pc == pc:
+                self.trigger(f"retired pc 0x{pc:08x}")
+        monitor.add_callback(check)
+
+    @contextmanager
+    def guard(self):
+        """Triggers if the block raises an AssertionError (which it re-raises)."""
+        try:
+            yield self
+        except AssertionError as e:
+            self.trigger(f"{type(e).__name__}: {e}")
+            raise
+
+
+_session = {}
+
+
+def session_waves(dut):
+    """The running Waves writing into $ICYRISC_WAVES, or None when it is unset.
+    One per dut, shared by the tests of the simulator process."""
+    if not os.getenv(ENV):
+        return None
+    waves = _session.get(id(dut))
+    if waves is None:
+        waves = _session[id(dut)] = Waves(dut, os.environ[ENV])
+    return waves.start()
+
+
+def trigger_pc():
+    """The +WAVES_PC=<pc> plusarg as an int, or None."""
+    pc = cocotb.plusargs.get("WAVES_PC")
+    return None if pc is None else int(pc, 0)
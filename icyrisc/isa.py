@@ -0,0 +1,107 @@
+## RV32I encoding constants, mirroring //src/control/constants.sv
+
+OP_ITYPE = 19
+OP_STYPE = 35
+OP_RTYPE = 51
+OP_BTYPE = 99
+
+OP_LOAD = 3
+OP_AUIPC = 23
+OP_LUI = 55
+OP_JALR = 103
+OP_JAL = 111
+
+OPCODES = (OP_ITYPE, OP_STYPE, OP_RTYPE, OP_BTYPE, OP_LOAD, OP_AUIPC, OP_LUI, OP_JALR, OP_JAL)
+
+# branch funct3 (branch_funct3_t)
+BEQ = 0b000
+BNE = 0b001
+BLT = 0b100
+BGE = 0b101
+BLTU = 0b110
+BGEU = 0b111
+
+# load / store funct3, as seen by memory.sv
+FUNCT3_BYTE = 0b000
+FUNCT3_HALF = 0b001
+FUNCT3_WORD = 0b010
+FUNCT3_BYTE_UNSIGNED = 0b100
+FUNCT3_HALF_UNSIGNED = 0b101
+
+# alu_ctrl_t, in declaration order
+ALU_CTRL_NAMES = ("ADD", "SUB", "AND", "OR", "XOR", "SLT", "SLTU", "SLL", "SRL", "SRA", "SRC1", "SRC2")
+
+MASK32 = 0xFFFFFFFF
+
+ABI_NAMES = (
+    "zero", "ra", "sp", "gp", "tp", "t0", "t1", "t2",
+    "s0", "s1", "a0", "a1", "a2", "a3", "a4", "a5",
+    "a6", "a7", "s2", "s3", "s4", "s5", "s6", "s7",
+    "s8", "s9", "s10", "s11", "t3", "t4", "t5", "t6",
+)
+
+
+def sign_extend(value, bits):
+    """Sign extends the low `bits` bits of value to a Python int."""
+    value &= (1 << bits) - 1
+    return value - (1 << bits) if value >> (bits - 1) else value
+
+
+def to_signed(value):
+    """Interprets a 32-bit value as two's complement."""
+    return value - 0x100000000 if value & 0x80000000 else value
+
+
+def opcode(inst):
+    return inst & 0x7F
+
+
+def rd(inst):
+    return (inst >> 7) & 0x1F
+
+
+def funct3(inst):
+    return (inst >> 12) & 0x7
+
+
+def rs1(inst):
+    return (inst >> 15) & 0x1F
+
+
+def rs2(inst):
+    return (inst >> 20) & 0x1F
+
+
+def funct7(inst):
+    return (inst >> 25) & 0x7F
+
+
+def imm_i(inst):
+    return sign_extend(inst >> 20, 12)
+
+
+def imm_s(inst):
+    return sign_extend(((inst >> 25) << 5) | ((inst >> 7) & 0x1F), 12)
+
+
+def imm_b(inst):
+    return sign_extend(
+        ((inst >> 31) << 12) | (((inst >> 7) & 0x1) << 11) | (((inst >> 25) & 0x3F) << 5) | (((inst >> 8) & 0xF) << 1),
+        13,
+    )
+
+
+def imm_u(inst):
+    return inst & 0xFFFFF000
+
+
+def imm_j(inst):
+    return sign_extend(
+        ((inst >> 31) << 20) | (((inst >> 12) & 0xFF) << 12) | (((inst >> 20) & 0x1) << 11) | (((inst >> 21) & 0x3FF) << 1),
+        21,
+    )
+
+
+def writes_rd(inst):
+    """True if the instruction retires through a register write (ALU_WB / MEM_WB)."""
+    return opcode(inst) in (OP_ITYPE, OP_RTYPE, OP_LOAD, OP_AUIPC, OP_LUI, OP_JALR, OP_JAL)
@@ -0,0 +1,378 @@
+## RV32I instruction-set simulator used as the golden model for //src/top.sv
+#
+# Every instruction word is decoded once into a small closure that updates the
+# register file and returns the next pc. Decoded closures are cached by word,
+# so self-modifying code stays correct and straight-line loops run at a few
+# million instructions per second in plain Python.
+#
+# The model decodes exactly the fields the RTL decoder looks at: funct7 only
+# matters through bit 30 (SUB / SRA / SRAI), load / store width comes from the
+# funct3 bits memory.sv uses, and opcodes the FSM does not know (FENCE, ECALL,
+# ...) fall through DECODE -> FETCH and retire as no-ops. Like the core, JALR
+# keeps bit 0 of its target (the ISA clears it): JUMP hands the ALU sum to
+# program_counter unmodified, and fetches ignore the two low pc bits.
+
+import argparse
+import sys
+import time
+from collections import namedtuple
+
+from icyrisc.isa import (
+    ABI_NAMES,
+    MASK32,
+    OP_AUIPC,
+    OP_BTYPE,
+    OP_ITYPE,
+    OP_JAL,
+    OP_JALR,
+    OP_LOAD,
+    OP_LUI,
+    OP_RTYPE,
+    OP_STYPE,
+    imm_b,
+    imm_i,
+    imm_j,
+    imm_s,
+    imm_u,
+    writes_rd,
+)
+from icyrisc.memimage import MEM_BYTES, read_lanes
+from icyrisc.memory import Memory
+
+if sys.byteorder != "little":
+    raise ImportError("icyrisc.iss maps memory words with native byte order and needs a little-endian host")
+
+SINK = 32  # writes to x0 land here so x0 always reads as zero
+
+StepResult = namedtuple("StepResult", ["pc", "inst", "next_pc", "rd", "rd_value", "store"])
+StepResult.__doc__ = """One retired instruction. store is (address, data, funct3) or None."""
+
+
+class Iss:
+    """Architectural model of the IcyRisc core: 32 registers, pc and a Memory
+    (icyrisc.memory), its own unless one is passed in."""
+
+    def __init__(self, image=None, pc=0, memory=None):
+        self.regs = [0] * 33
+        self.pc = pc
+        self.memory = Memory() if memory is None else memory
+        if image is not None:
+            self.memory.mem[: len(image)] = image[:MEM_BYTES]
+        # the 8kB fast path indexes these directly; the rest goes through the Memory
+        self.mem = self.memory.mem
+        self.words = self.memory.words
+        self.retired = 0
+        self.halted = False
+        self._decoded = {}
+
+    @classmethod
+    def from_memh(cls, prefix):
+        """Builds a model from the `<prefix>0..3.txt` lanes memory.sv reads."""
+        return cls(read_lanes(prefix))
+
+    @property
+    def registers(self):
+        return self.regs[:32]
+
+    def fetch(self, pc):
+        # memory.sv ignores the two low address bits and reads 0 outside 8kB
+        return self.words[pc >> 2] if pc < MEM_BYTES else 0
+
+    def load_word(self, addr):
+        return self.words[addr >> 2] if addr < MEM_BYTES else 0
+
+    def _load_oob(self, addr):
+        """Reads outside the physical range: peripherals, else 0."""
+        return self.memory.load_oob(addr)
+
+    def _store_oob(self, addr, data, funct3):
+        """Writes outside the physical range: leds, else dropped."""
+        self.memory.store_oob(addr, data, funct3)
+
+    def run(self, max_steps=1_000_000, until=None):
+        """Executes up to max_steps instructions, stopping early at pc == until or a
+        self-loop (e.g. `j .`). Returns the number of instructions retired."""
+        words = self.words
+        cache = self._decoded
+        compile_inst = self._compile
+        stop = -1 if until is None else until
+        pc = self.pc
+        n = 0
+        while n < max_steps and pc != stop:
+            inst = words[pc >> 2] if pc < MEM_BYTES else 0
+            ex = cache.get(inst)
+            if ex is None:
+                ex = cache[inst] = compile_inst(inst)
+            next_pc = ex(pc)
+            n += 1
+            if next_pc == pc:
+                self.halted = True
+                break
+            pc = next_pc
+        self.pc = pc
+        self.retired += n
+        return n
+
+    def step(self):
+        """Executes one instruction and reports what it did."""
+        pc = self.pc
+        inst = self.fetch(pc)
+        op = inst & 0x7F
+        store = None
+        if op == OP_STYPE:
+            addr = (self.regs[(inst >> 15) & 0x1F] + imm_s(inst)) & MASK32
+            store = (addr, self.regs[(inst >> 20) & 0x1F], (inst >> 12) & 0x7)
+        ex = self._decoded.get(inst)
+        if ex is None:
+            ex = self._decoded[inst] = self._compile(inst)
+        next_pc = ex(pc)
+        rd = (inst >> 7) & 0x1F if writes_rd(inst) else None
+        self.pc = next_pc
+        self.retired += 1
+        self.halted = next_pc == pc
+        return StepResult(pc, inst, next_pc, rd, self.regs[rd] if rd is not None else None, store)
+
+    def _compile(self, inst):
+        """Decodes one instruction word into a closure `ex(pc) -> next_pc`."""
+        regs = self.regs
+        mem = self.mem
+        words = self.words
+        load_oob = self._load_oob
+        store_oob = self._store_oob
+        M = MASK32
+
+        op = inst & 0x7F
+        d = (inst >> 7) & 0x1F or SINK
+        f3 = (inst >> 12) & 0x7
+        s1 = (inst >> 15) & 0x1F
+        s2 = (inst >> 20) & 0x1F
+        alt = (inst >> 30) & 1
+
+        if op == OP_RTYPE:
+            if f3 == 0 and alt:
+                def ex(pc):
+                    regs[d] = (regs[s1] - regs[s2]) & M
+                    return (pc + 4) & M
+            elif f3 == 0:
+                def ex(pc):
+                    regs[d] = (regs[s1] + regs[s2]) & M
+                    return (pc + 4) & M
+            elif f3 == 1:
+                def ex(pc):
+                    regs[d] = (regs[s1] << (regs[s2] & 0x1F)) & M
+                    return (pc + 4) & M
+            elif f3 == 2:
+                def ex(pc):
+                    regs[d] = int((regs[s1] ^ 0x80000000) < (regs[s2] ^ 0x80000000))
+                    return (pc + 4) & M
+            elif f3 == 3:
+                def ex(pc):
+                    regs[d] = int(regs[s1] < regs[s2])
+                    return (pc + 4) & M
+            elif f3 == 4:
+                def ex(pc):
+                    regs[d] = regs[s1] ^ regs[s2]
+                    return (pc + 4) & M
+            elif f3 == 5 and alt:
+                def ex(pc):
+                    a = regs[s1]
+                    regs[d] = ((a - ((a & 0x80000000) << 1)) >> (regs[s2] & 0x1F)) & M
+                    return (pc + 4) & M
+            elif f3 == 5:
+                def ex(pc):
+                    regs[d] = regs[s1] >> (regs[s2] & 0x1F)
+                    return (pc + 4) & M
+            elif f3 == 6:
+                def ex(pc):
+                    regs[d] = regs[s1] | regs[s2]
+                    return (pc + 4) & M
+            else:
+                def ex(pc):
+                    regs[d] = regs[s1] & regs[s2]
+                    return (pc + 4) & M
+            return ex
+
+        if op == OP_ITYPE:
+            imm = imm_i(inst) & M
+            sh = s2  # shamt lives in the rs2 field
+            if f3 == 0:
+                def ex(pc):
+                    regs[d] = (regs[s1] + imm) & M
+                    return (pc + 4) & M
+            elif f3 == 1:
+                def ex(pc):
+                    regs[d] = (regs[s1] << sh) & M
+                    return (pc + 4) & M
+            elif f3 == 2:
+                simm = imm ^ 0x80000000
+                def ex(pc):
+                    regs[d] = int((regs[s1] ^ 0x80000000) < simm)
+                    return (pc + 4) & M
+            elif f3 == 3:
+                def ex(pc):
+                    regs[d] = int(regs[s1] < imm)
+                    return (pc + 4) & M
+            elif f3 == 4:
+                def ex(pc):
+                    regs[d] = regs[s1] ^ imm
+                    return (pc + 4) & M
+            elif f3 == 5 and alt:
+                def ex(pc):
+                    a = regs[s1]
+                    regs[d] = ((a - ((a & 0x80000000) << 1)) >> sh) & M
+                    return (pc + 4) & M
+            elif f3 == 5:
+                def ex(pc):
+                    regs[d] = regs[s1] >> sh
+                    return (pc + 4) & M
+            elif f3 == 6:
+                def ex(pc):
+                    regs[d] = regs[s1] | imm
+                    return (pc + 4) & M
+            else:
+                def ex(pc):
+                    regs[d] = regs[s1] & imm
+                    return (pc + 4) & M
+            return ex
+
+        if op == OP_LOAD:
+            imm = imm_i(inst)
+            unsigned = f3 & 0b100
+            if f3 & 0b010:
+                def ex(pc):
+                    a = (regs[s1] + imm) & M
+                    regs[d] = words[a >> 2] if a < MEM_BYTES else load_oob(a)
+                    return (pc + 4) & M
+            elif f3 & 0b001:
+                def ex(pc):
+                    a = (regs[s1] + imm) & M
+                    if a < MEM_BYTES:
+                        o = a & 0x1FFE
+                        v = mem[o] | (mem[o + 1] << 8)
+                    else:
+                        v = (load_oob(a) >> ((a & 2) << 3)) & 0xFFFF
+                    regs[d] = v if unsigned or v < 0x8000 else v | 0xFFFF0000
+                    return (pc + 4) & M
+            else:
+                def ex(pc):
+                    a = (regs[s1] + imm) & M
+                    v = mem[a] if a < MEM_BYTES else (load_oob(a) >> ((a & 3) << 3)) & 0xFF
+                    regs[d] = v if unsigned or v < 0x80 else v | 0xFFFFFF00
+                    return (pc + 4) & M
+            return ex
+
+        if op == OP_STYPE:
+            imm = imm_s(inst)
+            if f3 & 0b010:
+                def ex(pc):
+                    a = (regs[s1] + imm) & M
+                    if a < MEM_BYTES:
+                        words[a >> 2] = regs[s2]
+                    else:
+                        store_oob(a, regs[s2], f3)
+                    return (pc + 4) & M
+            elif f3 & 0b001:
+                def ex(pc):
+                    a = (regs[s1] + imm) & M
+                    if a < MEM_BYTES:
+                        o = a & 0x1FFE
+                        v = regs[s2]
+                        mem[o] = v & 0xFF
+                        mem[o + 1] = (v >> 8) & 0xFF
+                    else:
+                        store_oob(a, regs[s2], f3)
+                    return (pc + 4) & M
+            else:
+                def ex(pc):
+                    a = (regs[s1] + imm) & M
+                    if a < MEM_BYTES:
+                        mem[a] = regs[s2] & 0xFF
+                    else:
+                        store_oob(a, regs[s2], f3)
+                    return (pc + 4) & M
+            return ex
+
+        if op == OP_BTYPE:
+            imm = imm_b(inst)
+            if f3 == 0b000:
+                def ex(pc):
+                    return (pc + imm) & M if regs[s1] == regs[s2] else (pc + 4) & M
+            elif f3 == 0b001:
+                def ex(pc):
+                    return (pc + imm) & M if regs[s1] != regs[s2] else (pc + 4) & M
+            elif f3 == 0b100:
+                def ex(pc):
+                    return (pc + imm) & M if (regs[s1] ^ 0x80000000) < (regs[s2] ^ 0x80000000) else (pc + 4) & M
+            elif f3 == 0b101:
+                def ex(pc):
+                    return (pc + imm) & M if (regs[s1] ^ 0x80000000) >= (regs[s2] ^ 0x80000000) else (pc + 4) & M
+            elif f3 == 0b110:
+                def ex(pc):
+                    return (pc + imm) & M if regs[s1] < regs[s2] else (pc + 4) & M
+            elif f3 == 0b111:
+                def ex(pc):
+                    return (pc + imm) & M if regs[s1] >= regs[s2] else (pc + 4) & M
+            else:
+                # branch_decoder never takes an undefined funct3
+                def ex(pc):
+                    return (pc + 4) & M
+            return ex
+
+        if op == OP_LUI:
+            imm = imm_u(inst)
+            def ex(pc):
+                regs[d] = imm
+                return (pc + 4) & M
+            return ex
+
+        if op == OP_AUIPC:
+            imm = imm_u(inst)
+            def ex(pc):
+                regs[d] = (pc + imm) & M
+                return (pc + 4) & M
+            return ex
+
+        if op == OP_JAL:
+            imm = imm_j(inst)
+            def ex(pc):
+                regs[d] = (pc + 4) & M
+                return (pc + imm) & M
+            return ex
+
+        if op == OP_JALR:
+            imm = imm_i(inst)
+            def ex(pc):
+                target = (regs[s1] + imm) & M
+                regs[d] = (pc + 4) & M
+                return target
+            return ex
+
+        def ex(pc):
+            return (pc + 4) & M
+        return ex
+
+    def dump(self):
+        """Formats pc and the register file, four registers per line."""
+        lines = [f"pc  = 0x{self.pc:08x}  retired = {self.retired}"]
+        for base in range(0, 32, 4):
+            lines.append("  ".join(f"x{i:<2} ({ABI_NAMES[i]:>4}) = 0x{self.regs[i]:08x}" for i in range(base, base + 4)))
+        return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a lane-split memory image on the RV32I reference model.")
+    parser.add_argument("prefix", help="memory file prefix, e.g. programs/rv32i_test")
+    parser.add_argument("-n", "--steps", type=int, default=1_000_000, help="maximum instructions to execute")
+    parser.add_argument("--until", type=lambda s: int(s, 0), help="stop when pc reaches this address")
+    args = parser.parse_args(argv)
+
+    iss = Iss.from_memh(args.prefix)
+    start = time.perf_counter()
+    n = iss.run(args.steps, until=args.until)
+    elapsed = time.perf_counter() - start
+    print(iss.dump())
+    print(f"{n} instructions in {elapsed:.3f}s ({n / max(elapsed, 1e-9) / 1e6:.2f} MIPS){' [halted]' if iss.halted else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+## Loading program images and splitting them into the four memory.sv byte lanes
+#
+# memory.sv instantiates four 2048 x 8-bit memory_array lanes, each initialized
+# with $readmemh from `<prefix>0.txt` .. `<prefix>3.txt`. Lane N holds byte N of
+# every little-endian 32-bit word, so viewing a flat byte image as a
+# (words, 4) array makes lane N simply column N.
+#
+#   python -m icyrisc.memimage programs/rv32i_test.txt            # memh words
+#   python -m icyrisc.memimage firmware.elf -o programs/firmware  # ELF32 RISC-V
+#
+# Inputs can be word memh (with @addr records, in words), Intel HEX, ELF32
+# RISC-V executables or flat binaries. Lane files whose content hash has not
+# changed are left alone, so timestamps (and anything keyed on them) stay put.
+
+import argparse
+import hashlib
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+
+MEM_DEPTH = 2048  # words per lane
+MEM_BYTES = 4 * MEM_DEPTH
+
+FORMATS = ("memh", "ihex", "elf", "bin")
+
+# "00\n" .. "ff\n", indexed by byte value
+_LANE_LINES = np.frombuffer(b"".join(f"{i:02x}\n".encode() for i in range(256)), dtype=np.uint8).reshape(256, 3)
+
+
+def lane_paths(prefix):
+    """Returns the four lane file paths for a memory file prefix."""
+    return [Path(f"{prefix}{lane}.txt") for lane in range(4)]
+
+
+def _memh_segments(text):
+    """Yields (address, tokens) runs of a $readmemh file, honouring @addr records."""
+    addr = 0
+    tokens = []
+    for line in text.splitlines():
+        line = line.split("//", 1)[0]
+        for token in line.split():
+            if token.startswith("@"):
+                if tokens:
+                    yield addr, tokens
+                    addr += len(tokens)
+                    tokens = []
+                addr = int(token[1:], 16)
+            else:
+                tokens.append(token.replace("_", ""))
+    if tokens:
+        yield addr, tokens
+
+
+def _hex_tokens(tokens, width):
+    """Converts equal-width hex tokens to big-endian values in one bytes.fromhex call."""
+    digits = 2 * width
+    if any(len(t) != digits for t in tokens):
+        tokens = [t.rjust(digits, "0") for t in tokens]
+    return np.frombuffer(bytes.fromhex("".join(tokens)), dtype=f">u{width}")
+
+
+def parse_memh(text, width=4):
+    """Parses $readmemh text whose entries are `width` bytes into a flat
+    little-endian byte image; @addr records count in entries."""
+    segments = [(addr, _hex_tokens(tokens, width)) for addr, tokens in _memh_segments(text)]
+    size = max((width * (addr + len(values)) for addr, values in segments), default=0)
+    image = np.zeros(size, dtype=np.uint8)
+    for addr, values in segments:
+        image[width * addr : width * (addr + len(values))] = values.astype(f"<u{width}").view(np.uint8)
+    return image
+
+
+def parse_ihex(text):
+    """Parses Intel HEX (data, extended segment and extended linear address records)."""
+    chunks = []
+    base = 0
+    for lineno, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith(":"):
+            raise ValueError(f"Intel HEX line {lineno} does not start with ':'")
+        record = bytes.fromhex(line[1:])
+        if sum(record) & 0xFF:
+            raise ValueError(f"Intel HEX line {lineno} has a bad checksum")
+        count, addr, kind = record[0], int.from_bytes(record[1:3], "big"), record[3]
+        data = record[4 : 4 + count]
+        if kind == 0x00:
+            chunks.append((base + addr, data))
+        elif kind == 0x01:
+            break
+        elif kind == 0x02:
+            base = int.from_bytes(data, "big") << 4
+        elif kind == 0x04:
+            base = int.from_bytes(data, "big") << 16
+    size = max((addr + len(data) for addr, data in chunks), default=0)
+    image = np.zeros(size, dtype=np.uint8)
+    for addr, data in chunks:
+        image[addr : addr + len(data)] = np.frombuffer(data, dtype=np.uint8)
+    return image
+
+
+def parse_elf(path, limit=MEM_BYTES):
+    """Copies the PT_LOAD segments of an ELF32 little-endian RISC-V executable
+    to their physical addresses. The file is memory-mapped, so only the
+    loadable bytes are ever read."""
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    header = bytes(raw[:52])
+    if header[:4] != b"\x7fELF":
+        raise ValueError(f"{path} is not an ELF file")
+    if header[4] != 1 or header[5] != 1:
+        raise ValueError(f"{path} is not a 32-bit little-endian ELF")
+    machine, = struct.unpack_from("<H", header, 18)
+    if machine != 243:
+        raise ValueError(f"{path} is not a RISC-V ELF (e_machine {machine})")
+    phoff, = struct.unpack_from("<I", header, 28)
+    phentsize, phnum = struct.unpack_from("<HH", header, 42)
+
+    segments = []
+    for i in range(phnum):
+        entry = bytes(raw[phoff + i * phentsize : phoff + (i + 1) * phentsize])
+        kind, offset, _vaddr, paddr, filesz, memsz = struct.unpack_from("<IIIIII", entry)
+        if kind == 1 and memsz:  # PT_LOAD
+            segments.append((paddr, raw[offset : offset + filesz], memsz))
+    size = max((paddr + memsz for paddr, _, memsz in segments if paddr < limit), default=0)
+    image = np.zeros(size, dtype=np.uint8)
+    for paddr, data, memsz in segments:
+        if paddr >= limit:
+            continue  # e.g. a .bss placed at the MMIO addresses
+        image[paddr : paddr + len(data)] = data
+    return image
+
+
+def detect_format(path):
+    path = Path(path)
+    with open(path, "rb") as f:
+        head = f.read(4)
+    if head == b"\x7fELF":
+        return "elf"
+    if head[:1] == b":":
+        return "ihex"
+    if path.suffix in (".bin", ".img"):
+        return "bin"
+    return "memh"
+
+
+def load_image(path, fmt=None, base=0):
+    """Loads a program in any supported format as a flat uint8 image starting at address 0.
+    base shifts flat binaries, which carry no addresses of their own."""
+    fmt = fmt or detect_format(path)
+    if fmt == "elf":
+        return parse_elf(path)
+    if fmt == "bin":
+        data = np.fromfile(path, dtype=np.uint8)
+        return np.concatenate([np.zeros(base, dtype=np.uint8), data]) if base else data
+    text = Path(path).read_text()
+    if fmt == "ihex":
+        return parse_ihex(text)
+    if fmt == "memh":
+        return parse_memh(text)
+    raise ValueError(f"unknown image format {fmt!r}, expected one of {FORMATS}")
+
+
+def fit_image(image, depth=MEM_DEPTH, truncate=False):
+    """Pads an image with zeros to `depth` words. Data past the end of memory is
+    an error unless truncate is set, since memory.sv would silently drop it."""
+    size = 4 * depth
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image = np.frombuffer(image, dtype=np.uint8)
+    if len(image) > size:
+        if not truncate and image[size:].any():
+            last = size + int(np.flatnonzero(image[size:])[-1])
+            raise ValueError(f"image has data up to 0x{last:x}, past the {size}-byte memory")
+        return image[:size].copy()
+    fitted = np.zeros(size, dtype=np.uint8)
+    fitted[: len(image)] = image
+    return fitted
+
+
+def render_lane(values):
+    """Renders a uint8 array as $readmemh text, one byte per line."""
+    return _LANE_LINES[np.asarray(values, dtype=np.uint8)].tobytes()
+
+
+def parse_lane(text):
+    """Reads the byte values of a one-byte-wide memh file in file order, ignoring
+    @addr records (as $writememh may emit for a sub-range)."""
+    tokens = [token for _, run in _memh_segments(text) for token in run]
+    return _hex_tokens(tokens, 1) if tokens else np.zeros(0, dtype=np.uint8)
+
+
+def read_lanes(prefix, depth=MEM_DEPTH):
+    """Loads a lane-split image into a flat little-endian bytearray."""
+    image = np.zeros((depth, 4), dtype=np.uint8)
+    for lane, path in enumerate(lane_paths(prefix)):
+        values = parse_memh(Path(path).read_text(), width=1)[:depth]
+        image[: len(values), lane] = values
+    return bytearray(image)
+
+
+def write_lanes(prefix, image, depth=MEM_DEPTH, truncate=False):
+    """Writes a flat little-endian image out as four lane files, skipping lanes whose
+    contents are unchanged. Returns the list of paths actually written."""
+    words = fit_image(image, depth, truncate).reshape(depth, 4)
+    written = []
+    for lane, path in enumerate(lane_paths(prefix)):
+        content = render_lane(words[:, lane])
+        if path.exists() and hashlib.sha256(path.read_bytes()).digest() == hashlib.sha256(content).digest():
+            continue
+        path.write_bytes(content)
+        written.append(path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split a program image into the four memory.sv byte-lane files.")
+    parser.add_argument("image", help="memh word file, Intel HEX, ELF32 RISC-V executable or flat binary")
+    parser.add_argument("-o", "--output", help="lane file prefix (default: input path without its extension)")
+    parser.add_argument("-f", "--format", choices=FORMATS, help="input format (default: detect)")
+    parser.add_argument("--base", type=lambda s: int(s, 0), default=0, help="load address for flat binaries")
+    parser.add_argument("--depth", type=int, default=MEM_DEPTH, help="words per lane")
+    parser.add_argument("--truncate", action="store_true", help="drop data past the end of memory instead of failing")
+    args = parser.parse_args(argv)
+
+    source = Path(args.image)
+    prefix = args.output or str(source.with_suffix(""))
+    try:
+        image = load_image(source, args.format, args.base)
+        written = write_lanes(prefix, image, args.depth, args.truncate)
+    except ValueError as e:
+        parser.exit(1, f"{source}: {e}\n")
+    print(f"{prefix}[0-3].txt: {len(written)} of 4 lanes updated", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
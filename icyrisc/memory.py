@@ -0,0 +1,123 @@
+## Python model of //src/memory.sv: the four byte lanes and the memory-mapped peripherals
+#
+# 8kB at 0x00000000..0x00001FFF live in a flat bytearray (with a uint32
+# memoryview over it, word N being what the four lanes hold at index N). The
+# rest of the 32-bit space is a sparse map of word address -> peripheral
+# register; everything else reads as 0 and drops writes, like the RTL:
+#
+#   0xFFFFFFFC  leds    R/W  PWM duty of LED (byte 3), RED, GREEN, BLUE (byte 0)
+#   0xFFFFFFF8  millis  R    clock cycles since power-up / 12000 (mod 2^32)
+#   0xFFFFFFF4  micros  R    clock cycles since power-up / 12 (mod 2^32)
+#
+# Loads follow memory.sv bit for bit: funct3[1] picks a word (address bits
+# 1:0 ignored), funct3[0] a half-word (bit 0 ignored), otherwise a byte, and
+# funct3[2] zero- instead of sign-extends. The timers are functions of
+# `cycle`, which whoever drives the model (a scoreboard following the RTL, a
+# timed reference run) keeps at the number of rising clock edges before the
+# one that samples the read (the edge that ends MEM_READ). Lockstep
+# co-simulation does not keep `cycle`; CosimChecker leaves timer loads
+# unchecked and takes the RTL's value instead.
+#
+#   memory = Memory.from_memh("programs/rv32i_test")
+#   memory.load(0xFFFFFFF8, FUNCT3_WORD)          # millis
+#   Iss(memory=memory)                           # the ISS loads and stores through it
+
+from icyrisc.isa import MASK32
+from icyrisc.memimage import MEM_BYTES, read_lanes
+
+LEDS_ADDR = 0xFFFFFFFC
+MILLIS_ADDR = 0xFFFFFFF8
+MICROS_ADDR = 0xFFFFFFF4
+
+CYCLES_PER_MICRO = 12  # micros_counter wraps at 11
+CYCLES_PER_MILLI = 12_000  # millis_counter wraps at 11999
+PWM_PERIOD = 256  # the free-running 8-bit pwm_counter
+
+# PWM output -> bit offset of its duty byte in leds
+CHANNELS = {"led": 24, "red": 16, "green": 8, "blue": 0}
+
+# sparse MMIO map: word address -> Memory attribute
+PERIPHERALS = {LEDS_ADDR: "leds", MILLIS_ADDR: "millis", MICROS_ADDR: "micros"}
+
+
+class Memory:
+    """memory.sv: 8kB of byte-lane memory plus the LED / timer peripherals."""
+
+    def __init__(self, image=None, cycle=0):
+        self.mem = bytearray(MEM_BYTES)
+        if image is not None:
+            self.mem[: len(image)] = image[:MEM_BYTES]
+        self.words = memoryview(self.mem).cast("I")
+        self.leds = 0
+        self.cycle = cycle
+
+    @classmethod
+    def from_memh(cls, prefix):
+        """Builds a model from the `<prefix>0..3.txt` lanes memory.sv reads."""
+        return cls(read_lanes(prefix))
+
+    @property
+    def millis(self):
+        return (self.cycle // CYCLES_PER_MILLI) & MASK32
+
+    @property
+    def micros(self):
+        return (self.cycle // CYCLES_PER_MICRO) & MASK32
+
+    def duty(self, channel):
+        """PWM duty of an output (CHANNELS), 0..255 out of PWM_PERIOD."""
+        return (self.leds >> CHANNELS[channel]) & 0xFF
+
+    def pwm(self, cycle=None):
+        """Levels of the four PWM outputs after `cycle` clock edges (default: now)."""
+        counter = (self.cycle if cycle is None else cycle) % PWM_PERIOD
+        return {channel: counter < self.duty(channel) for channel in CHANNELS}
+
+    def read_word(self, addr):
+        """The 32-bit word a read of addr sees before width selection and extension."""
+        addr &= MASK32
+        return self.words[addr >> 2] if addr < MEM_BYTES else self.load_oob(addr)
+
+    def load_oob(self, addr):
+        """Word read outside the physical range: a peripheral register or 0."""
+        name = PERIPHERALS.get(addr & 0xFFFFFFFC)
+        return getattr(self, name) if name else 0
+
+    def load(self, addr, funct3):
+        """read_data for a load of addr with this funct3."""
+        word = self.read_word(addr)
+        unsigned = funct3 & 0b100
+        if funct3 & 0b010:
+            return word
+        if funct3 & 0b001:
+            v = (word >> ((addr & 2) << 3)) & 0xFFFF
+            return v if unsigned or v < 0x8000 else v | 0xFFFF0000
+        v = (word >> ((addr & 3) << 3)) & 0xFF
+        return v if unsigned or v < 0x80 else v | 0xFFFFFF00
+
+    def store(self, addr, data, funct3):
+        """A store of data to addr with this funct3: lane writes inside 8kB, leds at LEDS_ADDR."""
+        addr &= MASK32
+        if addr >= MEM_BYTES:
+            self.store_oob(addr, data, funct3)
+        elif funct3 & 0b010:
+            self.words[addr >> 2] = data & MASK32
+        elif funct3 & 0b001:
+            o = addr & 0x1FFE
+            self.mem[o] = data & 0xFF
+            self.mem[o + 1] = (data >> 8) & 0xFF
+        else:
+            self.mem[addr] = data & 0xFF
+
+    def store_oob(self, addr, data, funct3):
+        """Store outside the physical range: only leds is writable, the rest is dropped."""
+        if addr & 0xFFFFFFFC != LEDS_ADDR:
+            return
+        if funct3 & 0b010:
+            self.leds = data & MASK32
+        elif funct3 & 0b001:
+            shift = (addr & 2) << 3
+            self.leds = (self.leds & ~(0xFFFF << shift) & MASK32) | ((data & 0xFFFF) << shift)
+        else:
+            shift = (addr & 3) << 3
+            self.leds = (self.leds & ~(0xFF << shift) & MASK32) | ((data & 0xFF) << shift)
@@ -0,0 +1,267 @@
+## Analytic cycle model of the multicycle core
+#
+# The per-opcode cycle costs are not hard-coded: FsmModel parses the
+# next-state `always_comb` block of //src/control/fsm.sv (and the OP_* defines
+# of constants.sv), walks it from FETCH for every opcode and counts the states
+# until the FSM is back in FETCH. A program's cycle count is then just its
+# opcode histogram dotted with those costs, plus the one BRANCH cycle reset
+# leaves the FSM in:
+#
+#   python -m icyrisc.perf programs/rv32i_test               # run on the ISS and predict
+#   python -m icyrisc.perf programs/rv32i_test --clock 12e6  # and the time on the board
+#
+# validate() compares the prediction with what the RTL did, from the FSM paths
+# the RetirementMonitor records (see test_cosim.test_cycle_model).
+
+import argparse
+import re
+import sys
+from collections import Counter, namedtuple
+from pathlib import Path
+
+from icyrisc.fsm import FETCH, STATE_NAMES
+
+ROOT = Path(__file__).resolve().parent.parent
+FSM_SV = ROOT / "src" / "control" / "fsm.sv"
+CONSTANTS_SV = ROOT / "src" / "control" / "constants.sv"
+
+CLOCK_HZ = 12_000_000  # the IceBlinkPico oscillator top.sv runs from
+RESET_CYCLES = 1  # reset parks the FSM in BRANCH, one cycle before the first FETCH
+
+Prediction = namedtuple("Prediction", ["instructions", "cycles", "cpi", "by_opcode"])
+Prediction.__doc__ = """Predicted cost of a trace. by_opcode maps opcode -> (count, cycles each)."""
+
+Validation = namedtuple("Validation", ["instructions", "predicted", "measured", "mismatches"])
+Validation.__doc__ = """Prediction against the RTL. mismatches lists (pc, inst, predicted path,
+measured path) for every instruction whose FSM path differed."""
+
+TOKEN = re.compile(r"`?[A-Za-z_]\w*|\d+|\S")
+
+
+class FsmParseError(Exception):
+    """fsm.sv uses a construct the model does not understand."""
+
+
+def opcode_defines(text):
+    """The `define OP_* values of constants.sv, name -> opcode."""
+    defines = {}
+    for name, value in re.findall(r"`define\s+(OP_\w+)\s+(\S+)", text):
+        defines[name] = int(value.split("'d")[-1])
+    return defines
+
+
+def _tokens(text):
+    text = re.sub(r"//.*", "", text)
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+    return TOKEN.findall(text)
+
+
+class _Parser:
+    """Recursive descent over the statements the next-state block is written with:
+    begin/end, case/endcase with comma-separated labels, `x = y;` and `;`."""
+
+    def __init__(self, tokens, pos):
+        self.tokens = tokens
+        self.pos = pos
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self, expected=None):
+        token = self.peek()
+        if token is None or (expected is not None and token != expected):
+            raise FsmParseError(f"expected {expected or 'a token'} at token {self.pos}, found {token!r}")
+        self.pos += 1
+        return token
+
+    def statement(self):
+        token = self.peek()
+        if token == "begin":
+            self.take()
+            body = []
+            while self.peek() != "end":
+                body.append(self.statement())
+            self.take("end")
+            return ("block", body)
+        if token == "case":
+            self.take()
+            self.take("(")
+            selector = self.take()
+            self.take(")")
+            items = []
+            while self.peek() != "endcase":
+                labels = [self.take()]
+                while self.peek() == ",":
+                    self.take()
+                    labels.append(self.take())
+                self.take(":")
+                items.append((labels, self.statement()))
+            self.take("endcase")
+            return ("case", selector, items)
+        if token == ";":
+            self.take()
+            return ("block", [])
+        target = self.take()
+        if self.peek() != "=":
+            raise FsmParseError(f"unsupported statement starting with {target!r}")
+        self.take("=")
+        value = self.take()
+        self.take(";")
+        return ("assign", target, value)
+
+
+def _assigns_next_state(node):
+    kind = node[0]
+    if kind == "assign":
+        return node[1] == "next_state"
+    if kind == "block":
+        return any(_assigns_next_state(n) for n in node[1])
+    return any(_assigns_next_state(stmt) for _, stmt in node[2])
+
+
+def next_state_logic(text):
+    """The parsed body of the always_comb block that computes next_state."""
+    tokens = _tokens(text)
+    for i, token in enumerate(tokens[:-1]):
+        if token == "always_comb" and tokens[i + 1] == "begin":
+            node = _Parser(tokens, i + 1).statement()
+            if _assigns_next_state(node):
+                return node
+    raise FsmParseError("no always_comb block assigns next_state")
+
+
+class FsmModel:
+    """Per-opcode FSM paths and cycle costs derived from fsm.sv."""
+
+    def __init__(self, fsm_sv=FSM_SV, constants_sv=CONSTANTS_SV):
+        self.defines = opcode_defines(Path(constants_sv).read_text())
+        self.logic = next_state_logic(Path(fsm_sv).read_text())
+        self._paths = {}
+
+    def _value(self, label):
+        if label in STATE_NAMES:
+            return STATE_NAMES.index(label)
+        if label.startswith("`") and label[1:] in self.defines:
+            return self.defines[label[1:]]
+        raise FsmParseError(f"unknown label {label!r}")
+
+    def _run(self, node, env):
+        kind = node[0]
+        if kind == "assign":
+            if node[1] == "next_state":
+                env["next_state"] = self._value(node[2])
+        elif kind == "block":
+            for stmt in node[1]:
+                self._run(stmt, env)
+        else:
+            selector, items = env[node[1]], node[2]
+            default = None
+            for labels, stmt in items:
+                if labels == ["default"]:
+                    default = stmt
+                elif selector in (self._value(label) for label in labels):
+                    self._run(stmt, env)
+                    return
+            if default is not None:
+                self._run(default, env)
+
+    def next_state(self, state, opcode):
+        env = {"state": state, "opcode": opcode}
+        self._run(self.logic, env)
+        if "next_state" not in env:
+            raise FsmParseError(f"next_state is not assigned in state {STATE_NAMES[state]}")
+        return env["next_state"]
+
+    def path(self, opcode):
+        """The states one instruction with this opcode spends a cycle in, from FETCH."""
+        opcode &= 0x7F
+        if opcode not in self._paths:
+            path = [FETCH]
+            while True:
+                state = self.next_state(path[-1], opcode)
+                if state == FETCH:
+                    break
+                if state in path or len(path) > len(STATE_NAMES):
+                    raise FsmParseError(f"opcode {opcode} loops without returning to FETCH")
+                path.append(state)
+            self._paths[opcode] = tuple(path)
+        return self._paths[opcode]
+
+    def cycles(self, opcode):
+        return len(self.path(opcode))
+
+    def costs(self):
+        """Defined opcode name -> (path, cycles), plus "other" for the rest."""
+        table = {name: (self.path(op), self.cycles(op)) for name, op in self.defines.items()}
+        unknown = next(op for op in range(128) if op not in self.defines.values())
+        table["other"] = (self.path(unknown), self.cycles(unknown))
+        return table
+
+    def predict(self, counts, reset=True):
+        """Predicts a trace from its opcode histogram ({opcode: count})."""
+        by_opcode = {}
+        instructions = cycles = 0
+        for opcode, n in counts.items():
+            each = self.cycles(opcode)
+            by_opcode[opcode] = (n, each)
+            instructions += n
+            cycles += n * each
+        cycles += RESET_CYCLES if reset else 0
+        return Prediction(instructions, cycles, cycles / instructions if instructions else 0.0, by_opcode)
+
+    def predict_words(self, words, reset=True):
+        """Predicts a trace given as instruction words."""
+        return self.predict(Counter(w & 0x7F for w in words), reset)
+
+    def validate(self, retired):
+        """Compares the model with Retired records from the RetirementMonitor."""
+        predicted = measured = n = 0
+        mismatches = []
+        for record in retired:
+            path = self.path(record.inst)
+            predicted += len(path)
+            measured += len(record.path)
+            n += 1
+            if tuple(record.path) != path:
+                mismatches.append((record.pc, record.inst, path, tuple(record.path)))
+        return Validation(n, predicted, measured, mismatches)
+
+
+def opcode_histogram(iss, max_steps=1_000_000):
+    """Runs a model to its halt (or max_steps) and counts the opcodes it retired."""
+    counts = Counter()
+    for _ in range(max_steps):
+        counts[iss.step().inst & 0x7F] += 1
+        if iss.halted:
+            break
+    return counts
+
+
+def main(argv=None):
+    from icyrisc.iss import Iss
+
+    parser = argparse.ArgumentParser(description="Predict cycles and CPI of a program from the FSM of fsm.sv.")
+    parser.add_argument("prefix", nargs="?", help="memory file prefix, e.g. programs/rv32i_test")
+    parser.add_argument("-n", "--steps", type=int, default=1_000_000, help="maximum instructions to run")
+    parser.add_argument("--clock", type=float, default=CLOCK_HZ, help="clock in Hz for the runtime estimate")
+    parser.add_argument("--paths", action="store_true", help="print the per-opcode FSM paths")
+    args = parser.parse_args(argv)
+
+    model = FsmModel()
+    if args.paths or not args.prefix:
+        for name, (path, cycles) in model.costs().items():
+            print(f"{name:<9} {cycles}  {' -> '.join(STATE_NAMES[s] for s in path)}")
+        if not args.prefix:
+            return 0
+    names = {op: name for name, op in model.defines.items()}
+    prediction = model.predict(opcode_histogram(Iss.from_memh(args.prefix), args.steps))
+    for opcode, (n, each) in sorted(prediction.by_opcode.items(), key=lambda kv: -kv[1][0] * kv[1][1]):
+        print(f"{names.get(opcode, f'op {opcode}'):<9} {n:>10} x {each} = {n * each:>11} cycles")
+    seconds = prediction.cycles / args.clock
+    print(f"{prediction.instructions} instructions, {prediction.cycles} cycles, CPI {prediction.cpi:.3f}, "
+          f"{seconds * 1e3:.3f} ms at {args.clock / 1e6:g} MHz")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+## Vectorized NumPy references for the datapath blocks
+#
+# Each function computes, for whole arrays of inputs at once, what the RTL
+# block should produce, as uint32 bit patterns, so millions of vectors are
+# checked with a single array comparison:
+#
+#   imm_ext(immed, imm_ctrl)        ImmediateGen (immed is inst[31:7])
+#   imm_vectors(rng)                every encoding of the bits each imm_ctrl_t format reads
+#   alu(v)                          ALU: (ALU_result, ALU_comp) of a dict of port arrays
+#   alu_vectors(rng, n)             corner-value pairs for every op / select, plus n mixed ones
+#
+# The batch harnesses (src/*_batch.sv) stream vectors from a hex file and
+# write one result per line; write_hex / read_hex move arrays in and out of
+# that format without a Python loop per line.
+
+import numpy as np
+
+from icyrisc.control import (ADD, AND, BTYPE, EQUAL, GREATER, IMM, ITYPE, JTYPE, LESS, OR, PC, PC_INC, PC_OLD,
+                             RS1V, RS2V, SLL, SLT, SLTU, SRA, SRC1, SRC2, SRL, STYPE, SUB, UTYPE, XOR)
+
+IMM_FORMATS = (ITYPE, STYPE, BTYPE, UTYPE, JTYPE)
+
+# immed bits (inst[31:7] numbering) each format reads
+IMM_BITS = {
+    ITYPE: tuple(range(13, 25)),
+    STYPE: tuple(range(0, 5)) + tuple(range(18, 25)),
+    BTYPE: tuple(range(0, 5)) + tuple(range(18, 25)),
+    UTYPE: tuple(range(5, 25)),
+    JTYPE: tuple(range(5, 25)),
+}
+
+ALU_OPS = (ADD, SUB, AND, OR, XOR, SLT, SLTU, SLL, SRL, SRA, SRC1, SRC2)
+ALU_SRC1 = (PC, PC_OLD, RS1V)
+ALU_SRC2 = (RS2V, IMM, PC_INC)
+ALU_INCREMENT = 4  # the ALU's INCREMENT parameter, src2 under PC_INC
+ALU_CORNERS = (0, 1, 4, 31, 32, 0x7FFFFFFF, 0x80000000, 0xFFFFFFFF)
+ALU_DATA = ("PC", "PC_old", "rs1v", "rs2v", "imm_ext")
+ALU_PORTS = ALU_DATA + ("ALU_src1_sel", "ALU_src2_sel", "ALU_ctrl")
+
+_HEX = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+_DIGIT = np.full(256, 0xFF, dtype=np.uint8)  # ASCII -> hex digit value, 0xFF for x, z and the rest
+_DIGIT[_HEX] = np.arange(16)
+
+
+def _bits(x, hi, lo):
+    return (x >> np.uint32(lo)) & np.uint32((1 << (hi - lo + 1)) - 1)
+
+
+def _sext(x, bits):
+    """Sign extends the low `bits` bits of a uint32 array, keeping uint32 two's complement."""
+    sign = np.uint32(1 << (bits - 1))
+    return ((x ^ sign) - sign).astype(np.uint32)
+
+
+def imm_ext(immed, imm_ctrl):
+    """ImmediateGen: the sign-extended immediate of every immed (inst[31:7]) under imm_ctrl
+    (a format or an array of them)."""
+    immed = np.asarray(immed, dtype=np.uint32)
+    imm_ctrl = np.broadcast_to(np.asarray(imm_ctrl), immed.shape)
+    i = _sext(_bits(immed, 24, 13), 12)
+    s = _sext((_bits(immed, 24, 18) << np.uint32(5)) | _bits(immed, 4, 0), 12)
+    b = _sext((_bits(immed, 24, 24) << np.uint32(12)) | (_bits(immed, 0, 0) << np.uint32(11))
+              | (_bits(immed, 23, 18) << np.uint32(5)) | (_bits(immed, 4, 1) << np.uint32(1)), 13)
+    u = _bits(immed, 24, 5) << np.uint32(12)
+    j = _sext((_bits(immed, 24, 24) << np.uint32(20)) | (_bits(immed, 12, 5) << np.uint32(12))
+              | (_bits(immed, 13, 13) << np.uint32(11)) | (_bits(immed, 23, 14) << np.uint32(1)), 21)
+    conditions = [imm_ctrl == f for f in IMM_FORMATS]
+    return np.select(conditions, [i, s, b, u, j], default=0).astype(np.uint32)
+
+
+def scatter_bits(values, positions):
+    """Places bit k of every value at bit positions[k]."""
+    values = np.asarray(values, dtype=np.uint32)
+    out = np.zeros_like(values)
+    for k, position in enumerate(positions):
+        out |= ((values >> np.uint32(k)) & np.uint32(1)) << np.uint32(position)
+    return out
+
+
+def imm_vectors(rng, formats=IMM_FORMATS):
+    """(immed, imm_ctrl) arrays holding, for each format, every combination of the
+    bits it reads, with the bits it ignores random (about 2.1M vectors for all five)."""
+    immeds, ctrls = [], []
+    for f in formats:
+        positions = IMM_BITS[f]
+        used = scatter_bits(np.arange(1 << len(positions), dtype=np.uint32), positions)
+        mask = scatter_bits(np.uint32((1 << len(positions)) - 1), positions)
+        noise = rng.integers(0, 1 << 25, size=used.size, dtype=np.uint32) & ~mask & np.uint32((1 << 25) - 1)
+        immeds.append(used | noise)
+        ctrls.append(np.full(used.size, f, dtype=np.uint32))
+    return np.concatenate(immeds), np.concatenate(ctrls)
+
+
+def alu(v):
+    """ALU: (ALU_result, ALU_comp) arrays for v, a dict of ALU_PORTS arrays."""
+    v = {port: np.asarray(v[port], dtype=np.uint32) for port in ALU_PORTS}
+    src1 = np.select([v["ALU_src1_sel"] == PC, v["ALU_src1_sel"] == PC_OLD], [v["PC"], v["PC_old"]], v["rs1v"])
+    src2 = np.select([v["ALU_src2_sel"] == RS2V, v["ALU_src2_sel"] == IMM], [v["rs2v"], v["imm_ext"]],
+                     np.uint32(ALU_INCREMENT)).astype(np.uint32)
+    signed1, signed2 = src1.view(np.int32), src2.view(np.int32)
+    shift = src2 & np.uint32(31)
+    results = {
+        ADD: src1 + src2,
+        SUB: src1 - src2,
+        AND: src1 & src2,
+        OR: src1 | src2,
+        XOR: src1 ^ src2,
+        SLT: (signed1 < signed2).astype(np.uint32),
+        SLTU: (src1 < src2).astype(np.uint32),
+        SLL: src1 << shift,
+        SRL: src1 >> shift,
+        SRA: (signed1 >> shift.astype(np.int32)).view(np.uint32),
+        SRC1: src1,
+        SRC2: src2,
+    }
+    ctrl = v["ALU_ctrl"]
+    result = np.select([ctrl == op for op in results], list(results.values()), 0).astype(np.uint32)
+
+    def compare(less, equal):
+        return np.where(less, LESS, np.where(equal, EQUAL, GREATER))
+
+    comp = np.select([ctrl == SLT, ctrl == SLTU],
+                     [compare(signed1 < signed2, src1 == src2), compare(src1 < src2, src1 == src2)],
+                     GREATER).astype(np.uint32)
+    return result, comp
+
+
+def alu_vectors(rng, n):
+    """Dict of ALU_PORTS arrays: every pair of ALU_CORNERS on the selected sources
+    for every op and src1 / src2 select, then n vectors with random ops and selects
+    whose operands are a corner value, a shift amount or random bits."""
+    ops, sel1, sel2, a, b = (g.ravel() for g in np.meshgrid(ALU_OPS, ALU_SRC1, ALU_SRC2, ALU_CORNERS, ALU_CORNERS,
+                                                            indexing="ij"))
+    corners = len(ops)
+    total = corners + n
+    v = {port: rng.integers(0, 1 << 32, size=total, dtype=np.uint32) for port in ALU_DATA}
+    for port in ALU_DATA:  # mixed operands for the random part
+        kind = rng.random(n)
+        mixed = v[port][corners:]
+        mixed[kind < 0.25] = rng.choice(np.array(ALU_CORNERS, dtype=np.uint32), size=n)[kind < 0.25]
+        shifts = (kind >= 0.25) & (kind < 0.4)
+        mixed[shifts] = (mixed[shifts] & ~np.uint32(31)) | rng.integers(0, 32, size=n, dtype=np.uint32)[shifts]
+    v["ALU_src1_sel"] = np.concatenate([sel1, rng.choice(ALU_SRC1, size=n)]).astype(np.uint32)
+    v["ALU_src2_sel"] = np.concatenate([sel2, rng.choice(ALU_SRC2, size=n)]).astype(np.uint32)
+    v["ALU_ctrl"] = np.concatenate([ops, rng.choice(ALU_OPS, size=n)]).astype(np.uint32)
+    # put the corner pairs on whichever inputs the selects route through
+    index = np.arange(corners)
+    source1 = np.array(["PC", "PC_old", "rs1v"])[sel1]
+    source2 = np.array(["rs2v", "imm_ext", ""])[sel2]
+    for port in ALU_DATA:
+        v[port][index[source1 == port]] = a[source1 == port]
+        v[port][index[source2 == port]] = b[source2 == port]
+    return v
+
+
+def pack_alu(v):
+    """The rows ALU_batch.sv reads: the five data inputs, then {ctrl, src2_sel, src1_sel}."""
+    control = (v["ALU_ctrl"] << np.uint32(4)) | (v["ALU_src2_sel"] << np.uint32(2)) | v["ALU_src1_sel"]
+    return np.stack([v[port] for port in ALU_DATA] + [control], axis=1).astype(np.uint32)
+
+
+def write_hex(path, words, digits=8):
+    """Writes one zero-padded hex word per line, or for a 2-D array one row per
+    line with the words separated by spaces."""
+    words = np.asarray(words, dtype=np.uint64)
+    words = words.reshape(words.shape[0], -1)
+    shifts = np.arange(4 * (digits - 1), -1, -4, dtype=np.uint64)
+    lines = np.empty(words.shape + (digits + 1,), dtype=np.uint8)
+    lines[..., :digits] = _HEX[(words[..., None] >> shifts) & np.uint64(0xF)]
+    lines[..., digits] = ord(" ")
+    lines[:, -1, digits] = ord("\n")
+    lines.tofile(path)
+
+
+def read_hex(path, columns=1, digits=8):
+    """Reads a file of write_hex lines (as $fwrite("%h ... %h\\n") writes them). Returns
+    (words as uint32, shaped (lines,) or (lines, columns), known): known is False
+    for lines with x or z digits."""
+    raw = np.fromfile(path, dtype=np.uint8)
+    if raw.size % (columns * (digits + 1)):
+        raise ValueError(f"{path}: expected lines of {columns} words of {digits} hex digits")
+    raw = raw.reshape(-1, columns, digits + 1)[..., :digits]
+    value = _DIGIT[raw]
+    known = (value != 0xFF).all(axis=(1, 2))
+    shifts = np.arange(4 * (digits - 1), -1, -4, dtype=np.uint32)
+    words = ((value & np.uint8(0xF)).astype(np.uint32) << shifts).sum(axis=-1, dtype=np.uint64).astype(np.uint32)
+    return (words[:, 0] if columns == 1 else words), known
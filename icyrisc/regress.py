@@ -0,0 +1,335 @@
+## Parallel regression runner for the cocotb test modules
+#
+# Each test module under test/ is one shard (or, with --per-test, each of its
+# @cocotb.test() functions is). Every distinct build configuration is compiled
+# once (or reused from icyrisc.buildcache), then the shards run on a process
+# pool, each in a private test directory with its own results.xml, and the
+# results are merged into a single report. Wall time is that of the slowest
+# shard rather than the sum of all of them.
+#
+#   python -m icyrisc.regress                    # every module, one process per CPU
+#   python -m icyrisc.regress -j 4 --per-test test_rtype test_itype
+#   python -m icyrisc.regress -k load            # shards whose name contains "load"
+#   python -m icyrisc.regress --coverage         # also merge every shard's coverage.npz
+#   python -m icyrisc.regress --trace            # write tests/<shard>/retired.trace
+#   python -m icyrisc.regress --waves            # waveforms around failures, full dumps of failing shards
+#   python -m icyrisc.regress --profile          # per-test profiles in tests/<shard>/profile (icyrisc.harness.profile)
+#   python -m icyrisc.regress --sim verilator    # every module on a Verilator model (see icyrisc.simulator)
+
+import argparse
+import ast
+import os
+import random
+import shutil
+import sys
+import time
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from icyrisc.buildcache import cached_build
+from icyrisc.coverage import ENV as COVERAGE_ENV
+from icyrisc.coverage import Coverage
+from icyrisc.trace import ENV as TRACE_ENV
+from icyrisc.harness.profile import ENV as PROFILE_ENV
+from icyrisc.harness.profile import profile_modules, summary
+from icyrisc.harness.program import program_plusargs
+from icyrisc.harness.waves import ENV as WAVES_ENV
+from icyrisc.harness.waves import wave_plusargs
+from icyrisc.simulator import SIMULATORS, build_args, get_runner, sim_name, top_sources
+
+ROOT = Path(__file__).resolve().parent.parent
+TEST_DIR = ROOT / "test"
+SRC = ROOT / "src"
+
+Bench = namedtuple("Bench", ["name", "toplevel", "sources", "build_args", "defines", "timescale"])
+Bench.__doc__ = """One simulator build: the compiled snapshot every shard of its modules shares."""
+
+Shard = namedtuple("Shard", ["name", "module", "bench", "testcase", "plusargs"])
+Shard.__doc__ = """One unit of parallel work: a test module, or a single testcase of it."""
+
+ShardResult = namedtuple("ShardResult", ["shard", "results_xml", "seconds", "error"])
+
+
+def unit_bench(toplevel, *sources):
+    return Bench(toplevel, toplevel, tuple(str(SRC / s) for s in sources), (), (), ("1ns", "1ps"))
+
+
+# the full core from top.f; the program is chosen at run time (+MEM_FILE_PATH_PREFIX)
+TOP = Bench("top", "top", tuple(top_sources()), (), (), ("10ns", "1ps"))
+
+# test module -> what it is built against, matching the test_*() entry points
+# (test_all_inst only re-runs the per-class top modules and is left out)
+MODULES = {
+    "test_itype": TOP,
+    "test_rtype": TOP,
+    "test_utype": TOP,
+    "test_branch": TOP,
+    "test_jump": TOP,
+    "test_load_store": TOP,
+    "test_cosim": TOP,
+    "test_alu": unit_bench("ALU", "control/constants.sv", "ALU.sv"),
+    "test_alu_batch": unit_bench("ALU_batch", "control/constants.sv", "ALU.sv", "ALU_batch.sv"),
+    "test_ImmediateGen": unit_bench("ImmediateGen", "control/constants.sv", "ImmediateGen.sv"),
+    "test_imm_batch": unit_bench("ImmediateGen_batch", "control/constants.sv", "ImmediateGen.sv",
+                                 "ImmediateGen_batch.sv"),
+    "test_control_unit": unit_bench("control", "control/constants.sv", "control/fsm.sv", "control/control.sv"),
+    "test_inst_register": unit_bench("inst_register", "inst_register.sv"),
+    "test_program_counter": unit_bench("program_counter", "program_counter.sv"),
+}
+
+# memory image each `top` module runs with
+PROGRAMS = {"test_cosim": "rv32i_test"}
+DEFAULT_PROGRAM = "test_mem"
+
+
+def discover_tests(module):
+    """Lists the @cocotb.test() functions of test/<module>.py without importing it."""
+    tree = ast.parse((TEST_DIR / f"{module}.py").read_text())
+    names = []
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for decorator in node.decorator_list:
+            if isinstance(decorator, ast.Call):
+                decorator = decorator.func
+            if ast.unparse(decorator) == "cocotb.test":
+                names.append(node.name)
+                break
+    return names
+
+
+def plan(modules=None, per_test=False, keyword=None):
+    """Expands module names into shards, optionally one per cocotb test."""
+    shards = []
+    for module in modules or MODULES:
+        if module not in MODULES:
+            raise ValueError(f"unknown test module {module!r}, expected one of {', '.join(MODULES)}")
+        bench = MODULES[module]
+        plusargs = ()
+        if bench.toplevel == "top":
+            plusargs = tuple(program_plusargs(ROOT / "programs" / PROGRAMS.get(module, DEFAULT_PROGRAM)))
+        if per_test:
+            shards += [Shard(f"{module}.{name}", module, bench, name, plusargs) for name in discover_tests(module)]
+        else:
+            shards.append(Shard(module, module, bench, None, plusargs))
+    if keyword:
+        shards = [shard for shard in shards if keyword in shard.name]
+    return shards
+
+
+def _runner(sim):
+    # the runner hands sys.path to the simulator as PYTHONPATH, and the test
+    # modules import `constants` from test/ and `icyrisc` from the root
+    for path in (str(ROOT), str(TEST_DIR)):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    return get_runner(sim)
+
+
+def build(bench, sim="icarus", waves=False):
+    """Compiles one bench through the build cache. Returns (bench, build_dir, seconds, status).
+    waves only matters for Verilator, whose models can only dump when built with --trace."""
+    start = time.perf_counter()
+    try:
+        cached = cached_build(
+            _runner(sim),
+            sources=list(bench.sources),
+            hdl_toplevel=bench.toplevel,
+            build_args=list(bench.build_args) + build_args(sim),
+            defines=dict(bench.defines),
+            timescale=bench.timescale,
+            waves=waves and sim_name(sim) == "verilator",
+        )
+    except (Exception, SystemExit) as e:
+        return bench, None, time.perf_counter() - start, f"build failed: {e!r}"
+    return bench, cached.build_dir, time.perf_counter() - start, "cached" if cached.hit else "built"
+
+
+def run_shard(shard, build_dir, test_dir, sim="icarus", seed=None, coverage=False, trace=False, waves=None,
+              profile=False):
+    """Runs one shard against an already compiled bench in its own test_dir, with
+    coverage collected into <test_dir>/coverage.npz, retirements traced to
+    <test_dir>/retired.trace and every test profiled into <test_dir>/profile if
+    asked. waves is None, "triggered" (window files and a dump only around
+    failures) or "full" (<test_dir>/waves.vcd of everything); it only applies to
+    `top` shards."""
+    start = time.perf_counter()
+    results_xml = Path(test_dir) / "results.xml"
+    extra_env = {}
+    plusargs = list(shard.plusargs)
+    if coverage:
+        extra_env[COVERAGE_ENV] = str(Path(test_dir) / "coverage.npz")
+    if trace:
+        extra_env[TRACE_ENV] = str(Path(test_dir) / "retired.trace")
+    if waves and shard.bench.toplevel == "top":
+        extra_env[WAVES_ENV] = str(test_dir)
+        plusargs += wave_plusargs(Path(test_dir) / "waves.vcd", triggered=waves == "triggered")
+    test_module = shard.module
+    if profile:
+        extra_env[PROFILE_ENV] = str(Path(test_dir) / "profile")
+        test_module = profile_modules(shard.module)
+    error = None
+    try:
+        _runner(sim).test(
+            test_module=test_module,
+            hdl_toplevel=shard.bench.toplevel,
+            hdl_toplevel_lang="verilog",
+            testcase=shard.testcase,
+            plusargs=plusargs,
+            extra_env=extra_env,
+            seed=seed,
+            build_dir=build_dir,
+            test_dir=test_dir,
+            results_xml=str(results_xml),
+            timescale=shard.bench.timescale,
+            log_file=Path(test_dir) / "sim.log",
+        )
+    except (Exception, SystemExit) as e:
+        error = f"simulator exited: {e!r}"
+    if not results_xml.exists():
+        error = error or "no results file written"
+        results_xml = None
+    return ShardResult(shard, results_xml, time.perf_counter() - start, error)
+
+
+def failed(result):
+    """Whether a shard errored or any of its testcases failed."""
+    if result.results_xml is None:
+        return True
+    cases = list(ET.parse(result.results_xml).getroot().iter("testcase"))
+    return not cases or any(c.find("failure") is not None or c.find("error") is not None for c in cases)
+
+
+def merge_results(results, path):
+    """Merges per-shard results.xml files into one xUnit report, one testsuite per
+    shard. Shards that produced no results become a single errored testcase.
+    Returns (tests, failures)."""
+    merged = ET.Element("testsuites", name="icyrisc")
+    tests = failures = 0
+    for result in results:
+        suites = []
+        if result.results_xml is not None:
+            suites = ET.parse(result.results_xml).getroot().iter("testsuite")
+        found = False
+        for suite in suites:
+            suite.set("name", result.shard.name)
+            merged.append(suite)
+            for case in suite.iter("testcase"):
+                found = True
+                tests += 1
+                if case.find("failure") is not None or case.find("error") is not None:
+                    failures += 1
+        if not found:
+            suite = ET.SubElement(merged, "testsuite", name=result.shard.name)
+            case = ET.SubElement(suite, "testcase", name=result.shard.testcase or result.shard.module,
+                                 classname=result.shard.module, time=f"{result.seconds:.3f}")
+            ET.SubElement(case, "error", message=result.error or "no testcases ran")
+            tests += 1
+            failures += 1
+    merged.set("tests", str(tests))
+    merged.set("failures", str(failures))
+    ET.indent(merged)
+    ET.ElementTree(merged).write(path, encoding="unicode", xml_declaration=True)
+    return tests, failures
+
+
+def regress(shards, out_dir, jobs=None, sim="icarus", seed=None, coverage=False, trace=False, waves=False,
+            profile=False, log=print):
+    """Builds every bench the shards need, runs the shards in parallel and
+    writes <out_dir>/results.xml (and with coverage, the merged
+    <out_dir>/coverage.npz). With waves, failures leave window waveforms in
+    their test directory and every failing shard is re-run with the same seed
+    and a full dump into <test dir>/rerun/waves.vcd. With profile, every test
+    leaves its profile in <test dir>/profile and the time each shard spent
+    outside its tests (simulator start-up and shutdown) is logged.
+    Returns (tests, failures)."""
+    out_dir = Path(out_dir).resolve()
+    if waves and seed is None:
+        seed = random.getrandbits(31)  # fixed for the whole run so a re-run reproduces the failure
+        log(f"seed {seed}")
+    shutil.rmtree(out_dir / "tests", ignore_errors=True)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    benches = list(dict.fromkeys(shard.bench for shard in shards))
+    build_dirs = {}
+    results = []
+    with ProcessPoolExecutor(jobs) as pool:
+        broken = {}
+        for future in as_completed([pool.submit(build, b, sim, waves) for b in benches]):
+            bench, build_dir, seconds, status = future.result()
+            log(f"build {bench.name:<24} {seconds:7.1f}s {status}")
+            if build_dir is None:
+                broken[bench] = status
+            build_dirs[bench] = build_dir
+
+        futures = []
+        for shard in shards:
+            if shard.bench in broken:
+                results.append(ShardResult(shard, None, 0.0, broken[shard.bench]))
+                continue
+            test_dir = out_dir / "tests" / shard.name
+            futures.append(pool.submit(run_shard, shard, build_dirs[shard.bench], test_dir, sim, seed, coverage, trace,
+                                       "triggered" if waves else None, profile))
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            log(f"test  {result.shard.name:<24} {result.seconds:7.1f}s {result.error or 'done'}")
+            if profile:
+                in_tests = sum(t["wall_seconds"] for t in summary([out_dir / "tests" / result.shard.name / "profile"]))
+                log(f"prof  {result.shard.name:<24} {in_tests:7.1f}s in tests, "
+                    f"{result.seconds - in_tests:.1f}s start-up and shutdown")
+
+        if waves:
+            reruns = [pool.submit(run_shard, r.shard, build_dirs[r.shard.bench], out_dir / "tests" / r.shard.name / "rerun",
+                                  sim, seed, False, False, "full")
+                      for r in results if failed(r) and r.shard.bench not in broken and r.shard.bench.toplevel == "top"]
+            for future in as_completed(reruns):
+                result = future.result()
+                log(f"waves {result.shard.name:<24} {result.seconds:7.1f}s "
+                    f"{out_dir / 'tests' / result.shard.name / 'rerun' / 'waves.vcd'}")
+
+    results.sort(key=lambda r: shards.index(r.shard))
+    if coverage:
+        merged = Coverage.merge(sorted(out_dir.glob("tests/*/coverage.npz")), out_dir / "coverage.npz")
+        log(merged.report())
+    return merge_results(results, out_dir / "results.xml")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the cocotb test modules in parallel and merge their results.")
+    parser.add_argument("modules", nargs="*", help=f"test modules to run (default: all of {', '.join(MODULES)})")
+    parser.add_argument("-j", "--jobs", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--per-test", action="store_true", help="one shard per @cocotb.test() instead of per module")
+    parser.add_argument("-k", dest="keyword", help="only run shards whose name contains this")
+    parser.add_argument("-o", "--out", default=ROOT / "sim_build" / "regress", help="test and results directory")
+    parser.add_argument("--sim", default=os.getenv("SIM", "icarus"), choices=SIMULATORS)
+    parser.add_argument("--seed", type=int, help="COCOTB_RANDOM_SEED for every shard")
+    parser.add_argument("--coverage", action="store_true", help="collect FSM / instruction coverage into <out>/coverage.npz")
+    parser.add_argument("--trace", action="store_true", help="record every retirement in a binary trace per shard")
+    parser.add_argument("--waves", action="store_true",
+                        help="dump waveforms around failures and re-run failing shards with a full dump")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile every test into tests/<shard>/profile (see icyrisc.harness.profile)")
+    parser.add_argument("--list", action="store_true", help="print the shards and exit")
+    args = parser.parse_args(argv)
+
+    try:
+        shards = plan(args.modules, args.per_test, args.keyword)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.list:
+        for shard in shards:
+            print(f"{shard.name:<40} {shard.bench.name}")
+        return 0
+
+    start = time.perf_counter()
+    tests, failures = regress(shards, args.out, args.jobs, args.sim, args.seed, args.coverage, args.trace, args.waves,
+                            args.profile)
+    print(f"{tests - failures} of {tests} tests passed in {time.perf_counter() - start:.1f}s, "
+          f"report in {Path(args.out) / 'results.xml'}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
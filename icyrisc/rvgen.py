@@ -0,0 +1,337 @@
+## Seeded constrained-random RV32I program generator
+#
+#   python -m icyrisc.rvgen --seed 7 -n 400 -o sim_build/rvgen/prog
+#   python -m icyrisc.rvgen --seed 7 --count 1000 --check    # generate + run on the ISS
+#
+# Every program is a pure function of (seed, Config): it prints as assembly
+# (so a failing seed can be replayed, read and hand-edited) and assembles with
+# icyrisc.asm. Programs are legal by construction and always terminate:
+#
+#   * the random registers are set up with `li` first; s0 is reserved as the
+#     data base pointer and t6 as the loop counter, nothing else writes them;
+#   * loads and stores are naturally aligned and stay inside Config.data,
+#     which must lie in the 8kB physical window of memory.sv and above the code;
+#   * forward branches and jumps (jal, and auipc + jalr over a few skipped
+#     instructions) land at most Config.branch_distance items ahead and never
+#     into or out of a loop body;
+#   * backward branches only close counted loops
+#     (`li t6, N` / body / `addi t6, t6, -1` / `bnez t6, loop`), never nested;
+#   * the program ends on `j .`, which the ISS and CosimChecker treat as a halt.
+
+import argparse
+import random
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from icyrisc.asm import assemble, write_program
+from icyrisc.iss import Iss
+from icyrisc.memimage import MEM_BYTES
+
+Config = namedtuple(
+    "Config",
+    ["length", "mix", "dependency", "data", "branch_distance", "loop_body", "loop_iterations"],
+    defaults=(
+        300,
+        None,
+        0.5,
+        (0x1000, 0x2000),
+        16,
+        8,
+        4,
+    ),
+)
+Config.__doc__ = """Generator knobs. length is the number of random items (an item is one
+instruction, or a short group for jalr and loops); mix maps the classes in
+MIX to relative weights (None for MIX); dependency is the probability that a
+source register is one of the last few written; data is the [start, end) byte
+range loads and stores touch; branch_distance bounds forward branches in
+items; loop_body and loop_iterations bound the counted loops."""
+
+# instruction class -> default weight
+MIX = {
+    "alu": 20,
+    "alui": 20,
+    "shift": 8,
+    "upper": 4,
+    "load": 12,
+    "store": 12,
+    "branch": 10,
+    "jal": 3,
+    "jalr": 2,
+    "loop": 2,
+}
+
+CLASSES = {
+    "alu": ("add", "sub", "sll", "slt", "sltu", "xor", "srl", "sra", "or", "and"),
+    "alui": ("addi", "slti", "sltiu", "xori", "ori", "andi"),
+    "shift": ("slli", "srli", "srai"),
+    "upper": ("lui", "auipc"),
+    "load": ("lb", "lh", "lw", "lbu", "lhu"),
+    "store": ("sb", "sh", "sw"),
+    "branch": ("beq", "bne", "blt", "bge", "bltu", "bgeu"),
+}
+
+WIDTHS = {"lb": 1, "lbu": 1, "sb": 1, "lh": 2, "lhu": 2, "sh": 2, "lw": 4, "sw": 4}
+
+BASE = 8  # s0: data base pointer
+COUNTER = 31  # t6: loop counter
+POOL = tuple(r for r in range(32) if r not in (BASE, COUNTER))  # x0 included: writes to it are legal no-ops
+RECENT = 4  # how many recent destinations `dependency` picks from
+
+# operands that tend to find corner cases
+EDGE_VALUES = (0, 1, 2, 0x7FF, 0x800, 0x7FFFFFFF, 0x80000000, 0x80000001, 0xFFFFFFFF, 0xFFFFF800, 0x0000FFFF, 0xFFFF0000)
+EDGE_IMMEDIATES = (0, 1, -1, 2047, -2048, 0x555, -0x556)
+
+Program = namedtuple("Program", ["seed", "source", "image"])
+Program.__doc__ = """A generated program: its assembly source and the assembled flat image."""
+
+
+def check_config(config):
+    """Raises ValueError for knobs that cannot produce a legal program."""
+    start, end = config.data
+    if not 0 <= start < end <= MEM_BYTES:
+        raise ValueError(f"data window 0x{start:x}..0x{end:x} is outside the {MEM_BYTES}-byte memory")
+    if end - start > 4096 or start % 4 or end % 4:
+        raise ValueError("the data window must be word aligned and at most 4kB (one base register, 12-bit offsets)")
+    mix = config.mix or MIX
+    unknown = set(mix) - set(MIX)
+    if unknown:
+        raise ValueError(f"unknown instruction classes {sorted(unknown)}, expected some of {', '.join(MIX)}")
+    if not any(mix.values()):
+        raise ValueError("the instruction mix has no nonzero weight")
+    if config.branch_distance < 1 or config.loop_body < 1 or config.loop_iterations < 1:
+        raise ValueError("branch_distance, loop_body and loop_iterations must be at least 1")
+
+
+class Generator:
+    """Builds the assembly of one program from a seeded random.Random."""
+
+    def __init__(self, seed, config=None):
+        self.config = config or Config()
+        check_config(self.config)
+        self.rng = random.Random(seed)
+        mix = self.config.mix or MIX
+        self.classes = [c for c in mix if mix[c]]
+        self.weights = [mix[c] for c in self.classes]
+        start, end = self.config.data
+        self.base = start + 2048 if end - start > 2048 else start  # every offset fits in 12 signed bits
+        self.lines = []
+        self.recent = []
+        self.pending = []  # [label, items left] of open forward branches
+        self.labels = 0
+
+    def generate(self):
+        rng = self.rng
+        self.lines.append(f"    li x{BASE}, 0x{self.base:x}")
+        for reg in POOL[1:]:
+            self.lines.append(f"    li x{reg}, 0x{self._value():08x}")
+        items = 0
+        while items < self.config.length:
+            kind = rng.choices(self.classes, self.weights)[0]
+            if kind == "loop":
+                items += self._loop(min(self.config.loop_body, max(1, self.config.length - items)))
+            else:
+                self._item(kind)
+                items += 1
+        self._close_all()
+        self.lines.append("halt:")
+        self.lines.append("    j halt")
+        return "\n".join(self.lines) + "\n"
+
+    # items
+
+    def _item(self, kind):
+        if kind == "loop":
+            kind = "alu"  # no nested loops
+        getattr(self, f"_{kind}")()
+        self._tick()
+
+    def _loop(self, max_body):
+        rng = self.rng
+        self._close_all()
+        label = self._label()
+        body = rng.randint(1, max_body)
+        self.lines.append(f"    li x{COUNTER}, {rng.randint(1, self.config.loop_iterations)}")
+        self.lines.append(f"{label}:")
+        for _ in range(body):
+            self._item(rng.choices(self.classes, self.weights)[0])
+        self._close_all()
+        self.lines.append(f"    addi x{COUNTER}, x{COUNTER}, -1")
+        self.lines.append(f"    bnez x{COUNTER}, {label}")
+        return body
+
+    def _alu(self):
+        op = self.rng.choice(CLASSES["alu"])
+        self._emit(op, self._dest(), self._src(), self._src())
+
+    def _alui(self):
+        op = self.rng.choice(CLASSES["alui"])
+        self._emit(op, self._dest(), self._src(), self._imm())
+
+    def _shift(self):
+        op = self.rng.choice(CLASSES["shift"])
+        shamt = self.rng.choice((0, 1, 31, self.rng.randrange(32)))
+        self._emit(op, self._dest(), self._src(), shamt)
+
+    def _upper(self):
+        op = self.rng.choice(CLASSES["upper"])
+        self._emit(op, self._dest(), f"0x{self.rng.getrandbits(20):x}")
+
+    def _load(self):
+        op = self.rng.choice(CLASSES["load"])
+        self.lines.append(f"    {op} {self._dest()}, {self._offset(op)}(x{BASE})")
+
+    def _store(self):
+        op = self.rng.choice(CLASSES["store"])
+        self.lines.append(f"    {op} {self._src()}, {self._offset(op)}(x{BASE})")
+
+    def _branch(self):
+        op = self.rng.choice(CLASSES["branch"])
+        self._emit(op, self._src(), self._src(), self._forward())
+
+    def _jal(self):
+        self._emit("jal", self._dest(), self._forward())
+
+    def _jalr(self):
+        # auipc + jalr over `skip` instructions that never execute
+        rng = self.rng
+        link = rng.choice(POOL[1:])
+        skip = rng.randint(0, 3)
+        self._emit("auipc", f"x{link}", 0)
+        self.lines.append(f"    jalr {self._dest()}, {8 + 4 * skip}(x{link})")
+        self._written(link)
+        for _ in range(skip):
+            self._alu()
+
+    # operands
+
+    def _dest(self):
+        reg = self.rng.choice(POOL)
+        self._written(reg)
+        return f"x{reg}"
+
+    def _written(self, reg):
+        self.recent.append(reg)
+        del self.recent[:-RECENT]
+
+    def _src(self):
+        if self.recent and self.rng.random() < self.config.dependency:
+            return f"x{self.rng.choice(self.recent)}"
+        return f"x{self.rng.choice(POOL)}"
+
+    def _value(self):
+        rng = self.rng
+        return rng.choice(EDGE_VALUES) if rng.random() < 0.25 else rng.getrandbits(32)
+
+    def _imm(self):
+        rng = self.rng
+        return rng.choice(EDGE_IMMEDIATES) if rng.random() < 0.25 else rng.randint(-2048, 2047)
+
+    def _offset(self, op):
+        start, end = self.config.data
+        width = WIDTHS[op]
+        return self.rng.randrange(start, end - width + 1, width) - self.base
+
+    # forward labels
+
+    def _label(self):
+        self.labels += 1
+        return f"L{self.labels}"
+
+    def _forward(self):
+        label = self._label()
+        self.pending.append([label, self.rng.randint(1, self.config.branch_distance)])
+        return label
+
+    def _tick(self):
+        """Counts one item off every open forward branch and places the labels that are due."""
+        due = []
+        for entry in self.pending:
+            entry[1] -= 1
+            if entry[1] <= 0:
+                due.append(entry)
+        for entry in due:
+            self.pending.remove(entry)
+            self.lines.append(f"{entry[0]}:")
+
+    def _close_all(self):
+        # loop boundaries: nothing jumps across them
+        for label, _ in self.pending:
+            self.lines.append(f"{label}:")
+        self.pending = []
+
+    def _emit(self, op, *operands):
+        self.lines.append(f"    {op} " + ", ".join(str(o) for o in operands))
+
+
+def generate(seed, config=None):
+    """The assembly source of the program for seed."""
+    return Generator(seed, config).generate()
+
+
+def generate_program(seed, config=None):
+    """Generates and assembles one program."""
+    config = config or Config()
+    source = generate(seed, config)
+    image = assemble(source).image
+    if len(image) > config.data[0]:
+        raise ValueError(f"seed {seed}: {len(image)} bytes of code overlap the data window at 0x{config.data[0]:x}; "
+                         f"lower Config.length or move the window up")
+    return Program(seed, source, image)
+
+
+def programs(seed, count, config=None):
+    """Programs seed, seed + 1, ..., so any one of them can be regenerated alone."""
+    for i in range(count):
+        yield generate_program(seed + i, config)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate seeded constrained-random RV32I programs.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("-n", "--length", type=int, default=Config().length, help="random items per program")
+    parser.add_argument("--count", type=int, default=1, help="programs to generate (seeds seed .. seed+count-1)")
+    parser.add_argument("--dependency", type=float, default=Config().dependency)
+    parser.add_argument("--data", type=lambda s: tuple(int(v, 0) for v in s.split(":")), default=Config().data,
+                        help="load / store window as start:end (default 0x1000:0x2000)")
+    parser.add_argument("--mix", help="class weights as alu=20,load=5,... (unlisted classes keep their default)")
+    parser.add_argument("-o", "--out", help="write <out>.s and the <out>0..3.txt lanes (with --count, <out>_<seed>)")
+    parser.add_argument("--check", action="store_true", help="run every program on the ISS and report the rate")
+    args = parser.parse_args(argv)
+
+    mix = dict(MIX)
+    for item in filter(None, (args.mix or "").split(",")):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = int(weight)
+    config = Config(length=args.length, mix=mix, dependency=args.dependency, data=args.data)
+    try:
+        check_config(config)
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    retired = 0
+    for program in programs(args.seed, args.count, config):
+        if args.out:
+            prefix = Path(args.out if args.count == 1 else f"{args.out}_{program.seed}")
+            prefix.parent.mkdir(parents=True, exist_ok=True)
+            prefix.with_suffix(".s").write_text(program.source)
+            write_program(assemble(program.source), prefix)
+        elif not args.check:
+            sys.stdout.write(program.source)
+        if args.check:
+            iss = Iss(program.image)
+            retired += iss.run()
+            if not iss.halted:
+                print(f"seed {program.seed}: did not halt", file=sys.stderr)
+                return 1
+    if args.check:
+        elapsed = time.perf_counter() - start
+        print(f"{args.count} programs, {retired} instructions retired in {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
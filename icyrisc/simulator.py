@@ -0,0 +1,55 @@
+## Simulator selection and per-simulator build settings
+#
+# Every runner in the suite goes through here, so the whole cocotb suite runs
+# on either simulator from the same test modules:
+#
+#   SIM=icarus    make test        # the default
+#   SIM=verilator make test        # compiled model, 2 threads, no tracing
+#
+# `top` is built from the file list in top.f, resolved here into plain source
+# paths instead of being handed to the simulator as an iverilog -c/-f command
+# file. Verilator models are built with --threads (ICYRISC_VERILATOR_THREADS,
+# default 2) and without --trace unless the build asks for waves; lint warnings
+# are reported but not fatal, as iverilog does not lint at all.
+
+import os
+from pathlib import Path
+
+from icyrisc.buildcache import command_file_sources
+
+ROOT = Path(__file__).resolve().parent.parent
+TOP_F = ROOT / "top.f"
+
+DEFAULT = "icarus"
+SIMULATORS = ("icarus", "verilator")
+THREADS_ENV = "ICYRISC_VERILATOR_THREADS"
+
+
+def sim_name(sim=None):
+    """The simulator to use: sim, else $SIM, else icarus."""
+    sim = (sim or os.getenv("SIM") or DEFAULT).lower()
+    if sim not in SIMULATORS:
+        raise ValueError(f"unsupported simulator {sim!r}, expected one of {', '.join(SIMULATORS)}")
+    return sim
+
+
+def get_runner(sim=None):
+    """A cocotb_tools runner for sim_name(sim), with $PROJ_ROOT set for top.f."""
+    os.environ.setdefault("PROJ_ROOT", str(ROOT))
+    from cocotb_tools.runner import get_runner as _get_runner
+
+    return _get_runner(sim_name(sim))
+
+
+def top_sources():
+    """The `top` sources listed in top.f, in compile order."""
+    os.environ.setdefault("PROJ_ROOT", str(ROOT))
+    return [str(path) for path in command_file_sources(TOP_F)]
+
+
+def build_args(sim=None):
+    """Simulator-specific build arguments the suite always passes."""
+    if sim_name(sim) == "verilator":
+        threads = int(os.getenv(THREADS_ENV, 2))
+        return ["--threads", str(threads), "-Wno-fatal"]
+    return []
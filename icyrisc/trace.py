@@ -0,0 +1,251 @@
+## Binary retirement traces
+#
+# A trace is a 16-byte header followed by fixed 32-byte little-endian records,
+# one per retired instruction:
+#
+#   cycle u64 | pc u32 | inst u32 | next_pc u32 | rd_value u32 | mem_addr u32 | mem_data u32
+#
+# rd, the load / store width and whether there is a memory access at all
+# follow from inst, so they are not stored; rd_value is 0 when nothing was
+# written and mem_data is the loaded (extended) value for loads and the
+# register written for stores. TraceWriter packs records into a reusable
+# buffer and writes it out in large blocks; read() maps the file as a NumPy
+# structured array without copying it, so multi-GB traces open instantly:
+#
+#   with TraceWriter("run.trace") as trace:
+#       monitor.add_callback(trace.retired)
+#   t = read("run.trace"); t["pc"][t["inst"] & 0x7f == 0x63]
+#
+#   python -m icyrisc.trace run.trace              # summary
+#   python -m icyrisc.trace run.trace --dump 20    # the first records
+#   python -m icyrisc.trace rtl.trace --diff iss.trace
+#
+# Setting ICYRISC_TRACE=<path> makes every RetirementMonitor in the simulator
+# process append to one session trace at <path>.
+
+import argparse
+import atexit
+import os
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from icyrisc.isa import MASK32, OP_LOAD, OP_STYPE, imm_i, writes_rd
+
+ENV = "ICYRISC_TRACE"
+
+MAGIC = b"ICYTRACE"
+VERSION = 1
+HEADER = struct.Struct("<8sII")  # magic, version, record size
+
+RECORD = np.dtype([
+    ("cycle", "<u8"),
+    ("pc", "<u4"),
+    ("inst", "<u4"),
+    ("next_pc", "<u4"),
+    ("rd_value", "<u4"),
+    ("mem_addr", "<u4"),
+    ("mem_data", "<u4"),
+])
+_PACK = struct.Struct("<Q6I")
+assert _PACK.size == RECORD.itemsize == 32
+
+# fields compared by diff(), in report order
+COMPARED = ("pc", "inst", "next_pc", "rd_value", "mem_addr", "mem_data")
+
+
+class TraceError(Exception):
+    """The file is not a trace this version can read."""
+
+
+class TraceWriter:
+    """Appends records to a trace file, `buffer_records` at a time."""
+
+    def __init__(self, path, buffer_records=1 << 16):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.itemsize))
+        self._buffer = bytearray(buffer_records * RECORD.itemsize)
+        self._offset = 0
+        self.records = 0
+
+    def write(self, cycle, pc, inst, next_pc, rd_value=0, mem_addr=0, mem_data=0):
+        _PACK.pack_into(self._buffer, self._offset, cycle, pc, inst, next_pc, rd_value, mem_addr, mem_data)
+        self._offset += RECORD.itemsize
+        self.records += 1
+        if self._offset == len(self._buffer):
+            self._drain()
+
+    def retired(self, record):
+        """RetirementMonitor callback."""
+        mem_addr = mem_data = 0
+        if record.store is not None:
+            mem_addr, mem_data = record.store[0], record.store[1]
+        elif record.load is not None:
+            mem_addr, mem_data = record.load, record.rd_value or 0
+        self.write(record.cycle, record.pc, record.inst, record.next_pc, record.rd_value or 0, mem_addr, mem_data)
+
+    def step(self, result, cycle=0, load=None):
+        """Writes an icyrisc.iss StepResult; load is the address a load read."""
+        mem_addr = mem_data = 0
+        if result.store is not None:
+            mem_addr, mem_data = result.store[0], result.store[1]
+        elif load is not None:
+            mem_addr, mem_data = load, result.rd_value or 0
+        self.write(cycle, result.pc, result.inst, result.next_pc, result.rd_value or 0, mem_addr, mem_data)
+
+    def _drain(self):
+        self._file.write(memoryview(self._buffer)[: self._offset])
+        self._offset = 0
+
+    def flush(self):
+        """Writes the buffered records so read() sees them."""
+        if not self._file.closed:
+            self._drain()
+            self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def record_model(iss, writer, max_steps=1_000_000, cycles=None):
+    """Runs a model to its halt (or max_steps) writing one record per instruction.
+    cycles, e.g. icyrisc.perf.FsmModel().cycles, turns opcodes into cycle stamps.
+    Returns the number of records written."""
+    cycle = n = 0
+    for _ in range(max_steps):
+        inst = iss.fetch(iss.pc)
+        load = None
+        if inst & 0x7F == OP_LOAD:
+            load = (iss.regs[(inst >> 15) & 0x1F] + imm_i(inst)) & MASK32
+        if cycles is not None:
+            cycle += cycles(inst)
+        writer.step(iss.step(), cycle, load)
+        n += 1
+        if iss.halted:
+            break
+    return n
+
+
+def read(path):
+    """Maps a trace as a read-only structured array (dtype RECORD) without copying it."""
+    path = Path(path)
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise TraceError(f"{path}: too short for a trace header")
+    magic, version, size = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or size != RECORD.itemsize:
+        raise TraceError(f"{path}: not an icyrisc v{VERSION} trace")
+    count = (path.stat().st_size - HEADER.size) // RECORD.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=RECORD)
+    return np.memmap(path, dtype=RECORD, mode="r", offset=HEADER.size, shape=(count,))
+
+
+def opcodes(trace):
+    return trace["inst"] & 0x7F
+
+
+def rd(trace):
+    """Destination register per record, -1 where nothing is written."""
+    inst = trace["inst"]
+    written = np.isin(inst & 0x7F, [op for op in range(128) if writes_rd(op)])
+    return np.where(written, (inst >> 7) & 0x1F, -1).astype(np.int8)
+
+
+def stores(trace):
+    return opcodes(trace) == OP_STYPE
+
+
+def loads(trace):
+    return opcodes(trace) == OP_LOAD
+
+
+def opcode_histogram(trace):
+    """{opcode: count}, ready for icyrisc.perf.FsmModel.predict()."""
+    counts = np.bincount(opcodes(trace), minlength=128)
+    return {op: int(n) for op, n in enumerate(counts) if n}
+
+
+def diff(a, b, fields=COMPARED):
+    """Index of the first record where the traces differ in `fields` (cycle is
+    ignored), len of the shorter one if one is a prefix of the other, or None."""
+    n = min(len(a), len(b))
+    differs = np.zeros(n, dtype=bool)
+    for field in fields:
+        differs |= a[field][:n] != b[field][:n]
+    hits = np.flatnonzero(differs)
+    if len(hits):
+        return int(hits[0])
+    return None if len(a) == len(b) else n
+
+
+def format_record(r):
+    text = f"{int(r['cycle']):>10}  {int(r['pc']):08x}: {int(r['inst']):08x} -> {int(r['next_pc']):08x}"
+    op = int(r["inst"]) & 0x7F
+    if writes_rd(op) and (int(r["inst"]) >> 7) & 0x1F:
+        text += f"  x{(int(r['inst']) >> 7) & 0x1F} = {int(r['rd_value']):08x}"
+    if op == OP_STYPE:
+        text += f"  [{int(r['mem_addr']):08x}] <= {int(r['mem_data']):08x}"
+    elif op == OP_LOAD:
+        text += f"  [{int(r['mem_addr']):08x}]"
+    return text
+
+
+_session = None
+
+
+def session_trace():
+    """The process-wide writer for $ICYRISC_TRACE, or None when it is unset."""
+    global _session
+    if _session is None and os.getenv(ENV):
+        _session = TraceWriter(os.environ[ENV])
+        atexit.register(_session.close)
+    return _session
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise, print or compare retirement traces.")
+    parser.add_argument("trace", type=Path)
+    parser.add_argument("--dump", type=int, metavar="N", help="print the first N records")
+    parser.add_argument("--diff", type=Path, metavar="OTHER", help="report the first record that differs from OTHER")
+    args = parser.parse_args(argv)
+
+    try:
+        trace = read(args.trace)
+        other = read(args.diff) if args.diff else None
+    except TraceError as e:
+        parser.error(str(e))
+    if args.dump:
+        for r in trace[: args.dump]:
+            print(format_record(r))
+    if other is not None:
+        index = diff(trace, other)
+        if index is None:
+            print(f"traces match ({len(trace)} records)")
+            return 0
+        print(f"first difference at record {index}:")
+        for name, t in ((args.trace, trace), (args.diff, other)):
+            print(f"  {name}: " + (format_record(t[index]) if index < len(t) else "<end of trace>"))
+        return 1
+    if not args.dump:
+        cycles = int(trace["cycle"][-1] - trace["cycle"][0]) if len(trace) > 1 else 0
+        print(f"{len(trace)} records, {int(stores(trace).sum())} stores, {int(loads(trace).sum())} loads, "
+              f"{cycles} cycles between the first and last")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
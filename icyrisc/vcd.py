@@ -0,0 +1,441 @@
+## Streaming VCD reader and waveform queries
+#
+# Vcd reads only the header when opened; the value changes are streamed with
+# generators that track just the signals a query names, so memory stays
+# bounded however large the dump is. index() makes one pass that records the
+# byte offset of a timestamp every `step` bytes together with a snapshot of
+# every signal up to 64 bits wide, and saves it next to the dump, so later
+# queries can start at any time without re-reading what comes before it.
+#
+#   vcd = Vcd("build/top.vcd")
+#   state_cycles(vcd)                                     # Counter of cycles per FSM state
+#   first(vcd, reg_wren=1, wd_reg=5)                      # time reg_wren first fired with rd = x5
+#   list(pulses(vcd, "mem_wren"))                         # every cycle mem_wren was high
+#   vcd.values_at(120_000, "pc", "inst")
+#
+#   python -m icyrisc.vcd build/top.vcd states
+#   python -m icyrisc.vcd build/top.vcd first reg_wren=1 wd_reg=5
+#   python -m icyrisc.vcd build/top.vcd pulses mem_wren --limit 20
+#
+# Signals are named by any dotted suffix of their full path ("f0.state",
+# "reg0.wd_reg", "clk"). FST dumps are read through gtkwave's fst2vcd, which
+# streams the converted text into the same parser.
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import Counter, namedtuple
+from pathlib import Path
+
+import numpy as np
+
+from icyrisc.fsm import STATE_NAMES
+
+Var = namedtuple("Var", ["code", "name", "width", "kind"])
+Var.__doc__ = """One dumped signal: its identifier code, full dotted name, bit width and
+VCD var type. Several names can share a code (ports connected to the same net)."""
+
+INDEX_STEP = 16 << 20  # bytes between index checkpoints
+INDEX_VERSION = 1
+
+_SCALAR = frozenset(b"01xzXZ")
+
+
+class VcdError(Exception):
+    """Malformed dump, or a signal name that matches nothing (or too much)."""
+
+
+def _value(text):
+    """A VCD value as an int, or None if any bit is x or z."""
+    if text in ("0", "1"):
+        return int(text)
+    try:
+        return int(text, 2)
+    except ValueError:
+        return None
+
+
+class Vcd:
+    """A VCD file; see the module comment."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.fst = self.path.suffix == ".fst"
+        self.vars = {}  # full name -> Var
+        self.codes = {}  # code -> [Var]
+        self.timescale = None
+        self.body = 0  # byte offset of the first value change
+        self._index = None
+        self._read_header()
+
+    # header
+
+    def _open(self):
+        if self.fst:
+            proc = subprocess.Popen(["fst2vcd", str(self.path)], stdout=subprocess.PIPE)
+            return proc.stdout
+        return open(self.path, "rb")
+
+    def _read_header(self):
+        scope = []
+        with self._open() as f:
+            tokens = []
+            offset = 0
+            for line in f:
+                offset += len(line)
+                tokens += line.split()
+                while b"$end" in tokens:
+                    end = tokens.index(b"$end")
+                    keyword, body = tokens[0], tokens[1:end]
+                    tokens = tokens[end + 1:]
+                    if keyword == b"$scope":
+                        scope.append(body[1].decode())
+                    elif keyword == b"$upscope":
+                        scope.pop()
+                    elif keyword == b"$timescale":
+                        self.timescale = b"".join(body).decode()
+                    elif keyword == b"$var":
+                        kind, width, code, name = body[0].decode(), int(body[1]), body[2].decode(), body[3].decode()
+                        var = Var(code, ".".join(scope + [name]), width, kind)
+                        self.vars[var.name] = var
+                        self.codes.setdefault(code, []).append(var)
+                    elif keyword == b"$enddefinitions":
+                        self.body = offset
+                        return
+        raise VcdError(f"{self.path}: no $enddefinitions")
+
+    def find(self, name):
+        """The Var whose full name is `name` or ends with `.name`."""
+        if name in self.vars:
+            return self.vars[name]
+        matches = [v for full, v in self.vars.items() if full.endswith("." + name)]
+        if not matches:
+            raise VcdError(f"no signal matches {name!r}")
+        codes = {v.code for v in matches}
+        if len(codes) > 1:
+            # the shortest path wins when it is unambiguous (top_tb.u0.clk over a port alias)
+            matches.sort(key=lambda v: v.name.count("."))
+            if matches[0].name.count(".") == matches[1].name.count("."):
+                raise VcdError(f"{name!r} is ambiguous: {', '.join(v.name for v in matches[:5])}")
+        return matches[0]
+
+    # streaming
+
+    def changes(self, *names, start=0, end=None):
+        """Yields (time, name, value) for every change of the named signals (value
+        None for x/z), starting with the values they had before `start`."""
+        for time, name, value in self._changes(names, start, end):
+            yield (start if time is None else time), name, value
+
+    def _changes(self, names, start, end):
+        # like changes(), but the values from before start come with time None
+        wanted = {}
+        for name in names:
+            wanted.setdefault(self.find(name).code, []).append(name)
+        state, offset, time = self._seek(start, wanted)
+        pending = True
+        for time, code, value in self._scan(offset, set(wanted), time):
+            if time < start:
+                state[code] = value
+                continue
+            if pending:
+                yield from self._initial(state, wanted)
+                pending = False
+            if end is not None and time > end:
+                return
+            for name in wanted[code]:
+                yield time, name, value
+        if pending:
+            yield from self._initial(state, wanted)
+
+    @staticmethod
+    def _initial(state, wanted):
+        for code, value in state.items():
+            for name in wanted[code]:
+                yield None, name, value
+
+    def _scan(self, offset, codes, time=0):
+        """Raw (time, code, value) changes of `codes` from a byte offset."""
+        with self._open() as f:
+            self._seek_stream(f, offset)
+            for line in f:
+                head = line[0]
+                if head == 35:  # '#'
+                    time = int(line[1:])
+                elif head in _SCALAR:
+                    code = line[1:].strip().decode()
+                    if code in codes:
+                        yield time, code, _value(chr(head)) if head in b"01" else None
+                elif head in b"bBrR":
+                    value, _, code = line[1:].partition(b" ")
+                    code = code.strip().decode()
+                    if code in codes:
+                        yield time, code, _value(value.decode()) if head in b"bB" else float(value)
+
+    def _seek_stream(self, f, offset):
+        if not self.fst:
+            f.seek(offset)
+            return
+        # fst2vcd writes to a pipe, which cannot seek: read up to the offset
+        while offset > 0:
+            chunk = f.read(min(offset, 1 << 20))
+            if not chunk:
+                break
+            offset -= len(chunk)
+
+    def values_at(self, time, *names):
+        """{name: value} of the named signals at `time` (after its changes)."""
+        values = {}
+        for t, name, value in self.changes(*names, start=time, end=time):
+            values[name] = value
+        return values
+
+    # index
+
+    def index(self, step=INDEX_STEP, rebuild=False):
+        """Loads (or builds and saves) the seek index: checkpoint times, byte offsets
+        and a snapshot of every signal up to 64 bits wide at each checkpoint."""
+        if self._index is not None and not rebuild:
+            return self._index
+        sidecar = self.path.with_name(self.path.name + ".idx.npz")
+        stat = self.path.stat()
+        if sidecar.exists() and not rebuild:
+            with np.load(sidecar) as data:
+                if (int(data["version"]) == INDEX_VERSION and int(data["size"]) == stat.st_size
+                        and int(data["mtime"]) == stat.st_mtime_ns and int(data["step"]) == step):
+                    self._index = {k: data[k] for k in data.files}
+                    return self._index
+        self._index = self._build_index(step)
+        try:
+            with open(sidecar, "wb") as f:
+                np.savez(f, version=INDEX_VERSION, size=stat.st_size, mtime=stat.st_mtime_ns, step=step,
+                         **self._index)
+        except OSError:
+            pass  # read-only directory: keep it in memory
+        return self._index
+
+    def _build_index(self, step):
+        codes = sorted(c for c, vs in self.codes.items() if vs[0].width <= 64 and vs[0].kind != "real")
+        column = {c: i for i, c in enumerate(codes)}
+        current = np.zeros(len(codes), dtype=np.uint64)
+        known = np.zeros(len(codes), dtype=bool)
+        times, offsets, snapshots, masks = [], [], [], []
+        next_mark = self.body
+        offset = self.body
+        with self._open() as f:
+            self._seek_stream(f, offset)
+            for line in f:
+                head = line[0]
+                if head == 35:
+                    if offset >= next_mark:
+                        times.append(int(line[1:]))
+                        offsets.append(offset)
+                        snapshots.append(current.copy())
+                        masks.append(known.copy())
+                        next_mark = offset + step
+                elif head in _SCALAR or head in b"bB":
+                    if head in _SCALAR:
+                        code, value = line[1:].strip().decode(), chr(head)
+                    else:
+                        text, _, code = line[1:].partition(b" ")
+                        code, value = code.strip().decode(), text.decode()
+                    i = column.get(code)
+                    if i is not None:
+                        v = _value(value)
+                        known[i] = v is not None
+                        current[i] = v or 0
+                offset += len(line)
+        shape = (len(times), len(codes))
+        return {
+            "codes": np.array(codes, dtype=object).astype(str),
+            "times": np.array(times, dtype=np.uint64),
+            "offsets": np.array(offsets, dtype=np.uint64),
+            "values": np.array(snapshots, dtype=np.uint64).reshape(shape),
+            "known": np.array(masks, dtype=bool).reshape(shape),
+        }
+
+    def _seek(self, start, wanted):
+        """Values of `wanted` codes at the last checkpoint before start, and where to scan from."""
+        if start <= 0 or self._index is None or not len(self._index["times"]):
+            return {}, self.body, 0
+        idx = self._index
+        i = int(np.searchsorted(idx["times"], start, side="left")) - 1
+        if i < 0:
+            return {}, self.body, 0
+        column = {c: j for j, c in enumerate(idx["codes"].tolist())}
+        state = {}
+        for code in wanted:
+            j = column.get(code)
+            if j is None:
+                return {}, self.body, 0  # not snapshotted (wide or real): scan from the start
+            state[code] = int(idx["values"][i, j]) if idx["known"][i, j] else None
+        return state, int(idx["offsets"][i]), int(idx["times"][i])
+
+
+class VcdWriter:
+    """Writes a VCD of the given signals (dotted name -> width) under one scope,
+    for waveforms assembled outside the simulator."""
+
+    def __init__(self, path, signals, timescale="1ps", scope="top"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "w")
+        self._codes = {}
+        self._widths = dict(signals)
+        self._last = {}
+        self._time = None
+        out = [f"$timescale {timescale} $end\n", f"$scope module {scope} $end\n"]
+        for i, (name, width) in enumerate(self._widths.items()):
+            code = self._codes[name] = _code(i)
+            *scopes, leaf = name.split(".")
+            # one scope per signal keeps the writer simple; viewers merge them
+            out += [f"$scope module {s} $end\n" for s in scopes]
+            out.append(f"$var wire {width} {code} {leaf} $end\n")
+            out += ["$upscope $end\n"] * len(scopes)
+        out.append("$upscope $end\n$enddefinitions $end\n")
+        self._file.write("".join(out))
+
+    def change(self, time, name, bits):
+        """Records a value at time (non-decreasing); bits is a binary string (x/z allowed)
+        or an int. Unchanged values are not written."""
+        if not isinstance(bits, str):
+            bits = format(bits, f"0{self._widths[name]}b")
+        if self._last.get(name) == bits:
+            return
+        self._last[name] = bits
+        if time != self._time:
+            self._file.write(f"#{time}\n")
+            self._time = time
+        code = self._codes[name]
+        self._file.write(f"{bits}{code}\n" if self._widths[name] == 1 else f"b{bits} {code}\n")
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _code(i):
+    # VCD identifier codes are strings over the printable characters ! .. ~
+    code = ""
+    while True:
+        code += chr(33 + i % 94)
+        i //= 94
+        if not i:
+            return code
+
+
+def sample(vcd, clock, *names, start=0, end=None):
+    """Yields (time, {name: value}) at every rising edge of clock with the values
+    the flops see there: the signals as they were just before that timestamp."""
+    settled = dict.fromkeys(names)
+    current = dict.fromkeys(names)
+    clk = None
+    last_time = None
+    for time, name, value in vcd._changes((clock,) + names, start, end):
+        if time is None:
+            if name == clock:
+                clk = value
+            if name in current:
+                current[name] = settled[name] = value
+            continue
+        if time != last_time:
+            settled.update(current)
+            last_time = time
+        if name == clock:
+            if clk == 0 and value == 1:
+                yield time, dict(settled)
+            clk = value
+        if name in current:
+            current[name] = value
+
+
+def first(vcd, clock="clk", start=0, **conditions):
+    """Time of the first rising edge where every signal equals its value, or None."""
+    for time, values in sample(vcd, clock, *conditions, start=start):
+        if all(values[name] == want for name, want in conditions.items()):
+            return time
+    return None
+
+
+def pulses(vcd, signal, clock="clk", start=0, end=None):
+    """Times of every rising edge at which signal is high."""
+    for time, values in sample(vcd, clock, signal, start=start, end=end):
+        if values[signal]:
+            yield time
+
+
+def state_cycles(vcd, state="f0.state", clock="clk", start=0, end=None):
+    """Counter of clock cycles spent in each FSM state, by name."""
+    counts = Counter()
+    for _, values in sample(vcd, clock, state, start=start, end=end):
+        s = values[state]
+        counts[STATE_NAMES[s] if s is not None and s < len(STATE_NAMES) else str(s)] += 1
+    return counts
+
+
+def _condition(text):
+    name, _, value = text.partition("=")
+    if not value:
+        raise argparse.ArgumentTypeError(f"expected signal=value, got {text!r}")
+    return name, int(value, 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query a VCD dump without opening gtkwave.")
+    parser.add_argument("dump", type=Path)
+    parser.add_argument("--clock", default="clk")
+    parser.add_argument("--start", type=int, default=0, help="first timestamp to look at")
+    parser.add_argument("--index", action="store_true", help="build / use the seek index (worth it for large dumps)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    find = sub.add_parser("list", help="list signals whose name contains a pattern")
+    find.add_argument("pattern", nargs="?", default="")
+    sub.add_parser("states", help="clock cycles spent in each FSM state")
+    first_cmd = sub.add_parser("first", help="first rising edge where all signal=value conditions hold")
+    first_cmd.add_argument("conditions", nargs="+", type=_condition)
+    pulse = sub.add_parser("pulses", help="rising edges at which a signal is high")
+    pulse.add_argument("signal")
+    pulse.add_argument("--limit", type=int, default=0)
+    value = sub.add_parser("at", help="values of signals at a time")
+    value.add_argument("time", type=int)
+    value.add_argument("signals", nargs="+")
+    args = parser.parse_args(argv)
+
+    try:
+        vcd = Vcd(args.dump)
+        if args.index:
+            vcd.index()
+        if args.command == "list":
+            for name, var in vcd.vars.items():
+                if re.search(args.pattern, name):
+                    print(f"{name:<50} {var.width:>3} {var.kind}")
+        elif args.command == "states":
+            counts = state_cycles(vcd, clock=args.clock, start=args.start)
+            total = sum(counts.values()) or 1
+            for name, n in counts.most_common():
+                print(f"{name:<16} {n:>10} {100 * n / total:5.1f}%")
+        elif args.command == "first":
+            time = first(vcd, args.clock, args.start, **dict(args.conditions))
+            print("never" if time is None else time)
+        elif args.command == "pulses":
+            for n, time in enumerate(pulses(vcd, args.signal, args.clock, args.start), 1):
+                print(time)
+                if n == args.limit:
+                    break
+        else:
+            for name, v in vcd.values_at(args.time, *args.signals).items():
+                print(f"{name} = {'x' if v is None else hex(v)}")
+    except VcdError as e:
+        print(f"{os.path.basename(sys.argv[0])}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,27 +1,15 @@
-import sys
-
-infilename = sys.argv[1]
-filename_parts = infilename.split('.')
-outfilename0 = filename_parts[0] + '0.' + filename_parts[1]
-outfilename1 = filename_parts[0] + '1.' + filename_parts[1]
-outfilename2 = filename_parts[0] + '2.' + filename_parts[1]
-outfilename3 = filename_parts[0] + '3.' + filename_parts[1]
+# Splits a program image into the four byte-lane files memory.sv reads.
+#
+#   python programs/split_memhfile.py programs/rv32i_test.txt
+#
+# See icyrisc/memimage.py for the supported input formats and options.
 
-infile = open(infilename)
-outfile0 = open(outfilename0, 'w')
-outfile1 = open(outfilename1, 'w')
-outfile2 = open(outfilename2, 'w')
-outfile3 = open(outfilename3, 'w')
+import sys
+from pathlib import Path
 
-for line in infile:
-    outfile3.write(f'{line[0:2]}\n')
-    outfile2.write(f'{line[2:4]}\n')
-    outfile1.write(f'{line[4:6]}\n')
-    outfile0.write(f'{line[6:8]}\n')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-infile.close()
-outfile0.close()
-outfile1.close()
-outfile2.close()
-outfile3.close()
+from icyrisc.memimage import main
 
+if __name__ == "__main__":
+    main()
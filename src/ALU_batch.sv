@@ -0,0 +1,68 @@
+// Batch harness for the ALU (test/test_alu_batch.py)
+//
+// While start is high, every rising clk edge writes ALU_result and ALU_comp of
+// the previous vector to +RESULTS (default alu_results.hex) and applies the
+// next line of +VECTORS (default alu_vectors.hex): PC, PC_old, rs1v, rs2v,
+// imm_ext and {ALU_ctrl, ALU_src2_sel, ALU_src1_sel} as hex words. done rises
+// once the last result is written.
+
+module ALU_batch (
+    input  logic clk,
+    input  logic start,
+    output logic done
+);
+  logic [31:0] PC, PC_old, rs1v, rs2v, imm_ext;
+  logic [1:0] ALU_src1_sel, ALU_src2_sel;
+  alu_ctrl_t ALU_ctrl;
+  logic [31:0] ALU_result;
+  alu_comp_t ALU_comp;
+
+  logic [31:0] selects;
+  string vectors_file = "alu_vectors.hex";
+  string results_file = "alu_results.hex";
+  int vectors = 0;
+  int results = 0;
+  logic pending = 0;
+
+  ALU dut (
+      .PC(PC),
+      .PC_old(PC_old),
+      .rs1v(rs1v),
+      .rs2v(rs2v),
+      .imm_ext(imm_ext),
+      .ALU_src1_sel(ALU_src1_sel),
+      .ALU_src2_sel(ALU_src2_sel),
+      .ALU_ctrl(ALU_ctrl),
+      .ALU_result(ALU_result),
+      .ALU_comp(ALU_comp)
+  );
+
+  initial begin
+    done = 0;
+    void'($value$plusargs("VECTORS=%s", vectors_file));
+    void'($value$plusargs("RESULTS=%s", results_file));
+  end
+
+  always @(posedge clk) begin
+    if (start && !done) begin
+      if (vectors == 0) begin
+        // opened on the first edge, so the test can write the file after start-up
+        vectors = $fopen(vectors_file, "r");
+        results = $fopen(results_file, "w");
+        if (vectors == 0 || results == 0) $fatal(1, "cannot open %s or %s", vectors_file, results_file);
+      end else if (pending) $fwrite(results, "%h %h\n", ALU_result, {30'b0, ALU_comp});
+
+      if ($fscanf(vectors, "%h %h %h %h %h %h\n", PC, PC_old, rs1v, rs2v, imm_ext, selects) == 6) begin
+        ALU_src1_sel = selects[1:0];
+        ALU_src2_sel = selects[3:2];
+        ALU_ctrl = alu_ctrl_t'(selects[7:4]);
+        pending = 1;
+      end else begin
+        $fclose(vectors);
+        $fclose(results);
+        done <= 1;
+      end
+    end
+  end
+
+endmodule
@@ -0,0 +1,57 @@
+// Batch harness for ImmediateGen (test/test_imm_batch.py)
+//
+// While start is high, every rising clk edge writes imm_ext of the previous
+// vector to +RESULTS (default imm_results.hex) and applies the next
+// {imm_ctrl, immed} word of +VECTORS (default imm_vectors.hex), one hex word
+// per line. done rises once the last result is written. The vectors never
+// pass through Python one at a time, so millions of them take seconds.
+
+module ImmediateGen_batch (
+    input  logic clk,
+    input  logic start,
+    output logic done
+);
+  logic [24:0] immed;
+  logic [2:0] imm_ctrl;
+  logic signed [31:0] imm_ext;
+
+  logic [31:0] vector;
+  string vectors_file = "imm_vectors.hex";
+  string results_file = "imm_results.hex";
+  int vectors = 0;
+  int results = 0;
+  logic pending = 0;
+
+  ImmediateGen dut (
+      .immed(immed),
+      .imm_ctrl(imm_ctrl),
+      .imm_ext(imm_ext)
+  );
+
+  initial begin
+    done = 0;
+    void'($value$plusargs("VECTORS=%s", vectors_file));
+    void'($value$plusargs("RESULTS=%s", results_file));
+  end
+
+  always @(posedge clk) begin
+    if (start && !done) begin
+      if (vectors == 0) begin
+        // opened on the first edge, so the test can write the file after start-up
+        vectors = $fopen(vectors_file, "r");
+        results = $fopen(results_file, "w");
+        if (vectors == 0 || results == 0) $fatal(1, "cannot open %s or %s", vectors_file, results_file);
+      end else if (pending) $fwrite(results, "%h\n", imm_ext);
+
+      if ($fscanf(vectors, "%h\n", vector) == 1) begin
+        {imm_ctrl, immed} = vector[27:0];
+        pending = 1;
+      end else begin
+        $fclose(vectors);
+        $fclose(results);
+        done <= 1;
+      end
+    end
+  end
+
+endmodule
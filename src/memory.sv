@@ -10,7 +10,8 @@
 // Addresses outside of the physical address space are read as 32'd0. The memory 
 // can be initialized by specifying via the INIT_FILE parameter the name of a 
 // text file containing 2,048 lines of 32-bit hex values. If no file name is 
-// specified, the memory is initialized to all 0s.
+// specified, the memory is initialized to all 0s. Simulations can instead pass
+// +MEM_FILE_PATH_PREFIX=<prefix> to load a program at run time.
 //
 // The memory module also implements some memory-mapped peripherals: 8-bit PWM 
 // generators for each of the user LED (0xFFFFFFFF, R/W), RED (0xFFFFFFFE, R/W), 
@@ -89,6 +90,7 @@ module memory #(
   logic [7:0] mem_write_data3;
 
   logic mem_read_enable;
+  logic read_from_array = 1'b1;  // mem_read_enable of the address the read data belongs to
   logic [7:0] mem_read_data0;
   logic [7:0] mem_read_data1;
   logic [7:0] mem_read_data2;
@@ -96,7 +98,8 @@ module memory #(
 
   // Instaniate memory arrays
   memory_array #(
-      .INIT_FILE((INIT_FILE != "") ? {INIT_FILE, "0.txt"} : "")
+      .INIT_FILE((INIT_FILE != "") ? {INIT_FILE, "0.txt"} : ""),
+      .LANE(0)
   ) mem0 (
       .clk          (clk),
       .write_enable (mem_write_enable0),
@@ -108,7 +111,8 @@ module memory #(
   );
 
   memory_array #(
-      .INIT_FILE((INIT_FILE != "") ? {INIT_FILE, "1.txt"} : "")
+      .INIT_FILE((INIT_FILE != "") ? {INIT_FILE, "1.txt"} : ""),
+      .LANE(1)
   ) mem1 (
       .clk          (clk),
       .write_enable (mem_write_enable1),
@@ -120,7 +124,8 @@ module memory #(
   );
 
   memory_array #(
-      .INIT_FILE((INIT_FILE != "") ? {INIT_FILE, "2.txt"} : "")
+      .INIT_FILE((INIT_FILE != "") ? {INIT_FILE, "2.txt"} : ""),
+      .LANE(2)
   ) mem2 (
       .clk          (clk),
       .write_enable (mem_write_enable2),
@@ -132,7 +137,8 @@ module memory #(
   );
 
   memory_array #(
-      .INIT_FILE((INIT_FILE != "") ? {INIT_FILE, "3.txt"} : "")
+      .INIT_FILE((INIT_FILE != "") ? {INIT_FILE, "3.txt"} : ""),
+      .LANE(3)
   ) mem3 (
       .clk          (clk),
       .write_enable (mem_write_enable3),
@@ -143,11 +149,14 @@ module memory #(
       .read_data    (mem_read_data3)
   );
 
-  // Handle memory reads
+  // Handle memory reads. The lanes and read_value both register their data, so
+  // the choice between them is registered too: it must follow the address that
+  // was read, not the one on read_address now (a load's MEM_WB is back on pc).
   assign mem_read_enable = (read_address[31:13] == 19'd0);
-  assign read_val = mem_read_enable ? { mem_read_data3, mem_read_data2, mem_read_data1, mem_read_data0 } : read_value;
+  assign read_val = read_from_array ? { mem_read_data3, mem_read_data2, mem_read_data1, mem_read_data0 } : read_value;
 
   always_ff @(posedge clk) begin
+    read_from_array <= mem_read_enable;
     read_address1 <= read_address[1];
     read_address0 <= read_address[0];
     read_word <= funct3[1];
@@ -343,10 +352,41 @@ module memory #(
       micros_counter <= micros_counter + 1;
     end
   end
+
+`ifndef SYNTHESIS
+  // Simulation-only bulk backdoor used by icyrisc.harness.backdoor: changing
+  // backdoor_load (backdoor_dump) to a new nonzero value $readmemh's
+  // ($writememh's) words backdoor_first..backdoor_last of all four lanes from
+  // (to) icyrisc_backdoor0.txt .. 3.txt in the simulator's working directory.
+  int backdoor_load = 0;
+  int backdoor_dump = 0;
+  int backdoor_first = 0;
+  int backdoor_last = 2047;
+
+  always @(backdoor_load) begin
+    if (backdoor_load != 0) begin
+      $readmemh("icyrisc_backdoor0.txt", mem0.memory, backdoor_first, backdoor_last);
+      $readmemh("icyrisc_backdoor1.txt", mem1.memory, backdoor_first, backdoor_last);
+      $readmemh("icyrisc_backdoor2.txt", mem2.memory, backdoor_first, backdoor_last);
+      $readmemh("icyrisc_backdoor3.txt", mem3.memory, backdoor_first, backdoor_last);
+    end
+  end
+
+  always @(backdoor_dump) begin
+    if (backdoor_dump != 0) begin
+      $writememh("icyrisc_backdoor0.txt", mem0.memory, backdoor_first, backdoor_last);
+      $writememh("icyrisc_backdoor1.txt", mem1.memory, backdoor_first, backdoor_last);
+      $writememh("icyrisc_backdoor2.txt", mem2.memory, backdoor_first, backdoor_last);
+      $writememh("icyrisc_backdoor3.txt", mem3.memory, backdoor_first, backdoor_last);
+    end
+  end
+`endif
+
 endmodule
 
 module memory_array #(
-    parameter INIT_FILE = ""
+    parameter INIT_FILE = "",
+    parameter LANE = 0  // byte lane, picks <prefix>LANE.txt for the run-time image
 ) (
     input  logic        clk,
     input  logic        write_enable,
@@ -361,8 +401,19 @@ module memory_array #(
 
   int i;
 
-  // Initialize memory array
+`ifndef SYNTHESIS
+  string image_prefix;
+`endif
+
+  // Initialize memory array. In simulation, +MEM_FILE_PATH_PREFIX=<prefix>
+  // loads <prefix>0.txt .. <prefix>3.txt at start-up in place of INIT_FILE,
+  // so one compiled snapshot can run any program image.
   initial begin
+`ifndef SYNTHESIS
+    if ($value$plusargs("MEM_FILE_PATH_PREFIX=%s", image_prefix)) begin
+      $readmemh($sformatf("%s%0d.txt", image_prefix, LANE), memory);
+    end else
+`endif
     if (INIT_FILE) begin
       $readmemh(INIT_FILE, memory);
     end else begin
@@ -1,3 +1,10 @@
+// Memory image: memory.sv loads `MEM_FILE_PATH_PREFIX`0.txt .. 3.txt. It
+// defaults to empty (all-zero memory), and simulations can pick the program
+// at run time with +MEM_FILE_PATH_PREFIX=<prefix> instead of recompiling.
+`ifndef MEM_FILE_PATH_PREFIX
+`define MEM_FILE_PATH_PREFIX ""
+`endif
+
 module top (
     input logic clk,
 
@@ -159,4 +166,29 @@ module top (
   assign RGB_G = ~green;
   assign RGB_B = ~blue;
 
+`ifndef SYNTHESIS
+  // Simulation-only waveform dump used by icyrisc.harness.waves: nothing is
+  // dumped unless the run is started with +WAVES=<file>, and then only while
+  // waves_on is nonzero. +WAVES_TRIGGERED starts with dumping off so the
+  // harness can switch it on around an event.
+  string waves_file = "";
+  int waves_on = 0;
+
+  initial begin
+    if ($value$plusargs("WAVES=%s", waves_file)) begin
+      $dumpfile(waves_file);
+      $dumpvars(0, top);
+      if ($test$plusargs("WAVES_TRIGGERED")) $dumpoff;
+      else waves_on = 1;
+    end
+  end
+
+  always @(waves_on) begin
+    if (waves_file != "") begin
+      if (waves_on != 0) $dumpon;
+      else $dumpoff;
+    end
+  end
+`endif
+
 endmodule
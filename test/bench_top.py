@@ -0,0 +1,65 @@
+# bench_top.py
+## SIMULATOR THROUGHPUT WORKLOADS, run by `python -m icyrisc.bench` (not part of the test suite)
+import random
+import time
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import ClockCycles, FallingEdge, RisingEdge
+
+from icyrisc.asm import assemble_i_instruction, assemble_r_instruction
+from icyrisc.bench import write_measurement
+from icyrisc.harness.cosim import CosimChecker
+from icyrisc.harness.program import program_prefix
+from icyrisc.harness.vectors import Vector, VectorRunner
+from icyrisc.isa import OP_ITYPE
+from icyrisc.iss import Iss
+
+@cocotb.test()
+async def bench_program(dut):
+    """Runs the program the simulator was started with for +BENCH_CYCLES cycles,
+    checked in lockstep against the reference model."""
+    cycles = int(cocotb.plusargs["BENCH_CYCLES"])
+    checker = CosimChecker(dut, Iss.from_memh(program_prefix()))
+    dut.SW.value = 0
+    cocotb.start_soon(Clock(dut.clk, 80, unit="ns").start(start_high=False))
+    checker.start()
+    await RisingEdge(dut.clk)
+    await FallingEdge(dut.clk)
+    dut.SW.value = 1
+
+    start = time.perf_counter()
+    await ClockCycles(dut.clk, cycles)
+    seconds = time.perf_counter() - start
+    checker.monitor.stop()
+    assert checker.mismatch is None, checker.mismatch
+    write_measurement(checker.monitor.cycle, checker.monitor.retired, seconds)
+
+@cocotb.test()
+async def bench_vectors(dut):
+    """Streams +BENCH_VECTORS random R- and I-type vectors through one reset."""
+    count = int(cocotb.plusargs["BENCH_VECTORS"])
+    rng = random.Random(0xBE4C)
+    vectors = []
+    for _ in range(count):
+        rd, rs1, rs2 = rng.randrange(1, 32), rng.randrange(1, 32), rng.randrange(1, 32)
+        funct3 = rng.randrange(8)
+        if rng.random() < 0.5:
+            funct7 = 0b0100000 if funct3 in (0b000, 0b101) and rng.random() < 0.5 else 0
+            inst = assemble_r_instruction(funct7, funct3, rd, rs1, rs2)
+        else:
+            if funct3 == 0b001:
+                imm = rng.randrange(32)  # SLLI
+            elif funct3 == 0b101:
+                imm = rng.choice([0, 0b0100000 << 5]) | rng.randrange(32)  # SRLI / SRAI
+            else:
+                imm = rng.randrange(-2048, 2048)
+            inst = assemble_i_instruction(OP_ITYPE, funct3, rd, rs1, imm)
+        vectors.append(Vector(inst, {rs1: rng.getrandbits(32), rs2: rng.getrandbits(32)}))
+
+    cocotb.start_soon(Clock(dut.clk, 80, unit="ns").start(start_high=False))
+    runner = VectorRunner(dut)
+    start = time.perf_counter()
+    await runner.run(vectors, timeout_cycles=6 * count)
+    seconds = time.perf_counter() - start
+    write_measurement(runner.monitor.cycle, runner.monitor.retired, seconds)
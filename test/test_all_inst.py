@@ -4,8 +4,10 @@ from pathlib import Path
 import random
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, FallingEdge
-from cocotb.types import Array
-from cocotb_tools.runner import get_runner
+
+from icyrisc.buildcache import cached_build
+from icyrisc.simulator import build_args, get_runner, sim_name, top_sources
+from icyrisc.harness.program import program_plusargs
 
 ## THIS USES THE `test_mem` INITIAL FILE IN //programs
 # this is a simple file with 4 words written to memory and the rest zeroed out
@@ -15,19 +17,17 @@ from cocotb_tools.runner import get_runner
 # 0x43 0xBEEFDEAD
 
 def test_all_inst():
-    sim = os.getenv("SIM", "icarus")
+    sim = sim_name()
     proj_path = Path(__file__).resolve().parent.parent
-    os.environ["PROJ_ROOT"] = str(proj_path)
-    sources = str(proj_path / "top.f")
     memory_init_file = str(proj_path / "programs" / "test_mem") # Assuming memory_init.mem is in the same directory
 
     runner = get_runner(sim)
-    runner.build(
+    cached_build(
+        runner,
         hdl_toplevel="top",
-        always=True,
         timescale=("10ns", "1ps"),
-        build_args=["-c", sources],
-        defines={"MEM_FILE_PATH_PREFIX": memory_init_file}
+        sources=top_sources(),
+        build_args=build_args(sim),
     )
 
     runner.test(
@@ -35,6 +35,7 @@ def test_all_inst():
         test_module=["test_itype", "test_rtype",  "test_utype", "test_branch", "test_jump", "test_load_store"],
         timescale=("10ns", "1ps"),
         hdl_toplevel_lang="verilog",
+        plusargs=program_plusargs(memory_init_file),
     )
 
 if __name__ == "__main__":
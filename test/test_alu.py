@@ -3,7 +3,9 @@ import os
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge
 from cocotb.triggers import Timer
-from cocotb_tools.runner import get_runner
+
+from icyrisc.buildcache import cached_build
+from icyrisc.simulator import build_args, get_runner, sim_name
 
 from pathlib import Path
 @cocotb.test()
@@ -95,15 +97,16 @@ async def test_alu_simple(dut):
     assert dut.ALU_comp.value == 0
 
 def test_alu():
-    sim = os.getenv("SIM", "icarus")
+    sim = sim_name()
     proj_path = Path(__file__).resolve().parent
-    sources = list((proj_path.parent / "src").glob("ALU.sv"))
+    sources = [proj_path.parent / "src" / f for f in ("control/constants.sv", "ALU.sv")]
     print(sources)
     runner = get_runner(sim)
-    runner.build(
+    cached_build(
+        runner,
         sources=sources,
+        build_args=build_args(sim),
         hdl_toplevel="ALU",
-        always=True,
         timescale=("1ns", "1ps")
     )
 
@@ -0,0 +1,89 @@
+# test_asm.py
+from pathlib import Path
+
+import pytest
+
+from icyrisc.asm import AsmError, assemble, assemble_words, write_program
+from icyrisc.iss import Iss
+from icyrisc.memimage import read_lanes
+
+PROGRAMS = Path(__file__).resolve().parent.parent / "programs"
+
+
+def test_rv32i_test_matches_checked_in_image(tmp_path):
+    """The assembler reproduces the checked-in rv32i_test word and lane files byte for byte."""
+    assembly = assemble((PROGRAMS / "rv32i_test.s").read_text())
+    write_program(assembly, tmp_path / "rv32i_test", words_file=True)
+    assert (tmp_path / "rv32i_test.txt").read_text().split() == (PROGRAMS / "rv32i_test.txt").read_text().split()
+    assert read_lanes(tmp_path / "rv32i_test") == read_lanes(PROGRAMS / "rv32i_test")
+
+
+def test_encodings():
+    assert assemble_words("add x2, x3, x4") == [0x00418133]
+    assert assemble_words("addi x2, x3, 47") == [0x02F18113]
+    assert assemble_words("lw x2, 47(x3)") == [0x02F1A103]
+    assert assemble_words("jalr x2, 47(x3)") == [0x02F18167]
+    assert assemble_words("sw x2, 47(x3)") == [0x0221A7A3]
+    assert assemble_words("lui x2, 47") == [0x0002F137]
+    assert assemble_words("auipc x2, 47") == [0x0002F117]
+    assert assemble_words("srai x3, x1, 4") == [0x4040D193]
+
+
+def test_jalr_short_forms():
+    assert assemble_words("jalr t0, a0") == assemble_words("jalr t0, 0(a0)")
+    assert assemble_words("jalr a0") == assemble_words("jalr ra, 0(a0)") == [0x000500E7]
+    assert assemble_words("jalr 8(a0)") == assemble_words("jalr ra, 8(a0)")
+    assert assemble_words("jalr x2, x3, 47") == assemble_words("jalr x2, 47(x3)")
+
+
+def test_labels_and_pseudo_instructions():
+    source = """
+        .equ COUNT, 5
+        li   t0, COUNT
+        li   t1, 0x12345678
+        la   a0, table
+        li   a1, 0
+    loop:
+        lw   t2, 0(a0)
+        add  a1, a1, t2
+        addi a0, a0, 4
+        addi t0, t0, -1
+        bnez t0, loop
+        call done
+    done:
+        j .
+        .align 2
+    table:
+        .word 1, 2, 3, 4, 5
+    """
+    assembly = assemble(source)
+    iss = Iss(assembly.image)
+    iss.run(1000)
+    assert iss.halted
+    assert iss.pc == assembly.symbols["done"]
+    assert iss.regs[6] == 0x12345678
+    assert iss.regs[11] == 15
+    assert iss.regs[1] == assembly.symbols["done"]
+
+
+def test_data_directives():
+    image = assemble(".byte 1, 0xFF\n.half 0x1234\n.asciz \"ok\"\n.space 2, 7\n.align 2\n.word -1").image
+    assert bytes(image) == b"\x01\xff\x34\x12ok\x00\x07\x07\x00\x00\x00\xff\xff\xff\xff"
+
+
+def test_forward_li_reserves_two_words():
+    assembly = assemble("li a0, target\nj .\ntarget: nop")
+    assert assembly.symbols["target"] == 12
+
+
+@pytest.mark.parametrize("source", [
+    "addi x1, x1, 4096",
+    "beq x0, x0, 3",
+    "add x1, x2",
+    "lw x1, 0(x40)",
+    "j nowhere",
+    ".byte 1\nnop",
+])
+def test_errors(source):
+    with pytest.raises(AsmError):
+        assemble(source)
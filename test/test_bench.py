@@ -0,0 +1,61 @@
+# test_bench.py
+from icyrisc.asm import assemble
+from icyrisc.bench import WORKLOADS, _program_plusargs, compare
+from icyrisc.harness.cosim import CosimChecker
+from icyrisc.harness.monitor import Retired
+from icyrisc.iss import Iss
+
+
+def report(**metrics):
+    entry = {"sim": "icarus", "workload": "random", "cycles_per_second": 10_000.0,
+             "instructions_per_second": 2_500.0, "build_seconds": 4.0, "peak_rss_mb": 50.0}
+    entry.update(metrics)
+    return {"results": [entry]}
+
+
+def test_compare_flags_only_real_regressions():
+    baseline = report()
+    assert compare(report(cycles_per_second=9_000.0), baseline) == []  # within 15%
+    assert compare(report(cycles_per_second=20_000.0, build_seconds=1.0), baseline) == []  # faster is fine
+    slower = compare(report(cycles_per_second=8_000.0, peak_rss_mb=80.0), baseline)
+    assert [(r.key, r.metric) for r in slower] == [("icarus/random", "cycles_per_second"),
+                                                   ("icarus/random", "peak_rss_mb")]
+    assert round(slower[0].change, 2) == -0.2
+    assert compare(report(cycles_per_second=9_000.0), baseline, tolerance=0.05)
+    # workloads or simulators missing from the baseline are not compared
+    assert compare(report(sim="verilator", cycles_per_second=1.0), baseline) == []
+
+
+def test_random_workload_image(tmp_path):
+    plusargs = _program_plusargs(WORKLOADS["random"], tmp_path)
+    prefix = plusargs[0].split("=", 1)[1]
+    model = Iss.from_memh(prefix)
+    model.run(100_000)
+    assert model.halted
+    assert _program_plusargs(WORKLOADS["vectors"], tmp_path) == []
+
+
+class Callbacks:
+    """Stands in for the RetirementMonitor: the records are fed by hand."""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+
+def test_checker_without_a_target():
+    # bench_program only start()s its checker and never gives it a run() target
+    image = assemble("""
+        li   t0, 0
+    loop:
+        addi t0, t0, 1
+        j    loop
+    """).image
+    checker = CosimChecker(None, Iss(image), monitor=Callbacks())
+    rtl = Iss(image)
+    for cycle in range(1, 101):
+        s = rtl.step()
+        checker.monitor.callbacks[0](Retired(s.pc, s.inst, s.next_pc, s.rd, s.rd_value, s.store, cycle, ()))
+    assert checker.checked == 100 and checker.mismatch is None
@@ -5,9 +5,12 @@ from pathlib import Path
 import random
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, FallingEdge
-from cocotb.types import Array
-from cocotb_tools.runner import get_runner
 
+from icyrisc.asm import assemble_b_instruction
+from icyrisc.buildcache import cached_build
+from icyrisc.simulator import build_args, get_runner, sim_name, top_sources
+from icyrisc.harness.backdoor import Backdoor
+from icyrisc.harness.vectors import Vector, VectorRunner
 from constants import OP_BTYPE
 
 FUNCT3_BEQ = 0b000
@@ -20,20 +23,9 @@ FUNCT3_BGEU = 0b111
 RS1 = 1
 RS2 = 2
 
-def assemble_b_instruction(funct3, rs1, rs2, imm):
-    """Assembles a B-type (branch) instruction."""
-    b_imm12 = (imm >> 12) & 0x1
-    b_imm10_5 = (imm >> 5) & 0x3F
-    b_imm4_1 = (imm >> 1) & 0xF
-    b_imm11 = (imm >> 11) & 0x1
-    return (b_imm12 << 31) | (b_imm10_5 << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) | (b_imm4_1 << 8) | (b_imm11 << 7) | (OP_BTYPE << 0)
-
 async def initialize_registers(dut, reg_indexes, values):
-    """Initializes a specific register in the register file."""
-    current_registers = list(dut.reg0.register_file.value)
-    for reg_index, value in zip(reg_indexes, values):
-        current_registers[reg_index] = value
-    dut.reg0.register_file.value = Array(current_registers)
+    """Initializes specific registers in the register file through the backdoor."""
+    Backdoor(dut).write_registers(dict(zip(reg_indexes, values)))
 
 async def run_branch_test(dut, inst, expected_pc):
     """Runs a single branch instruction test."""
@@ -54,7 +46,7 @@ async def run_branch_test(dut, inst, expected_pc):
 
     await FallingEdge(dut.clk)
     actual_pc = int(dut.pc.value)
-    print(f"PC after (potential) branch: 0x{actual_pc:08X}")
+    dut._log.debug("PC after (potential) branch: 0x%08X", actual_pc)
 
     assert actual_pc == expected_pc
 
@@ -66,7 +58,7 @@ async def test_beq_taken(dut):
     await initialize_registers(dut, [RS1, RS2], [rs1_val, rs2_val])
     imm = 0x00000010  # Branch forward 16 bytes
     inst = assemble_b_instruction(FUNCT3_BEQ, 1, 2, imm)
-    print("INST", hex(inst))
+    dut._log.debug("INST 0x%08X", inst)
     await run_branch_test(dut, inst, imm)
 
 @cocotb.test()
@@ -179,18 +171,32 @@ async def test_bgeu_not_taken(dut):
     inst = assemble_b_instruction(FUNCT3_BGEU, 1, 2, imm)
     await run_branch_test(dut, inst, 4)
 
+@cocotb.test()
+async def test_branch_batch(dut):
+    """Streams 500 random taken and not-taken branches through a single reset; each
+    vector lands wherever the previous one branched to."""
+    cocotb.start_soon(Clock(dut.clk, 80, unit="ns").start(start_high=False))
+    rng = random.Random(0x5EED)
+    funct3s = [FUNCT3_BEQ, FUNCT3_BNE, FUNCT3_BLT, FUNCT3_BGE, FUNCT3_BLTU, FUNCT3_BGEU]
+    vectors = []
+    for _ in range(500):
+        rs1_val = rng.getrandbits(32)
+        rs2_val = rs1_val if rng.random() < 0.25 else rng.getrandbits(32)
+        imm = 4 * rng.randrange(1, 16)
+        inst = assemble_b_instruction(rng.choice(funct3s), RS1, RS2, imm)
+        vectors.append(Vector(inst, {RS1: rs1_val, RS2: rs2_val}))
+    await VectorRunner(dut).run(vectors, timeout_cycles=6 * len(vectors))
+
 def test_branch():
-    sim = os.getenv("SIM", "icarus")
-    proj_path = Path(__file__).resolve().parent.parent
-    os.environ["PROJ_ROOT"] = str(proj_path)
-    sources = str(proj_path / "top.f")
+    sim = sim_name()
 
     runner = get_runner(sim)
-    runner.build(
+    cached_build(
+        runner,
         hdl_toplevel="top",
-        always=True,
         timescale=("10ns", "1ps"),
-        build_args=["-f", sources],
+        sources=top_sources(),
+        build_args=build_args(sim),
     )
 
     runner.test(
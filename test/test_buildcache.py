@@ -0,0 +1,131 @@
+# test_buildcache.py
+import fcntl
+from pathlib import Path
+
+from cocotb_tools.runner import Verilator
+
+from icyrisc.buildcache import build_key, cached_build, command_file_sources, entries, release
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class RecordingRunner:
+    """Records build() calls and writes a snapshot file like the Icarus runner."""
+
+    def __init__(self):
+        self.builds = []
+
+    def build(self, build_dir, always, **kwargs):
+        self.build_dir = Path(build_dir)
+        self.build_dir.mkdir(parents=True, exist_ok=True)
+        if always:
+            self.builds.append(kwargs["defines"])
+            (self.build_dir / "sim.vvp").write_text("snapshot")
+
+
+class RecordingVerilator(Verilator):
+    """cocotb's Verilator runner with the tool invocations recorded instead of run."""
+
+    def __init__(self):
+        super().__init__()
+        self.commands = []
+
+    def _simulator_in_path_build_only(self):
+        self.executable = "verilator"
+
+    def _execute(self, cmds, cwd):
+        self.commands += [cmd[0] for cmd in cmds]
+
+
+def test_command_file_expands_proj_root(monkeypatch):
+    monkeypatch.setenv("PROJ_ROOT", str(ROOT))
+    sources = command_file_sources(ROOT / "top.f")
+    assert sources[0] == ROOT / "src" / "control" / "constants.sv"
+    assert sources[-1] == ROOT / "src" / "top.sv"
+    assert all(path.exists() for path in sources)
+
+
+def test_key_tracks_inputs(tmp_path):
+    runner = RecordingRunner()
+    source = tmp_path / "a.sv"
+    source.write_text("module a; endmodule\n")
+    key = build_key(runner, "a", [source], defines={"X": "1"})
+    assert key == build_key(runner, "a", [source], defines={"X": "1"})
+    assert key != build_key(runner, "a", [source], defines={"X": "2"})
+    assert key != build_key(runner, "a", [source], defines={"X": "1"}, timescale=("1ns", "1ps"))
+    source.write_text("module a; wire w; endmodule\n")
+    assert key != build_key(runner, "a", [source], defines={"X": "1"})
+
+
+def test_key_follows_the_waves_override(tmp_path, monkeypatch):
+    # the runner builds with WAVES from the environment whatever waves= says
+    runner = RecordingRunner()
+    source = tmp_path / "a.sv"
+    source.write_text("module a; endmodule\n")
+    monkeypatch.delenv("WAVES", raising=False)
+    plain, traced = build_key(runner, "a", [source]), build_key(runner, "a", [source], waves=True)
+    assert plain != traced
+    monkeypatch.setenv("WAVES", "1")
+    assert build_key(runner, "a", [source]) == traced
+    monkeypatch.setenv("WAVES", "0")
+    assert build_key(runner, "a", [source], waves=True) == plain
+
+
+def test_hits_and_lru_eviction(tmp_path):
+    runner = RecordingRunner()
+    source = tmp_path / "a.sv"
+    source.write_text("module a; endmodule\n")
+    cache = tmp_path / "cache"
+
+    def build(image):
+        # done with each snapshot right away, as a process that has finished its tests
+        cached = cached_build(runner, "a", [source], defines={"IMAGE": image}, cache_dir=cache, max_entries=2)
+        release(cached.build_dir)
+        return cached
+
+    first = build("0")
+    again = build("0")
+    assert not first.hit and again.hit and again.build_dir == first.build_dir == runner.build_dir
+    assert len(runner.builds) == 1
+
+    build("1")
+    assert build("0").hit
+    build("2")
+    assert len(entries(cache)) == 2
+    assert first.build_dir in entries(cache)  # IMAGE=1 was the least recently used
+    assert not build("1").hit
+
+
+def test_eviction_passes_over_snapshots_in_use(tmp_path):
+    runner = RecordingRunner()
+    source = tmp_path / "a.sv"
+    source.write_text("module a; endmodule\n")
+    cache = tmp_path / "cache"
+    first = cached_build(runner, "a", [source], defines={"IMAGE": "0"}, cache_dir=cache, max_entries=1)
+    release(first.build_dir)
+    with open(cache / f"{first.build_dir.name}.use") as use:
+        fcntl.flock(use, fcntl.LOCK_SH)  # another worker testing against IMAGE=0
+        second = cached_build(runner, "a", [source], defines={"IMAGE": "1"}, cache_dir=cache, max_entries=1)
+        assert entries(cache) == [first.build_dir, second.build_dir]
+    # this process still holds IMAGE=1, so it is IMAGE=0 that goes
+    third = cached_build(runner, "a", [source], defines={"IMAGE": "2"}, cache_dir=cache, max_entries=1)
+    assert entries(cache) == [second.build_dir, third.build_dir]
+    release(second.build_dir)
+    release(third.build_dir)
+
+
+def test_hit_runs_no_build_tool(tmp_path):
+    # the Verilator runner ignores always=False and would rerun verilator and make
+    runner = RecordingVerilator()
+    source = tmp_path / "a.sv"
+    source.write_text("module a; endmodule\n")
+    cache = tmp_path / "cache"
+
+    first = cached_build(runner, "a", [source], defines={"X": "1"}, timescale=("1ns", "1ps"), cache_dir=cache)
+    assert not first.hit and len(runner.commands) == 2  # verilator, make
+    runner = RecordingVerilator()
+    again = cached_build(runner, "a", [source], defines={"X": "1"}, timescale=("1ns", "1ps"), cache_dir=cache)
+    assert again.hit and runner.commands == []
+    # runner.test() finds the snapshot and the build settings as after a real build
+    assert runner.build_dir == first.build_dir and runner.hdl_toplevel == "a"
+    assert runner.defines == {"X": "1"} and runner.timescale == ("1ns", "1ps")
@@ -0,0 +1,40 @@
+# test_checkpoint.py
+import pytest
+
+from icyrisc.checkpoint import CheckpointError, fast_forward, load, save, take, to_model
+from icyrisc.iss import Iss
+from icyrisc.rvgen import generate_program
+
+
+def test_fast_forward_then_continue_matches_a_straight_run():
+    program = generate_program(11)
+    straight = Iss(program.image)
+    total = straight.run()
+
+    model = Iss(program.image)
+    checkpoint = fast_forward(model, total // 3)
+    assert checkpoint.retired == total // 3 and checkpoint.pc == model.pc
+    resumed = to_model(checkpoint)
+    resumed.run()
+    assert resumed.registers == straight.registers
+    assert resumed.mem == straight.mem and resumed.retired == total
+
+
+def test_fast_forward_to_a_pc():
+    model = Iss(bytes.fromhex("13050000" "13051500" "6ff0dfff"))  # li a0, 0; loop: addi a0, a0, 1; j loop
+    checkpoint = fast_forward(model, 10, until=4)
+    assert checkpoint.pc == 4 and checkpoint.retired == 1
+    with pytest.raises(CheckpointError):
+        fast_forward(Iss(bytes.fromhex("6f000000")), 5)  # j . halts first
+    with pytest.raises(CheckpointError):
+        fast_forward(Iss(), 50, until=0x1000)
+    with pytest.raises(ValueError):
+        fast_forward(Iss())
+
+
+def test_save_load(tmp_path):
+    model = Iss(generate_program(3).image)
+    model.run(100)
+    checkpoint = take(model)
+    save(checkpoint, tmp_path / "cp.npz")
+    assert load(tmp_path / "cp.npz") == checkpoint
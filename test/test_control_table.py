@@ -0,0 +1,63 @@
+# test_control_table.py
+import re
+
+from icyrisc import control
+from icyrisc.asm import assemble_i_instruction, assemble_r_instruction
+from icyrisc.fsm import ALU_WB, BRANCH, DECODE, EXEC_R, FETCH, MEM_READ, MEM_WB, STATE_NAMES
+from icyrisc.isa import OP_ITYPE, OP_JALR, OP_RTYPE
+from icyrisc.perf import CONSTANTS_SV, FsmModel
+
+LW = 0x02f1a103  # lw x2, 47(x3)
+BEQ = 0x02310763  # beq x2, x3, 47
+BLTU = BEQ | (0b110 << 12)
+
+
+def sv_enums():
+    """typedef name -> {member: value} from constants.sv (members numbered in order)."""
+    enums = {}
+    for body, name in re.findall(r"typedef enum[^{]*\{([^}]*)\}\s*(\w+);", CONSTANTS_SV.read_text()):
+        members = re.sub(r"//.*", "", body).replace(" ", "").replace("\n", "").split(",")
+        enums[name] = {m.split("=")[0]: i for i, m in enumerate(members) if "=" not in m}
+    return enums
+
+
+def test_encodings_match_constants_sv():
+    for typedef, members in sv_enums().items():
+        for member, value in members.items():
+            if hasattr(control, member) and typedef != "alu_ops_t":
+                assert getattr(control, member) == value, f"{typedef}.{member}"
+
+
+def test_every_reachable_state_has_a_row():
+    model = FsmModel()
+    reached = {state for op in range(128) for state in model.path(op)}
+    assert reached <= set(control.CONTROL)
+    assert set(control.CONTROL) == set(range(len(STATE_NAMES)))
+
+
+def test_rows_match_the_hand_written_sequences():
+    fetch = control.expected(FETCH, LW)
+    assert (fetch["inst_en"], fetch["pc_en"], fetch["alu_src1_sel"], fetch["result_sel"]) == \
+        (1, 1, control.PC, control.ALU_RESULT)
+    assert control.expected(MEM_READ, LW)["mem_addr_sel"] == control.ADDR_RESULT
+    assert control.expected(MEM_WB, LW)["result_sel"] == control.MEM_RD
+    assert control.expected(MEM_WB, LW)["reg_wren"] == 1
+    assert control.expected(DECODE, LW)["alu_src1_sel"] == control.PC_OLD
+    assert control.expected(DECODE, assemble_i_instruction(OP_JALR, 0, 1, 2, 4))["alu_src1_sel"] == control.RS1V
+    assert control.expected(ALU_WB, LW)["imm_ctrl"] == control.ITYPE
+
+
+def test_instruction_dependent_outputs():
+    sub = assemble_r_instruction(0b0100000, 0b000, 1, 2, 3)
+    assert control.expected(EXEC_R, sub)["alu_ctrl"] == control.SUB
+    # funct7[5] only means SUB for R-type; for I-type it is part of the immediate
+    assert control.funct_alu(assemble_i_instruction(OP_ITYPE, 0b000, 1, 2, -1)) == control.ADD
+    assert control.funct_alu(assemble_i_instruction(OP_ITYPE, 0b101, 1, 2, (0b0100000 << 5) | 3)) == control.SRA
+
+    assert control.expected(BRANCH, BEQ, control.EQUAL)["pc_en"] == 1
+    assert control.expected(BRANCH, BEQ, control.LESS)["pc_en"] == 0
+    assert control.expected(BRANCH, BEQ)["alu_ctrl"] == control.SLT
+    assert control.expected(BRANCH, BLTU, control.LESS)["pc_en"] == 1
+    assert control.expected(BRANCH, BLTU)["alu_ctrl"] == control.SLTU
+    assert control.expected(BRANCH, BEQ | (0b010 << 12), control.EQUAL)["pc_en"] == 0  # no such branch
+    assert control.expected(DECODE, OP_RTYPE)["alu_ctrl"] == control.ADD
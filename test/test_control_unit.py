@@ -5,10 +5,15 @@ from pathlib import Path
 import cocotb
 import random
 from cocotb.clock import Clock
-from cocotb.regression import F
 from cocotb.triggers import Timer
 from cocotb.triggers import RisingEdge, FallingEdge
-from cocotb_tools.runner import get_runner
+
+from icyrisc import control
+from icyrisc.buildcache import cached_build
+from icyrisc.fsm import STATE_NAMES
+from icyrisc.isa import OPCODES
+from icyrisc.perf import FsmModel
+from icyrisc.simulator import build_args, get_runner, sim_name
 
 from constants import *
 
@@ -422,15 +427,62 @@ async def test_imm_decoder(dut):
     await RisingEdge(dut.clk)
     assert dut.imm_ctrl.value == JTYPE
 
+def control_sweep():
+    """(inst, alu_comp) pairs: every funct3 / funct7[5] of every known opcode, every
+    alu_comp of the branches, and every other opcode once."""
+    rng = random.Random(0xC7)
+    sweep = []
+    for op in OPCODES:
+        for f3 in range(8):
+            for f7 in (0, 0b0100000):
+                inst = (f7 << 25) | (rng.getrandbits(10) << 15) | (f3 << 12) | (rng.getrandbits(5) << 7) | op
+                comps = (control.GREATER, control.EQUAL, control.LESS) if op == OP_BTYPE else (control.EQUAL,)
+                sweep += [(inst, comp) for comp in comps]
+    for op in range(128):
+        if op not in OPCODES:
+            sweep.append(((rng.getrandbits(25) << 7) | op, control.EQUAL))
+    return sweep
+
+@cocotb.test()
+async def test_control_table(dut):
+    """Runs control_sweep() back to back and checks every output in every state
+    against the icyrisc.control table, on the FSM paths parsed from fsm.sv."""
+    model = FsmModel()
+    dut.reset.value = 0
+    dut.inst.value = 0
+    dut.alu_comp.value = control.EQUAL
+    cocotb.start_soon(Clock(dut.clk, 80, unit="ns").start(start_high=False))
+    await RisingEdge(dut.clk)
+    dut.reset.value = 1
+    await RisingEdge(dut.clk)
+
+    for inst, comp in control_sweep():
+        await FallingEdge(dut.clk)
+        # FETCH: the instruction register loads at the end of this cycle
+        dut.inst.value = inst
+        dut.alu_comp.value = comp
+        await Timer(1, unit="ns")
+        for i, state in enumerate(model.path(inst)):
+            if i:
+                await FallingEdge(dut.clk)
+            where = f"{inst:#010x} (alu_comp {comp}) in {STATE_NAMES[state]}"
+            assert dut.f0.state.value == state, f"{where}: FSM in {STATE_NAMES[int(dut.f0.state.value)]}"
+            got = {name: int(getattr(dut, name).value) for name in control.OUTPUTS}
+            want = control.expected(state, inst, comp)
+            assert got == want, f"{where}: " + ", ".join(
+                f"{name} {got[name]} != {want[name]}" for name in control.OUTPUTS if got[name] != want[name])
+
 def test_control_unit():
-    sim = os.getenv("SIM", "icarus")
+    sim = sim_name()
     proj_path = Path(__file__).resolve().parent
-    sources = list((proj_path.parent / "src" / "control").glob("*.sv"))
+    # constants.sv first: its typedefs must be compiled before the modules using them
+    sources = [proj_path.parent / "src" / "control" / f for f in ("constants.sv", "fsm.sv", "control.sv")]
     runner = get_runner(sim)
-    runner.build(
+    cached_build(
+        runner,
         sources=sources,
+        build_args=build_args(sim),
         hdl_toplevel="control",
-        always=True,
         timescale=("1ns", "1ps")
     )
 
@@ -0,0 +1,307 @@
+# test_cosim.py
+import cocotb
+import os
+import random
+from pathlib import Path
+from cocotb.clock import Clock
+from cocotb.simtime import get_sim_time
+from cocotb.triggers import ClockCycles, RisingEdge, FallingEdge
+
+from icyrisc.asm import assemble, write_program
+from icyrisc.buildcache import cached_build
+from icyrisc.simulator import build_args, get_runner, sim_name, top_sources
+from icyrisc.checkpoint import fast_forward
+from icyrisc.harness.backdoor import Backdoor
+from icyrisc.harness.checkpoint import fast_forward_request, restore
+from icyrisc.harness.cosim import CosimChecker
+from icyrisc.harness.monitor import RetirementMonitor
+from icyrisc.harness.program import load_program, program_plusargs, program_prefix
+from icyrisc.harness.pwm import PwmMonitor, counts
+from icyrisc.harness.timers import TimerFastForward
+from icyrisc.harness.waves import Waves
+from icyrisc.isa import OP_LOAD, opcode
+from icyrisc.iss import Iss
+from icyrisc.memory import CYCLES_PER_MICRO, PWM_PERIOD
+from icyrisc.perf import FsmModel
+from icyrisc.rvgen import Config, programs
+from icyrisc.vcd import Vcd
+
+## RUNS EVERY //programs/*.s ON ONE BUILD, picking the image with +MEM_FILE_PATH_PREFIX
+PROGRAMS = Path(__file__).resolve().parent.parent / "programs"
+
+async def reset_core(dut):
+    """Starts the clock and releases SW (active-low reset) on a falling edge."""
+    dut.SW.value = 0
+    clock = Clock(dut.clk, 80, unit="ns")
+    cocotb.start_soon(clock.start(start_high=False))
+    await RisingEdge(dut.clk)
+    await FallingEdge(dut.clk)
+    dut.SW.value = 1
+
+@cocotb.test()
+async def test_program_lockstep(dut):
+    """Runs the program the simulator was started with in lockstep with the reference model,
+    stopping at the first divergence."""
+    prefix = program_prefix(str(PROGRAMS / "rv32i_test"))
+    model = Iss.from_memh(prefix)
+    request = fast_forward_request()
+    if request is None:
+        checker = CosimChecker(dut, model, full_check_every=8).start()
+        await reset_core(dut)
+    else:
+        # +FAST_FORWARD=<n> / +FAST_FORWARD_UNTIL=<pc>: the model runs the start-up
+        checkpoint = fast_forward(model, *request)
+        dut._log.info(f"fast-forwarded {checkpoint.retired} instructions to pc 0x{checkpoint.pc:08x}")
+        clock = Clock(dut.clk, 80, unit="ns")
+        cocotb.start_soon(clock.start(start_high=False))
+        checker = CosimChecker(dut, model, full_check_every=8).start()
+        await restore(dut, checkpoint)
+    await checker.run(64, timeout_cycles=64 * 6)
+
+@cocotb.test()
+async def test_fast_forward(dut):
+    """Runs the first half of a random program on the model, injects the checkpoint into
+    the RTL and finishes the program in lockstep."""
+    program = next(programs(int(cocotb.plusargs.get("RVGEN_SEED", random.getrandbits(31))), 1))
+    total = Iss(program.image).run()
+    model = Iss(program.image)
+    checkpoint = fast_forward(model, total // 2)
+
+    clock = Clock(dut.clk, 80, unit="ns")
+    cocotb.start_soon(clock.start(start_high=False))
+    checker = CosimChecker(dut, model, full_check_every=16).start()
+    await restore(dut, checkpoint)
+    await RisingEdge(dut.clk)
+    assert list(Backdoor(dut).read_registers()) == list(checkpoint.regs)
+    assert await Backdoor(dut).dump_image() == checkpoint.image
+    await checker.run(total, timeout_cycles=total * 6)
+    assert model.halted and checker.checked == total - total // 2
+
+@cocotb.test()
+async def test_random_programs(dut):
+    """Runs constrained-random programs (icyrisc.rvgen) in lockstep with the reference model.
+    +RVGEN_SEED picks the first seed (default: drawn from COCOTB_RANDOM_SEED) and
+    +RVGEN_PROGRAMS / +RVGEN_LENGTH how many programs of how many items."""
+    seed = int(cocotb.plusargs.get("RVGEN_SEED", random.getrandbits(31)))
+    count = int(cocotb.plusargs.get("RVGEN_PROGRAMS", 20))
+    config = Config(length=int(cocotb.plusargs.get("RVGEN_LENGTH", Config().length)))
+    dut._log.info(f"rvgen seeds {seed}..{seed + count - 1}")
+
+    clock = Clock(dut.clk, 80, unit="ns")
+    cocotb.start_soon(clock.start(start_high=False))
+    for program in programs(seed, count, config):
+        dut.SW.value = 0
+        await RisingEdge(dut.clk)
+        await load_program(dut, program.image)
+        checker = CosimChecker(dut, Iss(program.image), full_check_every=64).start()
+        await FallingEdge(dut.clk)
+        dut.SW.value = 1
+        try:
+            await checker.run(1_000_000, timeout_cycles=200_000)
+        except AssertionError as e:
+            raise AssertionError(f"rvgen seed {program.seed}: {e}") from e
+        finally:
+            checker.monitor.stop()
+
+@cocotb.test()
+async def test_cycle_model(dut):
+    """Checks the cycle model derived from fsm.sv against the FSM paths the RTL took
+    while running a random program."""
+    program = next(programs(int(cocotb.plusargs.get("RVGEN_SEED", random.getrandbits(31))), 1))
+    retired = []
+    checker = CosimChecker(dut, Iss(program.image))
+    checker.monitor.add_callback(retired.append)
+    checker.start()
+    await reset_core(dut)
+    await checker.run(100_000, timeout_cycles=100_000)
+
+    model = FsmModel()
+    validation = model.validate(retired)
+    prediction = model.predict_words([r.inst for r in retired], reset=False)
+    dut._log.info(f"{validation.instructions} instructions: predicted {validation.predicted} cycles, "
+                  f"measured {validation.measured}, CPI {prediction.cpi:.3f}")
+    assert not validation.mismatches, validation.mismatches[:5]
+    assert prediction.cycles == validation.predicted == validation.measured
+
+MMIO_LOADS = """
+        li   t0, 0x80402010
+        sw   t0, -4(zero)    # leds
+        lw   a0, -4(zero)
+        lhu  a1, -2(zero)
+        lb   a2, -1(zero)
+        lw   a3, -12(zero)   # micros
+        li   t1, 100
+    delay:
+        addi t1, t1, -1
+        bnez t1, delay
+        lw   a4, -12(zero)
+        lw   a5, -8(zero)    # millis
+    done:
+        j done
+"""
+
+@cocotb.test()
+async def test_mmio_loads(dut):
+    """Loads leds back at every width in lockstep with the model, and reads micros
+    across a delay loop: loads must see the peripheral, not stale lane data."""
+    clock = Clock(dut.clk, 80, unit="ns")
+    cocotb.start_soon(clock.start(start_high=False))
+    dut.SW.value = 0
+    await RisingEdge(dut.clk)
+    program = assemble(MMIO_LOADS)
+    await load_program(dut, program.image)
+    model = Iss(program.image)
+    checker = CosimChecker(dut, model, full_check_every=1).start()
+    await FallingEdge(dut.clk)
+    dut.SW.value = 1
+    await checker.run(1000, timeout_cycles=5000)
+    assert model.halted
+    regs = [int(reg.value) for reg in checker.monitor.regs]
+    assert regs[10:13] == [0x80402010, 0x8040, 0xFFFFFF80]
+    # the cycle model's count from the first micros read to the second
+    steps = []
+    replay = Iss(program.image)
+    while not replay.halted:
+        steps.append(replay.step())
+    first, second = (next(i for i, s in enumerate(steps) if s.rd == rd and opcode(s.inst) == OP_LOAD) for rd in (13, 14))
+    between = FsmModel().predict_words([s.inst for s in steps[first:second]], reset=False).cycles
+    assert regs[13] > 0 and abs((regs[14] - regs[13]) - between / CYCLES_PER_MICRO) <= 1
+    assert regs[15] == int(dut.mem0.millis.value) == 0
+
+WAIT_50MS = """
+        lw   t1, -8(zero)    # millis
+        addi t1, t1, 50
+    wait:
+        lw   t0, -8(zero)
+        bltu t0, t1, wait
+        li   t2, 0xFF
+        sw   t2, -4(zero)    # leds
+    done:
+        j done
+"""
+
+@cocotb.test()
+async def test_timer_fast_forward(dut):
+    """Waits 50 ms on millis with the timers fast-forwarded: the program must reach
+    its leds store within a few hundred cycles instead of 600000."""
+    clock = Clock(dut.clk, 80, unit="ns")
+    cocotb.start_soon(clock.start(start_high=False))
+    dut.SW.value = 0
+    await RisingEdge(dut.clk)
+    await load_program(dut, assemble(WAIT_50MS).image)
+    monitor = RetirementMonitor(dut)
+    timers = monitor.timers or TimerFastForward(dut, monitor)
+    monitor.start()
+    await FallingEdge(dut.clk)
+    dut.SW.value = 1
+    for _ in range(1000):
+        await FallingEdge(dut.clk)
+        if int(dut.mem0.leds.value) == 0xFF:
+            break
+    monitor.stop()
+    dut._log.info(f"jumps {timers.jumps}, {timers.skipped} cycles skipped")
+    assert timers.jumps, "no timer polling loop was seen: do millis loads return the peripheral?"
+    assert int(dut.mem0.leds.value) == 0xFF, "the wait loop did not exit"
+    assert int(dut.mem0.millis.value) >= 50
+    assert timers.skipped > 49 * 12_000
+
+LED_SEQUENCE = """
+        li   t0, 0x80402010
+        sw   t0, -4(zero)    # leds: LED 0x80, red 0x40, green 0x20, blue 0x10
+        li   t1, 2000
+    delay:
+        addi t1, t1, -1
+        bnez t1, delay
+        li   t0, 0x00FF0001
+        sw   t0, -4(zero)
+    done:
+        j done
+"""
+
+@cocotb.test()
+async def test_pwm_outputs(dut):
+    """Decodes the LED / RGB pins while a program changes leds and checks the duty
+    bytes recovered from the edges."""
+    clock = Clock(dut.clk, 80, unit="ns")
+    cocotb.start_soon(clock.start(start_high=False))
+    dut.SW.value = 0
+    await RisingEdge(dut.clk)
+    await load_program(dut, assemble(LED_SEQUENCE).image)
+    pwm = PwmMonitor(dut, clock_period=80_000).start()
+    await FallingEdge(dut.clk)
+    dut.SW.value = 1
+    await ClockCycles(dut.clk, 30_000)
+    pwm.stop()
+    decoded = {channel: pwm.series(channel) for channel in pwm.decoders}
+    dut._log.info(f"decoded duty bytes {({c: [counts(s.duty) for s in d] for c, d in decoded.items()})}")
+    # each store can land mid-period and leave one bogus period behind (blue
+    # falling early from 0x10 towards 0x01); the values the program set hold
+    # for thousands of cycles
+    now = int(get_sim_time("ps"))
+    steady = {channel: [counts(s.duty) for s, end in zip(series, [s.time for s in series[1:]] + [now])
+                        if end - s.time >= 2 * PWM_PERIOD * 80_000]
+              for channel, series in decoded.items()}
+    assert steady == {"led": [0x80, 0], "red": [0x40, 0xFF], "green": [0x20, 0], "blue": [0x10, 0x01]}
+
+@cocotb.test()
+async def test_waves_window(dut):
+    """Writes the rolling window of the key signals and reads it back: every
+    signal keeps the width of its handle."""
+    clock = Clock(dut.clk, 80, unit="ns")
+    cocotb.start_soon(clock.start(start_high=False))
+    dut.SW.value = 0
+    await RisingEdge(dut.clk)
+    await load_program(dut, assemble(LED_SEQUENCE).image)
+    waves = Waves(dut, name="window", after=0).start()
+    await FallingEdge(dut.clk)
+    dut.SW.value = 1
+    await ClockCycles(dut.clk, 100)
+    vcd = Vcd(waves.trigger("test_waves_window"))
+    waves.stop()
+    assert vcd.find("c0.f0.state").width == len(dut.c0.f0.state) == 32
+    for name, handle in zip(waves.signals, waves.handles):
+        assert vcd.find(name).width == len(handle), name
+    states = {value for _, _, value in vcd.changes("c0.f0.state")}
+    assert len(states) > 4 and None not in states
+
+def test_cosim():
+    sim = sim_name()
+    proj_path = Path(__file__).resolve().parent.parent
+
+    runner = get_runner(sim)
+    cached_build(
+        runner,
+        hdl_toplevel="top",
+        timescale=("10ns", "1ps"),
+        sources=top_sources(),
+        build_args=build_args(sim),
+    )
+
+    for source in sorted(PROGRAMS.glob("*.s")):
+        test_dir = proj_path / "sim_build" / "cosim" / source.stem
+        test_dir.mkdir(parents=True, exist_ok=True)
+        prefix = test_dir / source.stem
+        write_program(assemble(source.read_text()), prefix)
+        runner.test(
+            hdl_toplevel="top",
+            test_module="test_cosim",
+            timescale=("10ns", "1ps"),
+            hdl_toplevel_lang="verilog",
+            test_dir=test_dir,
+            testcase="test_program_lockstep",
+            plusargs=program_plusargs(prefix),
+        )
+
+    runner.test(
+        hdl_toplevel="top",
+        test_module="test_cosim",
+        timescale=("10ns", "1ps"),
+        hdl_toplevel_lang="verilog",
+        test_dir=proj_path / "sim_build" / "cosim" / "rvgen",
+        testcase=["test_random_programs", "test_fast_forward", "test_cycle_model", "test_mmio_loads", "test_timer_fast_forward",
+                  "test_pwm_outputs", "test_waves_window"],
+        plusargs=[f"+RVGEN_PROGRAMS={os.getenv('RVGEN_PROGRAMS', 20)}"],
+    )
+
+if __name__ == "__main__":
+    test_cosim()
@@ -0,0 +1,85 @@
+# test_coverage.py
+from icyrisc.asm import assemble
+from icyrisc.coverage import GOAL_INSTRUCTIONS, LEGAL_TRANSITIONS, SLOTS, Coverage
+from icyrisc.fsm import (
+    ALU_WB,
+    BRANCH,
+    DECODE,
+    EXEC_I,
+    EXEC_LUI,
+    EXEC_R,
+    FETCH,
+    JUMP,
+    MEM_ADDR,
+    MEM_READ,
+    MEM_WB,
+    MEM_WRITE,
+    STORE_COOLDOWN,
+)
+from icyrisc.harness.monitor import Retired
+from icyrisc.isa import OP_AUIPC, OP_BTYPE, OP_ITYPE, OP_JAL, OP_JALR, OP_LOAD, OP_LUI, OP_RTYPE, OP_STYPE
+from icyrisc.iss import Iss
+from icyrisc.rvgen import programs
+
+# FSM path of each opcode, as fsm.sv walks it
+PATHS = {
+    OP_RTYPE: (FETCH, DECODE, EXEC_R, ALU_WB),
+    OP_ITYPE: (FETCH, DECODE, EXEC_I, ALU_WB),
+    OP_LUI: (FETCH, DECODE, EXEC_LUI, ALU_WB),
+    OP_AUIPC: (FETCH, DECODE, ALU_WB),
+    OP_LOAD: (FETCH, DECODE, MEM_ADDR, MEM_READ, MEM_WB),
+    OP_STYPE: (FETCH, DECODE, MEM_ADDR, MEM_WRITE, STORE_COOLDOWN),
+    OP_BTYPE: (FETCH, DECODE, BRANCH),
+    OP_JAL: (FETCH, DECODE, JUMP, ALU_WB),
+    OP_JALR: (FETCH, DECODE, JUMP, ALU_WB),
+}
+
+
+def retire(step):
+    path = PATHS.get(step.inst & 0x7F, (FETCH, DECODE))
+    return Retired(step.pc, step.inst, step.next_pc, step.rd, step.rd_value, step.store, 0, path, 0)
+
+
+def sample_program(source, steps=500):
+    cov = Coverage()
+    iss = Iss(assemble(source).image)
+    for _ in range(steps):
+        cov.sample(retire(iss.step()))
+        if iss.halted:
+            break
+    return cov
+
+
+def test_random_programs_cover_the_fsm():
+    cov = Coverage()
+    for program in programs(0, 5):
+        cov += sample_program(program.source, steps=10_000)
+    assert cov.transition_holes() == [(DECODE, FETCH)]  # rvgen never emits unknown opcodes
+    assert cov.illegal() == ([], [])
+    assert cov.instruction_holes() == []
+    assert cov.transitions[FETCH, DECODE] == cov.samples
+    assert f"{cov.samples} instructions sampled" in cov.report()
+
+
+def test_unknown_opcode_and_encoding():
+    cov = Coverage()
+    cov.sample(Retired(0, 0x0000000F, 4, None, None, None, 0, (FETCH, DECODE), 0))  # fence
+    cov.sample(Retired(4, 0x02000033, 8, 0, 0, None, 0, PATHS[OP_RTYPE], 0))  # mul: funct7 1
+    assert cov.transition_holes() != [] and (DECODE, FETCH) not in cov.transition_holes()
+    transitions, encodings = cov.illegal()
+    assert transitions == []
+    assert (SLOTS[OP_RTYPE], 0, 1) in encodings and (len(SLOTS), 0, 0) in encodings
+
+
+def test_merge_adds_databases(tmp_path):
+    a = sample_program("addi a0, a0, 1\nj .\n")
+    b = sample_program("sw a0, 64(x0)\nlw a1, 64(x0)\nj .\n")
+    a.save(tmp_path / "a.npz")
+    b.save(tmp_path / "b.npz")
+    merged = Coverage.merge([tmp_path / "a.npz", tmp_path / "b.npz", tmp_path / "missing.npz"], tmp_path / "all.npz")
+    assert merged.samples == a.samples + b.samples
+    loaded = Coverage.load(tmp_path / "all.npz")
+    assert (loaded.transitions == a.transitions + b.transitions).all()
+    assert (loaded.instructions == a.instructions + b.instructions).all()
+    assert {"addi", "sw", "lw", "jal"} <= set(GOAL_INSTRUCTIONS.values()) - set(loaded.instruction_holes())
+    assert len(LEGAL_TRANSITIONS) - len(loaded.transition_holes()) == 13
@@ -3,7 +3,9 @@ import os
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, FallingEdge
 from cocotb.triggers import Timer
-from cocotb_tools.runner import get_runner
+
+from icyrisc.buildcache import cached_build
+from icyrisc.simulator import build_args, get_runner, sim_name
 
 from pathlib import Path
 @cocotb.test()
@@ -32,14 +34,15 @@ async def test_inst_register_simple(dut):
     assert dut.inst.value == 2
 
 def test_inst_register():
-    sim = os.getenv("SIM", "icarus")
+    sim = sim_name()
     proj_path = Path(__file__).resolve().parent
     sources = list((proj_path.parent / "src").glob("inst_register.sv"))
     runner = get_runner(sim)
-    runner.build(
+    cached_build(
+        runner,
         sources=sources,
+        build_args=build_args(sim),
         hdl_toplevel="inst_register",
-        always=True,
         timescale=("1ns", "1ps")
     )
 
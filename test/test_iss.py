@@ -0,0 +1,127 @@
+# test_iss.py
+import re
+from pathlib import Path
+
+from icyrisc.asm import assemble_b_instruction, assemble_i_instruction, assemble_jalr_instruction, assemble_s_instruction
+from icyrisc.iss import Iss
+from icyrisc.memimage import MEM_BYTES
+
+from constants import *
+
+PROGRAMS = Path(__file__).resolve().parent.parent / "programs"
+
+
+def make_iss(program):
+    """Places program words at address 0 of an empty memory."""
+    iss = Iss()
+    for i, inst in enumerate(program):
+        iss.words[i] = inst
+    return iss
+
+
+def test_rv32i_test_program():
+    """Runs programs/rv32i_test and checks every `xN = 0x...` annotation in the source."""
+    iss = Iss.from_memh(PROGRAMS / "rv32i_test")
+    for line in (PROGRAMS / "rv32i_test.s").read_text().splitlines():
+        match = re.search(r"pc = (0x[0-9A-Fa-f]+), x(\d+) = (0x[0-9A-Fa-f]+)", line)
+        if match is None:
+            continue
+        pc, rd, expected = int(match[1], 16), int(match[2]), int(match[3], 16)
+        assert iss.pc == pc
+        iss.step()
+        assert iss.regs[rd] == expected, f"x{rd}: got {iss.regs[rd]:#010x}, expected {expected:#010x}"
+
+
+def test_loads_match_test_mem():
+    """Mirrors the expectations of test_load_store.py on programs/test_mem."""
+    iss = Iss.from_memh(PROGRAMS / "test_mem")
+    iss.regs[11] = 0x42
+    program = [
+        assemble_i_instruction(OP_LOAD, 0b010, 10, 11, -2),  # lw  x10, -2(x11)
+        assemble_i_instruction(OP_LOAD, 0b001, 12, 11, 0),  # lh  x12, 0(x11)
+        assemble_i_instruction(OP_LOAD, 0b000, 13, 11, 0),  # lb  x13, 0(x11)
+        assemble_i_instruction(OP_LOAD, 0b000, 14, 11, 5),  # lb  x14, 5(x11)
+        assemble_i_instruction(OP_LOAD, 0b100, 15, 11, 5),  # lbu x15, 5(x11)
+        assemble_i_instruction(OP_LOAD, 0b101, 16, 11, 4),  # lhu x16, 4(x11)
+    ]
+    for i, inst in enumerate(program):
+        iss.words[i] = inst
+    iss.run(len(program))
+    assert iss.regs[10] == 0x12345678
+    assert iss.regs[12] == 0x1234
+    assert iss.regs[13] == 0x34
+    assert iss.regs[14] == 0xFFFFFF87
+    assert iss.regs[15] == 0x87
+    assert iss.regs[16] == 0x8765
+
+
+def test_stores_and_step_report():
+    iss = make_iss([
+        assemble_s_instruction(0b010, 1, 2, 0x10),  # sw x2, 16(x1)
+        assemble_s_instruction(0b001, 1, 3, 0x16),  # sh x3, 22(x1)
+        assemble_s_instruction(0b000, 1, 3, 0x11),  # sb x3, 17(x1)
+    ])
+    iss.regs[1] = 0x100
+    iss.regs[2] = 0xDEADBEEF
+    iss.regs[3] = 0xABCD
+    result = iss.step()
+    assert result.store == (0x110, 0xDEADBEEF, 0b010)
+    assert result.rd is None
+    iss.run(2)
+    assert iss.load_word(0x110) == 0xDEADCDEF
+    assert iss.load_word(0x114) == 0xABCD0000
+
+
+def test_out_of_range_memory_reads_zero():
+    iss = make_iss([
+        assemble_s_instruction(0b010, 1, 2, 0),  # sw x2, 0(x1)
+        assemble_i_instruction(OP_LOAD, 0b010, 3, 1, 0),  # lw x3, 0(x1)
+    ])
+    iss.regs[1] = MEM_BYTES
+    iss.regs[2] = 0x12345678
+    iss.regs[3] = 0xFFFFFFFF
+    iss.run(2)
+    assert iss.regs[3] == 0
+
+
+def test_branches_and_halt():
+    # x1 counts down from 3; bne loops back until zero, then `beq x0, x0, 0` halts
+    iss = make_iss([
+        assemble_i_instruction(OP_ITYPE, 0b000, 1, 1, -1),  # addi x1, x1, -1
+        assemble_b_instruction(0b001, 1, 0, -4),  # bne x1, x0, -4
+        assemble_b_instruction(0b000, 0, 0, 0),  # beq x0, x0, 0
+    ])
+    iss.regs[1] = 3
+    assert iss.run(100) == 7
+    assert iss.halted
+    assert iss.pc == 8
+    assert iss.regs[1] == 0
+
+
+def test_x0_is_hardwired():
+    iss = make_iss([assemble_i_instruction(OP_ITYPE, 0b000, 0, 0, 5)])  # addi x0, x0, 5
+    result = iss.step()
+    assert result.rd == 0 and result.rd_value == 0
+    assert iss.regs[0] == 0
+
+
+def test_unknown_opcode_is_nop():
+    iss = make_iss([0x0000000F, 0x00000073])  # fence, ecall
+    iss.run(2)
+    assert iss.pc == 8
+    assert iss.registers == [0] * 32
+
+
+def test_jalr_keeps_bit_0_like_the_rtl():
+    # the ISA clears bit 0 of a JALR target; top.sv loads the ALU sum as is
+    iss = make_iss([
+        assemble_jalr_instruction(1, 2, 0x10),  # jalr x1, 16(x2)
+        0, 0, 0, 0,
+        assemble_i_instruction(OP_ITYPE, 0b000, 3, 0, 7),  # addi x3, x0, 7 at 0x14
+    ])
+    iss.regs[2] = 0x5
+    result = iss.step()
+    assert result.next_pc == 0x15 and iss.regs[1] == 4
+    result = iss.step()  # fetched from 0x14: memory.sv ignores pc[1:0]
+    assert result.inst == iss.words[5] and iss.regs[3] == 7
+    assert result.next_pc == 0x19
@@ -5,23 +5,19 @@ from pathlib import Path
 import cocotb
 import random
 from cocotb.clock import Clock
-from cocotb.regression import F
 from cocotb.triggers import Timer
 from cocotb.triggers import RisingEdge, FallingEdge
-from cocotb_tools.runner import cocotb_tools, get_runner
-from cocotb.types import Array
 
+from icyrisc.asm import assemble_i_instruction
+from icyrisc.buildcache import cached_build
+from icyrisc.simulator import build_args, get_runner, sim_name, top_sources
+from icyrisc.harness.backdoor import Backdoor
+from icyrisc.harness.vectors import Vector, VectorRunner
 from constants import *
 
-def assemble_i_instruction(funct3, rd, rs1, imm):
-    """Assembles an I-type instruction."""
-    return (imm & 0xFFF) << 20 | (rs1 & 0x1F) << 15 | (funct3 & 0x7) << 12 | (rd & 0x1F) << 7 | (OP_ITYPE & 0x7F)
-
 async def initialize_register(dut, reg_index, value):
-    """Initializes a specific register in the register file."""
-    current_registers = list(dut.reg0.register_file.value)
-    current_registers[reg_index] = value
-    dut.reg0.register_file.value = Array(current_registers)
+    """Initializes a specific register in the register file through the backdoor."""
+    Backdoor(dut).write_register(reg_index, value)
 
 async def run_itype_test(dut, inst, reg_index, expected):
     dut.SW.value = 0
@@ -41,8 +37,8 @@ async def run_itype_test(dut, inst, reg_index, expected):
 
     await FallingEdge(dut.clk)  # wait a bit so the last cycle registers
 
-    reg = dut.reg0.register_file.value[reg_index]
-    print(f"Got {hex(reg)}, Expected {hex(expected)}")
+    reg = dut.reg0.register_file[reg_index].value
+    dut._log.debug("Got 0x%X, Expected 0x%X", int(reg), expected)
     assert reg == expected
 
 
@@ -54,7 +50,7 @@ async def test_addi(dut):
     await initialize_register(dut, rs1, rs1_val)
 
     imm = 0x000000FF
-    inst = assemble_i_instruction(0b000, rd, rs1, imm)
+    inst = assemble_i_instruction(OP_ITYPE, 0b000, rd, rs1, imm)
     expected_result = (rs1_val + imm) & 0xFFFFFFFF
     await run_itype_test(dut, inst, rd, expected_result)
 
@@ -65,7 +61,7 @@ async def test_slli(dut):
     rs1 = 6
     shamt = 10
     imm = (0b0000000 << 5) | shamt  # funct7 (for SLLI) << 5 | shamt
-    inst = assemble_i_instruction(0b001, rd, rs1, imm)
+    inst = assemble_i_instruction(OP_ITYPE, 0b001, rd, rs1, imm)
     await initialize_register(dut, rs1, 0x00000005)
     expected_result = (0x00000005 << shamt) & 0xFFFFFFFF
     await run_itype_test(dut, inst, rd, expected_result)
@@ -76,7 +72,7 @@ async def test_slti(dut):
     rd = 7
     rs1 = 8
     imm = -12
-    inst = assemble_i_instruction(0b010, rd, rs1, imm)
+    inst = assemble_i_instruction(OP_ITYPE, 0b010, rd, rs1, imm)
     await initialize_register(dut, rs1, -15)
     expected_result = 1 if -15 < imm else 0
     await run_itype_test(dut, inst, rd, expected_result)
@@ -87,7 +83,7 @@ async def test_sltui(dut):
     rd = 9
     rs1 = 10
     imm = 10
-    inst = assemble_i_instruction(0b011, rd, rs1, imm)
+    inst = assemble_i_instruction(OP_ITYPE, 0b011, rd, rs1, imm)
     await initialize_register(dut, rs1, 5)
     expected_result = 1 if (5 & 0xFFFFFFFF) < (imm & 0xFFFFFFFF) else 0
     await run_itype_test(dut, inst, rd, expected_result)
@@ -98,7 +94,7 @@ async def test_xori(dut):
     rd = 11
     rs1 = 12
     imm = 0xFFFFFF0F  # sign extended
-    inst = assemble_i_instruction(0b100, rd, rs1, imm)
+    inst = assemble_i_instruction(OP_ITYPE, 0b100, rd, rs1, imm)
     await initialize_register(dut, rs1, 0x12345678)
     expected_result = (0x12345678 ^ imm) & 0xFFFFFFFF
     await run_itype_test(dut, inst, rd, expected_result)
@@ -110,7 +106,7 @@ async def test_srli(dut):
     rs1 = 14
     shamt = 8
     imm = (0b0000000 << 5) | shamt  # funct7 (for SRLI) << 5 | shamt
-    inst = assemble_i_instruction(0b101, rd, rs1, imm)
+    inst = assemble_i_instruction(OP_ITYPE, 0b101, rd, rs1, imm)
     await initialize_register(dut, rs1, 0x0000FF00)
     expected_result = (0x0000FF00 >> shamt) & 0xFFFFFFFF
     await run_itype_test(dut, inst, rd, expected_result)
@@ -122,7 +118,7 @@ async def test_srai(dut):
     rs1 = 16
     shamt = 8
     imm = (0b0100000 << 5) | shamt  # funct7 (for SRAI) << 5 | shamt
-    inst = assemble_i_instruction(0b101, rd, rs1, imm)
+    inst = assemble_i_instruction(OP_ITYPE, 0b101, rd, rs1, imm)
     await initialize_register(dut, rs1, 0xFFFFFE00)  # Negative number
     # shift manually bc python doesn't like 2s complement
     expected_result = 0xFFFFFFFE
@@ -134,7 +130,7 @@ async def test_ori(dut):
     rd = 17
     rs1 = 18
     imm = 0x000000F0
-    inst = assemble_i_instruction(0b110, rd, rs1, imm)
+    inst = assemble_i_instruction(OP_ITYPE, 0b110, rd, rs1, imm)
     await initialize_register(dut, rs1, 0x12340005)
     expected_result = (0x12340005 | imm) & 0xFFFFFFFF
     await run_itype_test(dut, inst, rd, expected_result)
@@ -145,29 +141,46 @@ async def test_andi(dut):
     rd = 19
     rs1 = 20
     imm = 0x000000FF
-    inst = assemble_i_instruction(0b111, rd, rs1, imm)
+    inst = assemble_i_instruction(OP_ITYPE, 0b111, rd, rs1, imm)
     await initialize_register(dut, rs1, 0xAABBCCDD)
     expected_result = (0xAABBCCDD & imm) & 0xFFFFFFFF
     await run_itype_test(dut, inst, rd, expected_result)
 
+@cocotb.test()
+async def test_itype_batch(dut):
+    """Streams 1000 random I-type vectors through a single reset, checked against the reference model."""
+    cocotb.start_soon(Clock(dut.clk, 80, unit="ns").start(start_high=False))
+    rng = random.Random(0x5EED)
+    vectors = []
+    for _ in range(1000):
+        funct3 = rng.randrange(8)
+        if funct3 == 0b001:
+            imm = rng.randrange(32)  # SLLI
+        elif funct3 == 0b101:
+            imm = rng.choice([0, 0b0100000 << 5]) | rng.randrange(32)  # SRLI / SRAI
+        else:
+            imm = rng.randrange(-2048, 2048)
+        rd, rs1 = rng.randrange(1, 32), rng.randrange(1, 32)
+        inst = assemble_i_instruction(OP_ITYPE, funct3, rd, rs1, imm)
+        vectors.append(Vector(inst, {rs1: rng.getrandbits(32)}))
+    await VectorRunner(dut).run(vectors, timeout_cycles=6 * len(vectors))
+
 def test_itype():
-    sim = os.getenv("SIM", "icarus")
-    proj_path = Path(__file__).resolve().parent.parent
-    os.environ["PROJ_ROOT"] = str(proj_path)
-    sources = str(proj_path / "top.f")
+    sim = sim_name()
 
     runner = get_runner(sim)
-    runner.build(
+    cached_build(
+        runner,
         hdl_toplevel="top",
-        always=True,
-        timescale=("1ns", "1ps"),
-        build_args=["-f", sources],
+        timescale=("10ns", "1ps"),
+        sources=top_sources(),
+        build_args=build_args(sim),
     )
 
     runner.test(
         hdl_toplevel="top",
         test_module="test_itype,",
-        timescale=("1ns", "1ps"),
+        timescale=("10ns", "1ps"),
         hdl_toplevel_lang="verilog",
     )
 
@@ -4,29 +4,16 @@ import os
 from pathlib import Path
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, FallingEdge
-from cocotb.types import Array
-from cocotb_tools.runner import get_runner
 
+from icyrisc.asm import assemble_jal_instruction, assemble_jalr_instruction
+from icyrisc.buildcache import cached_build
+from icyrisc.simulator import build_args, get_runner, sim_name, top_sources
+from icyrisc.harness.backdoor import Backdoor
 from constants import OP_JAL, OP_JALR
 
-def assemble_jal_instruction(rd, imm):
-    """Assembles a JAL (Jump and Link) instruction."""
-    j_imm20 = (imm >> 20) & 0x1
-    j_imm10_1 = (imm >> 1) & 0x3FF
-    j_imm11 = (imm >> 11) & 0x1
-    j_imm19_12 = (imm >> 12) & 0xFF
-    return (j_imm20 << 31) | (j_imm19_12 << 12) | (j_imm11 << 20) | (j_imm10_1 << 21) | (rd << 7) | (OP_JAL << 0)
-
-def assemble_jalr_instruction(rd, rs1, imm):
-    """Assembles a JALR (Jump and Link Register) instruction."""
-    funct3 = 0b000
-    return (imm & 0xFFF) << 20 | (rs1 & 0x1F) << 15 | (funct3 & 0x7) << 12 | (rd & 0x1F) << 7 | (OP_JALR & 0x7F)
-
 async def initialize_register(dut, reg_index, value):
-    """Initializes a specific register in the register file."""
-    current_registers = list(dut.reg0.register_file.value)
-    current_registers[reg_index] = value
-    dut.reg0.register_file.value = Array(current_registers)
+    """Initializes a specific register in the register file through the backdoor."""
+    Backdoor(dut).write_register(reg_index, value)
 
 async def run_jump_test(dut, inst, rd_index, expected_rd_value, expected_pc_offset):
     """Runs a single jump instruction test."""
@@ -48,14 +35,11 @@ async def run_jump_test(dut, inst, rd_index, expected_rd_value, expected_pc_offs
     actual_pc_offset = int(dut.pc.value) - int(dut.pc_old.value)
 
     await FallingEdge(dut.clk)
-    print(f"Jump Target Offset: 0x{int(dut.pc.value):08X}")
-    print(f"PC after Jump: 0x{int(dut.pc.value):08X}")
-    print(f"Value written to rd: 0x{int(dut.reg0.register_file.value[rd_index]):08X}")
+    actual_rd_value = int(dut.reg0.register_file[rd_index].value)
+    dut._log.debug("PC after Jump: 0x%08X", int(dut.pc.value))
 
-    actual_rd_value = int(dut.reg0.register_file.value[rd_index])
-
-    print(f"Got rd = 0x{actual_rd_value:08X}, Expected rd = 0x{expected_rd_value:08X}")
-    print(f"Got PC Offset = 0x{actual_pc_offset:08X}, Expected PC Offset = 0x{expected_pc_offset:08X}")
+    dut._log.debug("Got rd = 0x%08X, Expected rd = 0x%08X", actual_rd_value, expected_rd_value)
+    dut._log.debug("Got PC Offset = 0x%08X, Expected PC Offset = 0x%08X", actual_pc_offset, expected_pc_offset)
 
     assert actual_rd_value == expected_rd_value
     assert actual_pc_offset == expected_pc_offset
@@ -106,18 +90,28 @@ async def test_jalr_zero_offset(dut):
     expected_pc_offset = rs1_val
     await run_jump_test(dut, inst, rd, expected_rd_value & 0xFFFFFFFF, expected_pc_offset)
 
+@cocotb.test()
+async def test_jalr_odd_target(dut):
+    """JALR keeps bit 0 of its target: the ISA clears it, but JUMP loads the ALU sum
+    into the pc unmodified (icyrisc.iss models the core, not the ISA)."""
+    rd = 7
+    rs1 = 8
+    imm = 0x10
+    rs1_val = 0x00000021
+    await initialize_register(dut, rs1, rs1_val)
+    inst = assemble_jalr_instruction(rd, rs1, imm)
+    await run_jump_test(dut, inst, rd, 4, rs1_val + imm)
+
 def test_jump():
-    sim = os.getenv("SIM", "icarus")
-    proj_path = Path(__file__).resolve().parent.parent
-    os.environ["PROJ_ROOT"] = str(proj_path)
-    sources = str(proj_path / "top.f")
+    sim = sim_name()
 
     runner = get_runner(sim)
-    runner.build(
+    cached_build(
+        runner,
         hdl_toplevel="top",
-        always=True,
         timescale=("10ns", "1ps"),
-        build_args=["-f", sources],
+        sources=top_sources(),
+        build_args=build_args(sim),
     )
 
     runner.test(
@@ -5,9 +5,15 @@ from pathlib import Path
 import random
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, FallingEdge
-from cocotb.types import Array
-from cocotb_tools.runner import get_runner
 
+from icyrisc.asm import assemble_i_instruction, assemble_s_instruction
+from icyrisc.buildcache import cached_build
+from icyrisc.simulator import build_args, get_runner, sim_name, top_sources
+from icyrisc.harness.backdoor import Backdoor
+from icyrisc.harness.program import program_plusargs
+from icyrisc.harness.vectors import Vector, VectorRunner
+from icyrisc.iss import Iss
+from icyrisc.memimage import MEM_BYTES
 from constants import *
 FUNCT3_WORD = 0b010
 FUNCT3_HALF = 0b001
@@ -23,22 +29,9 @@ FUNCT3_BYTE_UNSIGNED = 0b100
 # 0x43 0xBEEFDEAD
 
 
-def assemble_i_instruction(opcode, funct3, rd, rs1, imm):
-    """Assembles an I-type instruction (used for loads)."""
-    return (imm & 0xFFF) << 20 | (rs1 & 0x1F) << 15 | (funct3 & 0x7) << 12 | (rd & 0x1F) << 7 | (opcode & 0x7F)
-
-def assemble_s_instruction(funct3, rs1, rs2, imm):
-    """Assembles an S-type instruction (used for stores)."""
-    imm12_5 = (imm >> 5) & 0x7F
-    imm4_0 = imm & 0x1F
-    return (imm12_5 << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) | (imm4_0 << 7) | OP_STYPE
-
 async def initialize_registers(dut, reg_indexes, values):
-    """Initializes a specific register in the register file."""
-    current_registers = list(dut.reg0.register_file.value)
-    for reg_index, value in zip(reg_indexes, values):
-        current_registers[reg_index] = value
-    dut.reg0.register_file.value = Array(current_registers)
+    """Initializes specific registers in the register file through the backdoor."""
+    Backdoor(dut).write_registers(dict(zip(reg_indexes, values)))
 
 async def run_store_test(dut, inst):
     """Runs a single store instruction test."""
@@ -56,10 +49,10 @@ async def run_store_test(dut, inst):
     await RisingEdge(dut.clk)  # DECODE
     await RisingEdge(dut.clk)  # MEM_ADDR (Address calculation)
     await FallingEdge(dut.clk)
-    print(f"Store Address: 0x{int(dut.alu0.ALU_result.value):08X}")
+    dut._log.debug("Store Address: 0x%08X", int(dut.alu0.ALU_result.value))
     await RisingEdge(dut.clk)  # MEM_STORE
     await FallingEdge(dut.clk)
-    print(f"Stored Data: 0x{int(dut.mem0.write_data.value):08X}")
+    dut._log.debug("Stored Data: 0x%08X", int(dut.mem0.write_data.value))
     await RisingEdge(dut.clk)  # FETCH
     await FallingEdge(dut.clk)
 
@@ -82,16 +75,16 @@ async def run_load_test(dut, inst, rd_index, expected_data):
     await RisingEdge(dut.clk)  # MEM_ADDR
     await RisingEdge(dut.clk)  # MEM_LOAD
     await FallingEdge(dut.clk)
-    print(f"Load Address: 0x{int(dut.mem0.read_address.value):08X}")
+    dut._log.debug("Load Address: 0x%08X", int(dut.mem0.read_address.value))
     await RisingEdge(dut.clk)  # MEM_WB
     await FallingEdge(dut.clk)
-    print(f"Loaded Data: 0x{int(dut.mem0.read_data.value):08X}")
+    dut._log.debug("Loaded Data: 0x%08X", int(dut.mem0.read_data.value))
     await RisingEdge(dut.clk)  # FETCH
 
     await FallingEdge(dut.clk)  # wait a bit so the last cycle registers
 
-    actual_data = dut.reg0.register_file.value[rd_index]
-    print(f"Got 0x{int(actual_data):08X}, Expected 0x{expected_data:08X}")
+    actual_data = dut.reg0.register_file[rd_index].value
+    dut._log.debug("Got 0x%08X, Expected 0x%08X", int(actual_data), expected_data)
     assert actual_data == expected_data
 
 
@@ -216,20 +209,52 @@ async def test_sw_offset(dut):
     inst = assemble_i_instruction(OP_LOAD, FUNCT3_WORD, 19, rs1, imm)
     await run_load_test(dut, inst, 19, store_data)
 
+@cocotb.test()
+async def test_backdoor_round_trip(dut):
+    """Loads a random 8kB image through the backdoor, patches an unaligned range and reads it all back."""
+    backdoor = Backdoor(dut)
+    image = bytearray(random.Random(0xBACD).randbytes(MEM_BYTES))
+    await backdoor.load_image(image)
+    await backdoor.write_memory(0x101, b"\xAA\xBB\xCC")
+    image[0x101:0x104] = b"\xAA\xBB\xCC"
+    assert await backdoor.dump_image() == image
+    assert await backdoor.read_memory(0x102, 3) == bytes(image[0x102:0x105])
+    assert backdoor.peek_word(0x100) == int.from_bytes(image[0x100:0x104], "little")
+
+@cocotb.test()
+async def test_load_store_batch(dut):
+    """Streams 500 random aligned loads and stores over a random data image through a single reset."""
+    cocotb.start_soon(Clock(dut.clk, 80, unit="ns").start(start_high=False))
+    rng = random.Random(0x5EED)
+    image = rng.randbytes(MEM_BYTES)
+    await Backdoor(dut).load_image(image)
+    vectors = []
+    for _ in range(500):
+        base = 0x100 + 4 * rng.randrange(64)
+        if rng.random() < 0.5:
+            funct3 = rng.choice([FUNCT3_WORD, FUNCT3_HALF, FUNCT3_HALF_UNSIGNED, FUNCT3_BYTE, FUNCT3_BYTE_UNSIGNED])
+            imm = rng.randrange(0, 64, 4 if funct3 == FUNCT3_WORD else 2 if funct3 & 1 else 1)
+            inst = assemble_i_instruction(OP_LOAD, funct3, rng.randrange(1, 32), 11, imm)
+            vectors.append(Vector(inst, {11: base}))
+        else:
+            funct3 = rng.choice([FUNCT3_WORD, FUNCT3_HALF, FUNCT3_BYTE])
+            imm = rng.randrange(0, 64, 4 if funct3 == FUNCT3_WORD else 2 if funct3 else 1)
+            inst = assemble_s_instruction(funct3, 11, 12, imm)
+            vectors.append(Vector(inst, {11: base, 12: rng.getrandbits(32)}))
+    await VectorRunner(dut, Iss(image)).run(vectors, timeout_cycles=6 * len(vectors))
+
 def test_load_store():
-    sim = os.getenv("SIM", "icarus")
+    sim = sim_name()
     proj_path = Path(__file__).resolve().parent.parent
-    os.environ["PROJ_ROOT"] = str(proj_path)
-    sources = str(proj_path / "top.f")
     memory_init_file = str(proj_path / "programs" / "test_mem") # Assuming memory_init.mem is in the same directory
 
     runner = get_runner(sim)
-    runner.build(
+    cached_build(
+        runner,
         hdl_toplevel="top",
-        always=True,
         timescale=("10ns", "1ps"),
-        build_args=["-c", sources],
-        defines={"MEM_FILE_PATH_PREFIX": memory_init_file}
+        sources=top_sources(),
+        build_args=build_args(sim),
     )
 
     runner.test(
@@ -237,6 +262,7 @@ def test_load_store():
         test_module="test_load_store",
         timescale=("10ns", "1ps"),
         hdl_toplevel_lang="verilog",
+        plusargs=program_plusargs(memory_init_file),
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,97 @@
+# test_memimage.py
+import struct
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from icyrisc.memimage import (
+    MEM_BYTES,
+    fit_image,
+    load_image,
+    parse_ihex,
+    parse_lane,
+    parse_memh,
+    read_lanes,
+    render_lane,
+    write_lanes,
+)
+
+PROGRAMS = Path(__file__).resolve().parent.parent / "programs"
+
+
+def elf32(segments, entry=0):
+    """Builds a minimal ELF32 little-endian RISC-V executable from (paddr, data, memsz) segments."""
+    phoff = 52
+    offset = phoff + 32 * len(segments)
+    header = b"\x7fELF" + bytes([1, 1, 1]) + bytes(9)
+    header += struct.pack("<HHIIIIIHHHHHH", 2, 243, 1, entry, phoff, 0, 0, 52, 32, len(segments), 0, 0, 0)
+    phdrs = b""
+    body = b""
+    for paddr, data, memsz in segments:
+        phdrs += struct.pack("<IIIIIIII", 1, offset + len(body), paddr, paddr, len(data), memsz, 5, 4)
+        body += data
+    return header + phdrs + body
+
+
+def test_memh_address_records():
+    image = parse_memh("deadbeef // first word\n@4\n00000013 00100093\n")
+    assert len(image) == 24
+    assert bytes(image[0:4]) == bytes.fromhex("efbeadde")
+    assert not image[4:16].any()
+    assert bytes(image[16:24]) == bytes.fromhex("1300000093001000")
+
+
+def test_ihex():
+    text = ":020000040000FA\n:0400100013000000D9\n:00000001FF\n"
+    image = parse_ihex(text)
+    assert bytes(image[0x10:0x14]) == bytes.fromhex("13000000")
+    with pytest.raises(ValueError, match="checksum"):
+        parse_ihex(":0400100013000000D8\n")
+
+
+def test_elf(tmp_path):
+    path = tmp_path / "prog.elf"
+    path.write_bytes(elf32([(0x0, bytes.fromhex("93001000"), 4), (0x100, b"\xaa\xbb", 8), (0xFFFFFFFC, b"", 4)]))
+    image = load_image(path)
+    assert len(image) == 0x108
+    assert bytes(image[0:4]) == bytes.fromhex("93001000")
+    assert bytes(image[0x100:0x108]) == b"\xaa\xbb" + bytes(6)
+
+
+def test_flat_binary_base(tmp_path):
+    path = tmp_path / "prog.bin"
+    path.write_bytes(b"\x01\x02\x03\x04")
+    image = load_image(path, base=8)
+    assert bytes(image) == bytes(8) + b"\x01\x02\x03\x04"
+
+
+def test_fit_image_overflow():
+    image = np.zeros(MEM_BYTES + 8, dtype=np.uint8)
+    assert len(fit_image(image)) == MEM_BYTES  # trailing zeros are fine
+    image[MEM_BYTES + 4] = 1
+    with pytest.raises(ValueError, match="past the"):
+        fit_image(image)
+    assert len(fit_image(image, truncate=True)) == MEM_BYTES
+    assert len(fit_image(b"\x01")) == MEM_BYTES
+
+
+def test_lanes_round_trip(tmp_path):
+    image = read_lanes(PROGRAMS / "rv32i_test")
+    words = load_image(PROGRAMS / "rv32i_test.txt")
+    assert image[: len(words)] == bytearray(words)
+
+    prefix = tmp_path / "prog"
+    assert len(write_lanes(prefix, image)) == 4
+    assert (tmp_path / "prog0.txt").read_bytes() == (PROGRAMS / "rv32i_test0.txt").read_bytes()
+    assert write_lanes(prefix, image) == []
+    image[1] ^= 0xFF
+    assert write_lanes(prefix, image) == [tmp_path / "prog1.txt"]
+
+
+def test_lane_text_round_trip():
+    values = np.arange(256, dtype=np.uint8)
+    text = render_lane(values)
+    assert text.startswith(b"00\n01\n") and text.endswith(b"ff\n")
+    assert (parse_lane(text.decode()) == values).all()
+    assert list(parse_lane("// dumped by $writememh\n@40\nde\nad\n")) == [0xDE, 0xAD]
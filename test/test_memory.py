@@ -0,0 +1,85 @@
+# test_memory.py
+from icyrisc.asm import assemble
+from icyrisc.isa import FUNCT3_BYTE, FUNCT3_BYTE_UNSIGNED, FUNCT3_HALF, FUNCT3_HALF_UNSIGNED, FUNCT3_WORD
+from icyrisc.iss import Iss
+from icyrisc.memimage import MEM_BYTES
+from icyrisc.memory import LEDS_ADDR, MICROS_ADDR, MILLIS_ADDR, Memory
+
+IMAGE = bytes.fromhex("78563412" "21436587" "efbeadde")  # 0x12345678, 0x87654321, 0xDEADBEEF
+
+
+def test_load_widths_and_extension():
+    memory = Memory(IMAGE)
+    assert memory.load(0x0, FUNCT3_WORD) == 0x12345678
+    assert memory.load(0x3, FUNCT3_WORD) == 0x12345678  # address bits 1:0 ignored
+    assert memory.load(0x6, FUNCT3_HALF) == 0xFFFF8765
+    assert memory.load(0x7, FUNCT3_HALF) == 0xFFFF8765  # bit 0 ignored
+    assert memory.load(0x6, FUNCT3_HALF_UNSIGNED) == 0x8765
+    assert memory.load(0x2, FUNCT3_HALF) == 0x1234
+    assert memory.load(0xB, FUNCT3_BYTE) == 0xFFFFFFDE
+    assert memory.load(0xB, FUNCT3_BYTE_UNSIGNED) == 0xDE
+    assert memory.load(0x1, FUNCT3_BYTE) == 0x56
+
+
+def test_stores_hit_only_their_lanes():
+    memory = Memory(IMAGE)
+    memory.store(0x1, 0xAABBCCDD, FUNCT3_BYTE)
+    memory.store(0x7, 0x11223344, FUNCT3_HALF)  # lands on bytes 6..7
+    memory.store(0xA, 0x55667788, FUNCT3_WORD)  # whole word 8..11
+    assert memory.read_word(0x0) == 0x1234DD78
+    assert memory.read_word(0x4) == 0x33444321
+    assert memory.read_word(0x8) == 0x55667788
+
+
+def test_outside_the_physical_range():
+    memory = Memory(IMAGE)
+    before = bytes(memory.mem)
+    for addr in (MEM_BYTES, 0x10000, 0x80000000, 0xFFFFFFF0):
+        memory.store(addr, 0xFFFFFFFF, FUNCT3_WORD)
+        assert memory.load(addr, FUNCT3_WORD) == 0
+    assert bytes(memory.mem) == before  # no aliasing into the 8kB
+    memory.store(MILLIS_ADDR, 0x1234, FUNCT3_WORD)  # read-only
+    assert memory.load(MILLIS_ADDR, FUNCT3_WORD) == 0
+
+
+def test_leds_register():
+    memory = Memory()
+    memory.store(LEDS_ADDR, 0x80402010, FUNCT3_WORD)
+    memory.store(LEDS_ADDR + 3, 0xFF, FUNCT3_BYTE)
+    memory.store(LEDS_ADDR, 0xBEEF, FUNCT3_HALF)
+    assert memory.leds == 0xFF40BEEF
+    assert memory.load(LEDS_ADDR + 2, FUNCT3_HALF_UNSIGNED) == 0xFF40
+    assert memory.load(LEDS_ADDR + 3, FUNCT3_BYTE) == 0xFFFFFFFF
+    assert [memory.duty(c) for c in ("led", "red", "green", "blue")] == [0xFF, 0x40, 0xBE, 0xEF]
+    assert memory.pwm(0x40) == {"led": True, "red": False, "green": True, "blue": True}
+    assert memory.pwm(0x100 + 0x3F)["red"]  # the counter wraps every 256 cycles
+
+
+def test_timers_follow_the_cycle_count():
+    memory = Memory()
+    memory.cycle = 11
+    assert (memory.load(MICROS_ADDR, FUNCT3_WORD), memory.load(MILLIS_ADDR, FUNCT3_WORD)) == (0, 0)
+    memory.cycle = 12_000 * 5 + 12 * 3
+    assert memory.micros == 5003 and memory.millis == 5
+    assert memory.load(MICROS_ADDR, FUNCT3_BYTE_UNSIGNED) == 5003 & 0xFF
+    memory.cycle = 12 * (1 << 32) + 24
+    assert memory.micros == 2  # mod 2^32
+
+
+def test_iss_goes_through_the_memory():
+    source = """
+        li   t0, -4          # leds
+        li   t1, 0x11223344
+        sw   t1, 0(t0)
+        sb   zero, 3(t0)
+        lw   a0, -4(t0)      # millis
+        lhu  a1, 2(t0)
+    done:
+        j done
+    """
+    memory = Memory(cycle=12_000 * 7)
+    iss = Iss(assemble(source).image, memory=memory)
+    iss.run(100)
+    assert memory.leds == 0x00223344
+    assert iss.regs[10] == 7 and iss.regs[11] == 0x0022
+    assert iss.mem is memory.mem
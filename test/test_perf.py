@@ -0,0 +1,44 @@
+# test_perf.py
+import pytest
+
+from icyrisc.fsm import ALU_WB, DECODE, EXEC_I, EXEC_R, FETCH
+from icyrisc.harness.monitor import Retired
+from icyrisc.isa import OP_AUIPC, OP_BTYPE, OP_ITYPE, OP_JAL, OP_JALR, OP_LOAD, OP_LUI, OP_RTYPE, OP_STYPE
+from icyrisc.iss import Iss
+from icyrisc.perf import FsmModel, FsmParseError, next_state_logic, opcode_histogram
+from icyrisc.rvgen import generate_program
+
+
+@pytest.fixture(scope="module")
+def model():
+    return FsmModel()
+
+
+def test_costs_follow_fsm_sv(model):
+    cycles = {op: model.cycles(op) for op in (OP_RTYPE, OP_ITYPE, OP_LUI, OP_AUIPC, OP_LOAD, OP_STYPE, OP_BTYPE, OP_JAL, OP_JALR)}
+    assert cycles == {OP_RTYPE: 4, OP_ITYPE: 4, OP_LUI: 4, OP_AUIPC: 3, OP_LOAD: 5, OP_STYPE: 5, OP_BTYPE: 3, OP_JAL: 4, OP_JALR: 4}
+    assert model.path(0x0F) == (FETCH, DECODE)  # fence: DECODE straight back to FETCH
+    assert model.path(0x00018033) == (FETCH, DECODE, EXEC_R, ALU_WB)
+
+
+def test_predict(model):
+    prediction = model.predict({OP_LOAD: 10, OP_BTYPE: 10})
+    assert prediction.instructions == 20 and prediction.cycles == 10 * 5 + 10 * 3 + 1
+    assert prediction.cpi == pytest.approx(81 / 20)
+    assert model.predict_words([0x00000013] * 4, reset=False).cycles == 16
+
+    counts = opcode_histogram(Iss(generate_program(2).image))
+    assert model.predict(counts).instructions == sum(counts.values())
+
+
+def test_validate(model):
+    good = Retired(0, 0x00000013, 4, 0, 0, None, 4, (FETCH, DECODE, EXEC_I, ALU_WB))
+    bad = Retired(4, 0x00000033, 8, 0, 0, None, 9, (FETCH, DECODE, EXEC_R, ALU_WB, ALU_WB))
+    validation = model.validate([good, bad])
+    assert validation.instructions == 2 and validation.predicted == 8 and validation.measured == 9
+    assert validation.mismatches == [(4, 0x33, (FETCH, DECODE, EXEC_R, ALU_WB), bad.path)]
+
+
+def test_unsupported_construct():
+    with pytest.raises(FsmParseError):
+        next_state_logic("always_comb begin if (x) next_state = FETCH; end")
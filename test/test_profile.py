@@ -0,0 +1,58 @@
+# test_profile.py
+import json
+import threading
+import time
+
+from icyrisc.harness.profile import SIMULATOR_FRAME, Sampler, _Counters, main, profile_modules, summary, write_profile
+
+
+def busy(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_folds_the_stacks_of_one_thread():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy, args=(stop,))
+    worker.start()
+    sampler = Sampler(worker.ident, 0.001, "test_busy").start()
+    time.sleep(0.1)
+    sampler.stop()
+    stop.set()
+    worker.join()
+
+    assert sum(sampler.stacks.values()) > 10
+    for line in sampler.folded().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        frames = stack.split(";")
+        assert frames[0] == "test_busy" and int(count) > 0
+    assert any("busy (test_profile.py)" in stack for stack in sampler.stacks)
+
+
+def test_idle_thread_is_booked_to_the_simulator():
+    sampler = Sampler(-1, 0.001, "test_idle").start()  # no such thread: never in Python
+    time.sleep(0.02)
+    sampler.stop()
+    assert set(sampler.stacks) == {("test_idle", SIMULATOR_FRAME)}
+
+
+def test_profiles_round_trip(tmp_path, capsys):
+    sampler = Sampler(-1, 0.001, "test_x")
+    sampler.stacks[("test_x", SIMULATOR_FRAME)] = 3
+    sampler.leaves[SIMULATOR_FRAME] = 3
+    sampler.stacks[("test_x", "run (t.py)")] = 1
+    sampler.leaves["run (t.py:4)"] = 1
+    counters = _Counters()
+    counters.callbacks, counters.reads, counters.writes = 40, 25, 7
+    write_profile(tmp_path, "test_mod.test_x", sampler, counters, 0.5, 1200)
+
+    assert (tmp_path / "test_mod.test_x.folded").read_text() == "test_x;[simulator] 3\ntest_x;run (t.py) 1\n"
+    [profile] = summary([tmp_path])
+    assert profile == json.loads((tmp_path / "test_mod.test_x.json").read_text())
+    assert profile["trigger_callbacks"] == 40 and profile["handle_writes"] == 7
+    assert profile["simulator_fraction"] == 0.75
+    assert profile["hotspots"][0] == {"function": SIMULATOR_FRAME, "samples": 3, "fraction": 0.75}
+
+    assert main([str(tmp_path)]) == 0
+    assert "test_mod.test_x" in capsys.readouterr().out
+    assert profile_modules("test_rtype") == ["icyrisc.harness.profile", "test_rtype"]
@@ -6,7 +6,9 @@ import random
 from cocotb.clock import Clock
 from cocotb.triggers import Timer
 from cocotb.triggers import RisingEdge, FallingEdge
-from cocotb_tools.runner import get_runner
+
+from icyrisc.buildcache import cached_build
+from icyrisc.simulator import build_args, get_runner, sim_name
 
 LANGUAGE = os.getenv("HDL_TOPLEVEL_LANG", "verilog").lower().strip()
 
@@ -40,14 +42,15 @@ async def test_pc_next(dut):
     assert dut.pc.value == 1
 
 def test_program_counter():
-    sim = os.getenv("SIM", "icarus")
+    sim = sim_name()
     proj_path = Path(__file__).resolve().parent
     sources = list((proj_path.parent / "src").glob("program_counter.sv"))
     runner = get_runner(sim)
-    runner.build(
+    cached_build(
+        runner,
         sources=sources,
+        build_args=build_args(sim),
         hdl_toplevel="program_counter",
-        always=True,
         timescale=("1ns", "1ps")
     )
 
@@ -0,0 +1,54 @@
+# test_pwm.py
+from icyrisc.harness.pwm import Brightness, PwmDecoder, counts
+from icyrisc.memory import PWM_PERIOD, Memory
+
+CLOCK = 80_000  # ps
+PERIOD = PWM_PERIOD * CLOCK
+
+
+def decode(schedule, cycles, channel="red", max_period=None):
+    """Runs the memory model's PWM for cycles clock cycles, switching leds to
+    schedule[cycle] at those cycles, and feeds the levels of channel."""
+    memory = Memory()
+    decoder = PwmDecoder(0, memory.pwm(0)[channel], max_period)
+    for cycle in range(cycles):
+        memory.leds = schedule.get(cycle, memory.leds)
+        decoder.edge(cycle * CLOCK, memory.pwm(cycle)[channel])
+    decoder.settle(cycles * CLOCK)
+    return decoder.series
+
+
+def test_steady_duty_is_one_sample():
+    series = decode({0: 0x00400000}, 20 * PWM_PERIOD)
+    assert series == [Brightness(0, 0x40 / PWM_PERIOD, PERIOD)]
+    assert counts(series[-1].duty) == 0x40
+
+
+def test_duty_changes_and_switching_off():
+    start = 10 * PWM_PERIOD
+    series = decode({0: 0x00200000, start: 0x00FF0000, 2 * start: 0}, 30 * PWM_PERIOD)
+    assert [(counts(s.duty), s.period) for s in series] == [(0x20, PERIOD), (0xFF, PERIOD), (0, None)]
+    assert series[1].time == start * CLOCK  # the first period at the new duty
+    assert series[2].time == (2 * start - 1) * CLOCK  # dark from the last fall, at counter 0xFF
+
+
+def test_other_channels_and_steady_dark():
+    assert decode({0: 0x01000000}, 4 * PWM_PERIOD, "led") == [Brightness(0, 1 / PWM_PERIOD, PERIOD)]
+    assert decode({0: 0x00FFFFFF}, 4 * PWM_PERIOD, "led") == [Brightness(0, 0.0, None)]
+
+
+def test_max_period_catches_a_switch_off_before_the_first_period():
+    schedule = {0: 0x00100000, 5: 0, 1000: 0x00100000}  # lit briefly, dark, then on again
+    assert counts(decode(schedule, 10 * PWM_PERIOD)[0].duty) != 0x10  # a bogus first period
+    series = decode(schedule, 10 * PWM_PERIOD, max_period=PERIOD)
+    assert series == [Brightness(0, 0.0, None), Brightness(1024 * CLOCK, 0x10 / PWM_PERIOD, PERIOD)]
+
+
+def test_mid_period_change_drops_partial_periods():
+    start = 10 * PWM_PERIOD + 0x90  # past red's fall at 0x40: the pin rises again at once
+    schedule = {0: 0x00400000, start: 0x00FF0000}
+    # without the period, the 0x90 and 0x70 clock intervals around the change decode as brightness
+    assert [counts(s.duty) for s in decode(schedule, 20 * PWM_PERIOD)][:3] == [0x40, 114, 254]
+    series = decode(schedule, 20 * PWM_PERIOD, max_period=PERIOD)
+    assert series == [Brightness(0, 0x40 / PWM_PERIOD, PERIOD),
+                      Brightness((start - 0x90 + PWM_PERIOD) * CLOCK, 0xFF / PWM_PERIOD, PERIOD)]
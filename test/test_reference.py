@@ -0,0 +1,78 @@
+# test_reference.py
+import numpy as np
+
+from icyrisc import control, isa
+from icyrisc.reference import (ALU_CORNERS, ALU_OPS, BTYPE, IMM_BITS, IMM_FORMATS, ITYPE, JTYPE, STYPE, UTYPE, alu,
+                               alu_vectors, imm_ext, imm_vectors, pack_alu, read_hex, scatter_bits, write_hex)
+
+SCALAR_IMM = {ITYPE: isa.imm_i, STYPE: isa.imm_s, BTYPE: isa.imm_b, UTYPE: isa.imm_u, JTYPE: isa.imm_j}
+
+
+def test_imm_ext_matches_the_scalar_decoders():
+    rng = np.random.default_rng(1)
+    insts = rng.integers(0, 1 << 32, size=2000, dtype=np.uint32)
+    for f in IMM_FORMATS:
+        got = imm_ext(insts >> np.uint32(7), f)
+        want = [SCALAR_IMM[f](int(inst)) & isa.MASK32 for inst in insts]
+        assert got.tolist() == want, f
+
+
+def test_imm_vectors_are_exhaustive():
+    immed, ctrl = imm_vectors(np.random.default_rng(2))
+    assert immed.size == 3 * 4096 + 2 * (1 << 20)
+    assert immed.max() < 1 << 25
+    for f in IMM_FORMATS:
+        mask = scatter_bits(np.uint32((1 << len(IMM_BITS[f])) - 1), IMM_BITS[f])
+        assert np.unique(immed[ctrl == f] & mask).size == 1 << len(IMM_BITS[f])
+        # the ignored bits really are ignored
+        assert (imm_ext(immed[ctrl == f], f) == imm_ext(immed[ctrl == f] & mask, f)).all()
+
+
+def scalar_alu(op, a, b):
+    sa, sb = isa.to_signed(a), isa.to_signed(b)
+    result = {
+        control.ADD: a + b, control.SUB: a - b, control.AND: a & b, control.OR: a | b, control.XOR: a ^ b,
+        control.SLT: int(sa < sb), control.SLTU: int(a < b), control.SLL: a << (b & 31),
+        control.SRL: a >> (b & 31), control.SRA: sa >> (b & 31), control.SRC1: a, control.SRC2: b,
+    }[op] & isa.MASK32
+    comp = control.GREATER
+    if op in (control.SLT, control.SLTU):
+        less = sa < sb if op == control.SLT else a < b
+        comp = control.LESS if less else control.EQUAL if a == b else control.GREATER
+    return result, comp
+
+
+def test_alu_matches_a_scalar_model():
+    v = alu_vectors(np.random.default_rng(3), 3000)
+    result, comp = alu(v)
+    for i in range(v["ALU_ctrl"].size):
+        a = int((v["PC"], v["PC_old"], v["rs1v"])[v["ALU_src1_sel"][i]][i])
+        b = (int(v["rs2v"][i]), int(v["imm_ext"][i]), 4)[v["ALU_src2_sel"][i]]
+        assert (int(result[i]), int(comp[i])) == scalar_alu(int(v["ALU_ctrl"][i]), a, b), i
+
+
+def test_alu_vectors_cover_every_corner_pair():
+    v = alu_vectors(np.random.default_rng(4), 0)
+    assert v["ALU_ctrl"].size == len(ALU_OPS) * 9 * len(ALU_CORNERS) ** 2
+    rs1_rs2 = (v["ALU_src1_sel"] == control.RS1V) & (v["ALU_src2_sel"] == control.RS2V) & (v["ALU_ctrl"] == control.SRA)
+    pairs = set(zip(v["rs1v"][rs1_rs2].tolist(), v["rs2v"][rs1_rs2].tolist()))
+    assert pairs == {(a, b) for a in ALU_CORNERS for b in ALU_CORNERS}
+    assert pack_alu(v)[0, 5] == (v["ALU_ctrl"][0] << 4) | (v["ALU_src2_sel"][0] << 2) | v["ALU_src1_sel"][0]
+
+
+def test_hex_round_trip(tmp_path):
+    words = np.array([0, 1, 0xDEADBEEF, 0xFFFFFFFF, 0x0ABCDEF0], dtype=np.uint32)
+    write_hex(tmp_path / "w.hex", words)
+    assert (tmp_path / "w.hex").read_text().splitlines()[2] == "deadbeef"
+    got, known = read_hex(tmp_path / "w.hex")
+    assert got.tolist() == words.tolist() and known.all()
+
+    rows = np.array([[1, 2], [0xFFFFFFFF, 0x80000000]], dtype=np.uint32)
+    write_hex(tmp_path / "r.hex", rows)
+    assert (tmp_path / "r.hex").read_text() == "00000001 00000002\nffffffff 80000000\n"
+    got, known = read_hex(tmp_path / "r.hex", columns=2)
+    assert got.tolist() == rows.tolist() and known.all()
+
+    (tmp_path / "x.hex").write_text("0000000x\nffffffff\n")
+    got, known = read_hex(tmp_path / "x.hex")
+    assert known.tolist() == [False, True] and got[1] == 0xFFFFFFFF
@@ -0,0 +1,64 @@
+# test_regress.py
+import ast
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from icyrisc.regress import MODULES, TEST_DIR, ShardResult, discover_tests, failed, merge_results, plan
+
+
+def test_every_module_discovers_tests():
+    for module in MODULES:
+        assert discover_tests(module), module
+    assert discover_tests("test_rtype")[:2] == ["test_add", "test_sub"]
+
+
+def test_entry_points_build_what_regress_builds():
+    # a module built with another timescale than its Bench would compile a second snapshot
+    for module, bench in MODULES.items():
+        tree = ast.parse((TEST_DIR / f"{module}.py").read_text())
+        timescales = {
+            ast.literal_eval(keyword.value)
+            for node in ast.walk(tree) if isinstance(node, ast.Call)
+            for keyword in node.keywords if keyword.arg == "timescale"
+        }
+        assert timescales == {bench.timescale}, module
+
+
+def test_plan_shares_builds():
+    shards = plan(["test_rtype", "test_itype", "test_cosim"])
+    assert [s.name for s in shards] == ["test_rtype", "test_itype", "test_cosim"]
+    assert shards[0].bench == shards[1].bench == shards[2].bench
+    assert shards[0].plusargs == shards[1].plusargs != shards[2].plusargs
+    assert shards[2].plusargs[0].endswith("programs/rv32i_test")
+
+    per_test = plan(["test_rtype"], per_test=True, keyword="sub")
+    assert [s.testcase for s in per_test] == ["test_sub"]
+    with pytest.raises(ValueError):
+        plan(["test_nothing"])
+
+
+def test_merge_results(tmp_path):
+    passed, failed = plan(["test_rtype", "test_jump"], per_test=True)[:2], plan(["test_cosim"])
+    xml = tmp_path / "a.xml"
+    xml.write_text(
+        '<testsuites><testsuite name="all"><testcase name="test_add" classname="test_rtype"/>'
+        '<testcase name="test_sub" classname="test_rtype"><failure message="boom"/></testcase>'
+        "</testsuite></testsuites>"
+    )
+    results = [ShardResult(passed[0], xml, 1.0, None), ShardResult(failed[0], None, 0.5, "build failed")]
+    assert merge_results(results, tmp_path / "results.xml") == (3, 2)
+    root = ET.parse(tmp_path / "results.xml").getroot()
+    assert [s.get("name") for s in root.iter("testsuite")] == ["test_rtype.test_add", "test_cosim"]
+    assert root.find("testsuite/testcase/error").get("message") == "build failed"
+
+
+def test_failed(tmp_path):
+    shard = plan(["test_rtype"])[0]
+    ok, bad = tmp_path / "ok.xml", tmp_path / "bad.xml"
+    ok.write_text('<testsuites><testsuite><testcase name="test_add"/></testsuite></testsuites>')
+    bad.write_text('<testsuites><testsuite><testcase name="test_add"><error message="x"/></testcase>'
+                   "</testsuite></testsuites>")
+    assert not failed(ShardResult(shard, ok, 1.0, None))
+    assert failed(ShardResult(shard, bad, 1.0, None))
+    assert failed(ShardResult(shard, None, 1.0, "simulator exited"))
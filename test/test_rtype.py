@@ -4,22 +4,18 @@ from pathlib import Path
 import random
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, FallingEdge
-from cocotb.types import Array
-from cocotb_tools.runner import get_runner
 
+from icyrisc.asm import assemble_r_instruction
+from icyrisc.buildcache import cached_build
+from icyrisc.simulator import build_args, get_runner, sim_name, top_sources
+from icyrisc.harness.backdoor import Backdoor
+from icyrisc.harness.vectors import Vector, VectorRunner
 from constants import *
 
 
-def assemble_r_instruction(funct7, funct3, rd, rs1, rs2):
-    """Assembles an R-type instruction."""
-    return (funct7 & 0x7F) << 25 | (rs2 & 0x1F) << 20 | (rs1 & 0x1F) << 15 | (funct3 & 0x7) << 12 | (rd & 0x1F) << 7 | (OP_RTYPE & 0x7F)
-
 async def initialize_registers(dut, reg_indexes, values):
-    """Initializes a specific register in the register file."""
-    current_registers = list(dut.reg0.register_file.value)
-    for reg_index, value in zip(reg_indexes, values):
-        current_registers[reg_index] = value
-    dut.reg0.register_file.value = Array(current_registers)
+    """Initializes specific registers in the register file through the backdoor."""
+    Backdoor(dut).write_registers(dict(zip(reg_indexes, values)))
 
 async def run_rtype_test(dut, inst, rd_index, expected):
     """Runs a single R-type instruction test."""
@@ -40,8 +36,8 @@ async def run_rtype_test(dut, inst, rd_index, expected):
 
     await FallingEdge(dut.clk)  # wait a bit so the last cycle registers
 
-    actual_result = dut.reg0.register_file.value[rd_index]
-    print(f"Got {hex(actual_result)}, Expected {hex(expected)}")
+    actual_result = dut.reg0.register_file[rd_index].value
+    dut._log.debug("Got 0x%X, Expected 0x%X", int(actual_result), expected)
     assert actual_result == expected
 
 @cocotb.test()
@@ -194,24 +190,36 @@ async def test_and(dut):
     expected_result = (rs1_val & rs2_val) & 0xFFFFFFFF
     await run_rtype_test(dut, inst, rd, expected_result)
 
+@cocotb.test()
+async def test_rtype_batch(dut):
+    """Streams 1000 random R-type vectors through a single reset, checked against the reference model."""
+    cocotb.start_soon(Clock(dut.clk, 80, unit="ns").start(start_high=False))
+    rng = random.Random(0x5EED)
+    ops = [(0b0000000, funct3) for funct3 in range(8)] + [(0b0100000, 0b000), (0b0100000, 0b101)]
+    vectors = []
+    for _ in range(1000):
+        funct7, funct3 = rng.choice(ops)
+        rd, rs1, rs2 = (rng.randrange(1, 32) for _ in range(3))
+        regs = {rs1: rng.getrandbits(32), rs2: rng.getrandbits(32)}
+        vectors.append(Vector(assemble_r_instruction(funct7, funct3, rd, rs1, rs2), regs))
+    await VectorRunner(dut).run(vectors, timeout_cycles=6 * len(vectors))
+
 def test_rtype():
-    sim = os.getenv("SIM", "icarus")
-    proj_path = Path(__file__).resolve().parent.parent
-    os.environ["PROJ_ROOT"] = str(proj_path)
-    sources = str(proj_path / "top.f")
+    sim = sim_name()
 
     runner = get_runner(sim)
-    runner.build(
+    cached_build(
+        runner,
         hdl_toplevel="top",
-        always=True,
-        timescale=("1ns", "1ps"),
-        build_args=["-f", sources],
+        timescale=("10ns", "1ps"),
+        sources=top_sources(),
+        build_args=build_args(sim),
     )
 
     runner.test(
         hdl_toplevel="top",
         test_module="test_rtype",
-        timescale=("1ns", "1ps"),
+        timescale=("10ns", "1ps"),
         hdl_toplevel_lang="verilog",
     )
 
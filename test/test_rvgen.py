@@ -0,0 +1,64 @@
+# test_rvgen.py
+import pytest
+
+from icyrisc.isa import OP_BTYPE, OP_JAL, OP_LOAD, OP_STYPE, funct3, imm_b, imm_i, imm_j, imm_s, opcode, rd, rs1, writes_rd
+from icyrisc.iss import Iss
+from icyrisc.rvgen import BASE, COUNTER, Config, check_config, generate, generate_program, programs
+
+WIDTH = {0b000: 1, 0b100: 1, 0b001: 2, 0b101: 2, 0b010: 4}
+
+
+def words(image):
+    return [int.from_bytes(image[i : i + 4], "little") for i in range(0, len(image), 4)]
+
+
+def test_same_seed_same_program():
+    assert generate(42) == generate(42)
+    assert generate(42) != generate(43)
+    assert [p.source for p in programs(42, 3)] == [generate(s) for s in (42, 43, 44)]
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_programs_are_legal_and_halt(seed):
+    config = Config(length=400)
+    program = generate_program(seed, config)
+    start, end = config.data
+    base = start + 2048
+    for pc, inst in enumerate(words(program.image)):
+        pc *= 4
+        op = opcode(inst)
+        if op in (OP_LOAD, OP_STYPE):
+            assert rs1(inst) == BASE
+            addr = base + (imm_i(inst) if op == OP_LOAD else imm_s(inst))
+            assert start <= addr <= end - WIDTH[funct3(inst)] and addr % WIDTH[funct3(inst)] == 0
+        elif op == OP_BTYPE and imm_b(inst) < 0:
+            assert rs1(inst) == COUNTER, f"backward branch at 0x{pc:x} does not close a loop"
+        elif op == OP_JAL:
+            assert imm_j(inst) >= 0
+        if pc > 4 * 32 and writes_rd(inst) and op != OP_JAL:
+            assert rd(inst) != BASE
+
+    iss = Iss(program.image)
+    for _ in range(100_000):
+        step = iss.step()
+        if step.store is not None:
+            assert start <= step.store[0] < end
+        if iss.halted:
+            break
+    assert iss.halted, f"seed {seed} did not halt"
+
+
+def test_mix_and_dependency():
+    source = generate(5, Config(length=200, mix={"load": 1}, dependency=1.0))
+    body = [line.split()[0] for line in source.splitlines() if line.startswith("    ") and not line.startswith("    li ")]
+    assert set(body) <= {"lb", "lh", "lw", "lbu", "lhu", "j"}
+    assert len(body) == 201
+
+
+def test_bad_config():
+    with pytest.raises(ValueError):
+        check_config(Config(data=(0x1800, 0x2800)))
+    with pytest.raises(ValueError):
+        check_config(Config(mix={"fence": 1}))
+    with pytest.raises(ValueError):
+        generate_program(1, Config(length=2000, data=(0x100, 0x200)))
@@ -0,0 +1,29 @@
+# test_simulator.py
+import pytest
+
+from icyrisc.buildcache import resolve_sources
+from icyrisc.simulator import ROOT, TOP_F, build_args, sim_name, top_sources
+
+
+def test_sim_name(monkeypatch):
+    monkeypatch.delenv("SIM", raising=False)
+    assert sim_name() == "icarus"
+    monkeypatch.setenv("SIM", "Verilator")
+    assert sim_name() == "verilator"
+    assert sim_name("icarus") == "icarus"
+    with pytest.raises(ValueError):
+        sim_name("questa")
+
+
+def test_top_sources_match_top_f():
+    sources = top_sources()
+    assert sources == [str(p) for p in resolve_sources(build_args=["-c", str(TOP_F)])]
+    assert sources[0] == str(ROOT / "src" / "control" / "constants.sv")
+    assert sources[-1] == str(ROOT / "src" / "top.sv")
+
+
+def test_build_args(monkeypatch):
+    assert build_args("icarus") == []
+    monkeypatch.setenv("ICYRISC_VERILATOR_THREADS", "4")
+    args = build_args("verilator")
+    assert args[args.index("--threads") + 1] == "4" and "--trace" not in args
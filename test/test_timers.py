@@ -0,0 +1,106 @@
+# test_timers.py
+from icyrisc.asm import assemble
+from icyrisc.harness.monitor import Retired
+from icyrisc.harness.timers import SpinDetector, exit_cycle, jump_target
+from icyrisc.isa import MASK32, OP_LOAD, imm_i, opcode, rs1
+from icyrisc.iss import Iss
+from icyrisc.memory import CYCLES_PER_MILLI, LEDS_ADDR
+from icyrisc.perf import FsmModel
+
+WAIT_50MS = """
+        lw   t1, -8(zero)    # millis
+        addi t1, t1, 50
+    wait:
+        lw   t0, -8(zero)
+        bltu t0, t1, wait
+        li   t2, 0xFF
+        sw   t2, -4(zero)    # leds
+    done:
+        j done
+"""
+
+
+def retire(iss, fsm):
+    """Steps iss once, advancing its memory by the FSM's cycles, as a Retired record."""
+    inst = iss.fetch(iss.pc)
+    load = (iss.regs[rs1(inst)] + imm_i(inst)) & MASK32 if opcode(inst) == OP_LOAD else None
+    iss.memory.cycle += len(fsm.path(opcode(inst)))
+    s = iss.step()
+    return Retired(s.pc, s.inst, s.next_pc, s.rd, s.rd_value, s.store, iss.memory.cycle, (), None, load)
+
+
+def spin_of(source, steps=50):
+    fsm = FsmModel()
+    iss = Iss(assemble(source).image)
+    detector = SpinDetector()
+    for _ in range(steps):
+        spin = detector.retired(retire(iss, fsm))
+        if spin is not None:
+            return spin, iss
+    return None, iss
+
+
+def test_detects_a_millis_wait():
+    spin, iss = spin_of(WAIT_50MS)
+    assert spin is not None
+    assert spin.head == 0x8 and [pc for pc, _ in spin.body] == [0x8, 0xC]
+    assert spin.cycles == sum(len(FsmModel().path(opcode(inst))) for _, inst in spin.body)
+    # the head has just retired again: the loop leaves once millis reaches 50
+    assert exit_cycle(spin, iss.registers, iss.memory.cycle) == 50 * CYCLES_PER_MILLI
+    assert exit_cycle(spin, iss.registers, iss.memory.cycle, horizon=1000) is None
+
+
+def run_until_leds(source, fast, limit=200_000):
+    """Runs source until it writes leds, jumping memory.cycle the way TimerFastForward
+    moves the RTL's timers when fast is set. Returns (instructions, cycle of the store)."""
+    fsm = FsmModel()
+    iss = Iss(assemble(source).image)
+    detector = SpinDetector()
+    for n in range(1, limit):
+        record = retire(iss, fsm)
+        if record.store is not None and record.store[0] == LEDS_ADDR:
+            return n, record.cycle
+        spin = detector.retired(record) if fast else None
+        if spin is not None:
+            detector.reset()
+            target = jump_target(spin, iss.registers, iss.memory.cycle)
+            if target is not None:
+                iss.memory.cycle = target
+    raise AssertionError("the program never wrote leds")
+
+
+def test_fast_forward_exits_where_the_full_run_does():
+    slow, slow_cycle = run_until_leds(WAIT_50MS, fast=False)
+    fast, fast_cycle = run_until_leds(WAIT_50MS, fast=True)
+    assert slow > 100_000 and fast < 20
+    spin, _ = spin_of(WAIT_50MS)
+    assert abs(fast_cycle - slow_cycle) <= spin.cycles  # within one pass of the loop
+
+
+def test_ignores_loops_that_store_or_read_memory():
+    spin, _ = spin_of("""
+        li   t1, 50
+    wait:
+        lw   t0, -8(zero)
+        sw   t0, 0x100(zero)
+        bltu t0, t1, wait
+    """)
+    assert spin is None
+    spin, _ = spin_of("""
+        li   t1, 50
+    wait:
+        lw   t0, -8(zero)
+        lw   t2, 0x100(zero)
+        bltu t0, t1, wait
+    """)
+    assert spin is None
+
+
+def test_ignores_loops_without_timer_loads():
+    spin, _ = spin_of("""
+        li   t0, 1000
+    loop:
+        addi t0, t0, -1
+        bnez t0, loop
+    """)
+    assert spin is None
@@ -0,0 +1,58 @@
+# test_trace.py
+import numpy as np
+import pytest
+
+from icyrisc.harness.monitor import Retired
+from icyrisc.iss import Iss
+from icyrisc.perf import FsmModel
+from icyrisc.rvgen import generate_program
+from icyrisc.trace import RECORD, TraceError, TraceWriter, diff, loads, opcode_histogram, rd, read, record_model, stores
+
+
+def test_round_trip_across_buffer_boundaries(tmp_path):
+    path = tmp_path / "t.trace"
+    with TraceWriter(path, buffer_records=7) as writer:
+        for i in range(100):
+            writer.write(i * 4, 4 * i, 0x00000013 | (i % 32) << 7, 4 * i + 4, i)
+    trace = read(path)
+    assert isinstance(trace, np.memmap) and trace.dtype == RECORD and len(trace) == 100
+    assert (trace["pc"] == np.arange(100) * 4).all()
+    assert (rd(trace) == np.arange(100) % 32).all()
+
+
+def test_monitor_records(tmp_path):
+    path = tmp_path / "rtl.trace"
+    with TraceWriter(path) as writer:
+        writer.retired(Retired(0, 0x00A12023, 4, None, None, (0x100, 0xCAFE, 2), 5, ()))  # sw a0, 0(sp)
+        writer.retired(Retired(4, 0x00012503, 8, 10, 0xCAFE, None, 10, (), None, 0x100))  # lw a0, 0(sp)
+    trace = read(path)
+    assert list(stores(trace)) == [True, False] and list(loads(trace)) == [False, True]
+    assert list(trace["mem_addr"]) == [0x100, 0x100] and list(trace["mem_data"]) == [0xCAFE, 0xCAFE]
+    assert list(rd(trace)) == [-1, 10]
+
+
+def test_model_traces_compare(tmp_path):
+    image = generate_program(4).image
+    model = FsmModel()
+    with TraceWriter(tmp_path / "a.trace") as writer:
+        n = record_model(Iss(image), writer, cycles=model.cycles)
+    with TraceWriter(tmp_path / "b.trace") as writer:
+        record_model(Iss(image), writer, max_steps=n - 3)
+    a, b = read(tmp_path / "a.trace"), read(tmp_path / "b.trace")
+    assert len(a) == n and diff(a, a) is None and diff(a, b) == n - 3
+    assert model.predict(opcode_histogram(a), reset=False).cycles == int(a["cycle"][-1])
+    assert loads(a).any() and (a["mem_addr"][loads(a)] >= 0x1000).all()
+
+    changed = np.array(a)
+    changed["rd_value"][10] ^= 1
+    assert diff(a, changed) == 10
+
+    with TraceWriter(tmp_path / "c.trace") as writer:
+        assert record_model(Iss(image), writer, max_steps=0) == 0
+    assert len(read(tmp_path / "c.trace")) == 0
+
+
+def test_rejects_other_files(tmp_path):
+    (tmp_path / "x").write_bytes(b"not a trace at all")
+    with pytest.raises(TraceError):
+        read(tmp_path / "x")
@@ -5,20 +5,16 @@ from pathlib import Path
 import random
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, FallingEdge
-from cocotb.types import Array
-from cocotb_tools.runner import get_runner
 
+from icyrisc.asm import assemble_u_instruction
+from icyrisc.buildcache import cached_build
+from icyrisc.simulator import build_args, get_runner, sim_name, top_sources
+from icyrisc.harness.backdoor import Backdoor
 from constants import *
 
-def assemble_u_instruction(opcode, rd, imm):
-    """Assembles a U-type instruction."""
-    return (imm & 0xFFFFF) << 12 | (rd & 0x1F) << 7 | (opcode & 0x7F)
-
 async def initialize_register(dut, reg_index, value):
-    """Initializes a specific register in the register file."""
-    current_registers = list(dut.reg0.register_file.value)
-    current_registers[reg_index] = value
-    dut.reg0.register_file.value = Array(current_registers)
+    """Initializes a specific register in the register file through the backdoor."""
+    Backdoor(dut).write_register(reg_index, value)
 
 async def run_utype_test(dut, inst, rd_index, expected):
     """Runs a single U-type instruction test."""
@@ -39,8 +35,8 @@ async def run_utype_test(dut, inst, rd_index, expected):
 
     await FallingEdge(dut.clk)  # wait a bit so the last cycle registers
 
-    actual_result = dut.reg0.register_file.value[rd_index]
-    print(f"Got {hex(actual_result)}, Expected {hex(expected)}")
+    actual_result = dut.reg0.register_file[rd_index].value
+    dut._log.debug("Got 0x%X, Expected 0x%X", int(actual_result), expected)
     assert actual_result == expected
 
 @cocotb.test()
@@ -66,23 +62,21 @@ async def test_auipc(dut):
     await run_utype_test(dut, inst, rd, expected_result)
 
 def test_utype():
-    sim = os.getenv("SIM", "icarus")
-    proj_path = Path(__file__).resolve().parent.parent
-    os.environ["PROJ_ROOT"] = str(proj_path)
-    sources = str(proj_path / "top.f")
+    sim = sim_name()
 
     runner = get_runner(sim)
-    runner.build(
+    cached_build(
+        runner,
         hdl_toplevel="top",
-        always=True,
-        timescale=("1ns", "1ps"),
-        build_args=["-f", sources],
+        timescale=("10ns", "1ps"),
+        sources=top_sources(),
+        build_args=build_args(sim),
     )
 
     runner.test(
         hdl_toplevel="top",
         test_module="test_utype",
-        timescale=("1ns", "1ps"),
+        timescale=("10ns", "1ps"),
         hdl_toplevel_lang="verilog",
     )
 
@@ -0,0 +1,103 @@
+# test_vcd.py
+from collections import Counter
+
+import pytest
+
+from icyrisc.fsm import STATE_NAMES
+from icyrisc.vcd import Vcd, VcdError, VcdWriter, first, pulses, sample, state_cycles
+
+HEADER = """$date today $end
+$timescale 1ns $end
+$scope module top_tb $end
+$var reg 1 ! clk $end
+$scope module u0 $end
+$var wire 1 ! clk $end
+$var wire 1 " reg_wren $end
+$var wire 1 # mem_wren $end
+$scope module c0 $end
+$scope module f0 $end
+$var reg 4 $ state [3:0] $end
+$upscope $end
+$upscope $end
+$scope module reg0 $end
+$var wire 5 % wd_reg [4:0] $end
+$upscope $end
+$upscope $end
+$upscope $end
+$enddefinitions $end
+"""
+
+# FETCH DECODE EXEC_I ALU_WB (addi x5) then FETCH DECODE MEM_ADDR MEM_WRITE STORE_COOLDOWN (sw)
+STATES = [0, 1, 4, 9, 0, 1, 2, 7, 12]
+
+
+def write_dump(path, repeat=1):
+    """A dump of `repeat` copies of STATES after reset (BRANCH), clocked with period 10, state
+    changing on negedges."""
+    lines = [HEADER, "#0\n$dumpvars\n0!\n0\"\n0#\nb1010 $\nbxxxxx %\n$end\n"]
+    t = 0
+    for _ in range(repeat):
+        for state in STATES:
+            lines.append(f"#{t + 5}\n1!\n")
+            lines.append(f"#{t + 10}\n0!\nb{state:b} $\n")
+            lines.append(f"{1 if state == 9 else 0}\"\n{1 if state == 7 else 0}#\n")
+            lines.append(f"b{5 if state in (1, 4, 9) else 0:b} %\n")
+            t += 10
+    lines.append(f"#{t + 5}\n1!\n")
+    path.write_text("".join(lines))
+    return path
+
+
+def test_header(tmp_path):
+    vcd = Vcd(write_dump(tmp_path / "a.vcd"))
+    assert vcd.timescale == "1ns"
+    assert vcd.find("f0.state").width == 4
+    assert vcd.find("reg0.wd_reg").name == "top_tb.u0.reg0.wd_reg"
+    assert vcd.find("clk").name == "top_tb.clk"
+    with pytest.raises(VcdError):
+        vcd.find("nothing")
+
+
+def test_queries(tmp_path):
+    vcd = Vcd(write_dump(tmp_path / "a.vcd"))
+    counts = state_cycles(vcd)
+    assert counts == {"BRANCH": 1, "FETCH": 2, "DECODE": 2, "EXEC_I": 1, "ALU_WB": 1, "MEM_ADDR": 1, "MEM_WRITE": 1,
+                      "STORE_COOLDOWN": 1}
+    # reg_wren goes high at 40 (ALU_WB), so the first edge that samples it is 45
+    assert first(vcd, reg_wren=1, wd_reg=5) == 45
+    assert first(vcd, reg_wren=1, wd_reg=6) is None
+    assert list(pulses(vcd, "mem_wren")) == [85]
+    assert vcd.values_at(42, "state", "wd_reg") == {"state": 9, "wd_reg": 5}
+    assert vcd.values_at(0, "wd_reg") == {"wd_reg": None}
+
+
+def test_index_seek_matches_scan(tmp_path):
+    path = write_dump(tmp_path / "big.vcd", repeat=200)
+    plain = Vcd(path)
+    expected = list(sample(plain, "clk", "state", "wd_reg", start=7000, end=9000))
+
+    indexed = Vcd(path)
+    index = indexed.index(step=1024)
+    assert len(index["times"]) > 10
+    assert (tmp_path / "big.vcd.idx.npz").exists()
+    assert list(sample(indexed, "clk", "state", "wd_reg", start=7000, end=9000)) == expected
+    assert indexed.values_at(12345, "state") == plain.values_at(12345, "state")
+    # a second reader picks the saved index up
+    again = Vcd(path)
+    assert (again.index(step=1024)["offsets"] == index["offsets"]).all()
+    assert state_cycles(again, start=1) == state_cycles(plain, start=1)
+
+
+def test_writer_round_trip(tmp_path):
+    path = tmp_path / "w.vcd"
+    with VcdWriter(path, {"clk": 1, "c0.f0.state": 4, "pc": 32}) as out:
+        for cycle, state in enumerate(STATES):
+            out.change(cycle * 10, "clk", "0")
+            out.change(cycle * 10, "c0.f0.state", state)
+            out.change(cycle * 10, "pc", "x" * 32 if cycle == 0 else cycle * 4)
+            out.change(cycle * 10 + 5, "clk", "1")
+    vcd = Vcd(path)
+    assert vcd.find("f0.state").name == "top.c0.f0.state"
+    assert state_cycles(vcd) == Counter(STATE_NAMES[s] for s in STATES)
+    assert vcd.values_at(0, "pc") == {"pc": None}
+    assert vcd.values_at(30, "pc") == {"pc": 12}